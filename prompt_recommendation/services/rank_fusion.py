@@ -0,0 +1,173 @@
+"""
+Early-terminating top-k fusion of ranked result streams
+
+Vendored copy: prompt_recommendation is deliberately self-contained (no imports
+from vibe_prompt_reco_vector_v0.2). The canonical copy is
+vibe_prompt_reco_vector_v0.2/src/services/rank_fusion.py; change that one first, then copy it here.
+"""
+
+import heapq
+import math
+from typing import List, Callable, Optional, Sequence, Tuple
+
+import numpy as np
+
+FetchFn = Callable[[int], Tuple[np.ndarray, np.ndarray]]
+
+
+class RankedStream:
+    """Results in descending score order, pulled one at a time.
+
+    ``fetch(depth)`` returns the ids and scores of the best ``depth`` results
+    (e.g. an index search); when the stream runs past them it fetches again
+    with twice the depth. Documents the stream never returns score ``floor``.
+    """
+
+    def __init__(self, fetch: FetchFn, total: int, first_depth: int = 16, floor: float = 0.0):
+        self._fetch = fetch
+        self.total = total
+        self.floor = floor
+        self._next_depth = max(1, first_depth)
+        self._ids = np.empty(0, dtype=np.int64)
+        self._scores = np.empty(0, dtype=np.float32)
+        self.position = 0  # results pulled so far; also the rank of the last one
+        self.exhausted = total == 0
+        self._last = math.inf
+
+    @classmethod
+    def from_scores(cls, scores: np.ndarray, floor: float = 0.0) -> "RankedStream":
+        """Stream over a score per document; documents scoring exactly ``floor`` are left out"""
+        ids = np.flatnonzero(scores != floor)
+        order = ids[np.argsort(-scores[ids], kind="stable")]
+        return cls(lambda depth: (order[:depth], scores[order[:depth]]), len(order), len(order), floor)
+
+    def next(self) -> Optional[Tuple[int, float]]:
+        if self.exhausted:
+            return None
+        if self.position >= len(self._ids):
+            depth = min(self._next_depth, self.total)
+            ids, scores = self._fetch(depth)
+            self._ids, self._scores = ids, scores
+            self._next_depth = depth * 2
+            if self.position >= len(ids):
+                self.exhausted = True
+                return None
+        doc, score = int(self._ids[self.position]), float(self._scores[self.position])
+        self.position += 1
+        self._last = score
+        if self.position >= self.total:
+            self.exhausted = True
+        return doc, score
+
+    @property
+    def bound(self) -> float:
+        """Highest score a document not pulled yet can have in this stream"""
+        return self.floor if self.exhausted else self._last
+
+
+def threshold_top_k(
+    streams: Sequence[RankedStream],
+    weights: Sequence[float],
+    score_of: Sequence[Callable[[int], float]],
+    k: int
+) -> List[Tuple[int, float]]:
+    """Fagin's threshold algorithm for a weighted sum of stream scores.
+
+    Pulls one result from every stream per round and scores each new
+    document exactly through ``score_of`` (random access). Stops as soon as
+    the k-th best fused score reaches the threshold, the best score any
+    unseen document could still have. Weights must be non-negative.
+    """
+    seen = set()
+    heap: List[Tuple[float, int]] = []
+    while True:
+        progressed = False
+        for stream in streams:
+            item = stream.next()
+            if item is None:
+                continue
+            progressed = True
+            doc = item[0]
+            if doc in seen:
+                continue
+            seen.add(doc)
+            fused = sum(weight * score(doc) for weight, score in zip(weights, score_of))
+            if len(heap) < k:
+                heapq.heappush(heap, (fused, doc))
+            elif fused > heap[0][0]:
+                heapq.heapreplace(heap, (fused, doc))
+        if not progressed:
+            break
+        threshold = sum(weight * stream.bound for weight, stream in zip(weights, streams))
+        if len(heap) >= k and heap[0][0] >= threshold:
+            break
+    return [(doc, fused) for fused, doc in sorted(heap, reverse=True)]
+
+
+def rrf_top_k(
+    streams: Sequence[RankedStream],
+    k: int,
+    weights: Optional[Sequence[float]] = None,
+    c: float = 60.0
+) -> List[Tuple[int, float]]:
+    """Reciprocal-rank fusion, sum of ``weight / (c + rank)``, with no-random-access early stopping.
+
+    A document's rank in a stream is unknown until pulled, so each seen
+    document has a lower bound (known ranks only) and an upper bound (as if
+    every missing rank were the next one). Stops once k documents' lower
+    bounds reach every other document's upper bound, including documents
+    not seen anywhere yet. That settles the set but not its order, so the
+    streams a winner has not been pulled from yet are pulled further until
+    every winner's score is exact.
+    """
+    weights = list(weights) if weights is not None else [1.0] * len(streams)
+    lower = {}
+    missing = {}
+
+    def pull(i: int) -> bool:
+        item = streams[i].next()
+        if item is None:
+            return False
+        doc = item[0]
+        if doc not in lower:
+            lower[doc] = 0.0
+            missing[doc] = set(range(len(streams)))
+        lower[doc] += weights[i] / (c + streams[i].position)
+        missing[doc].discard(i)
+        return True
+
+    rounds = 0
+    while True:
+        progressed = False
+        for i in range(len(streams)):
+            progressed = pull(i) or progressed
+        rounds += 1
+        if not progressed:
+            break
+        # Bounds only tighten slowly; checking every k rounds keeps this linear-ish
+        if rounds % max(k, 1) and not all(stream.exhausted for stream in streams):
+            continue
+        gain = [0.0 if s.exhausted else w / (c + s.position + 1) for s, w in zip(streams, weights)]
+        if len(lower) < k:
+            continue
+        docs = list(lower)
+        lows = np.array([lower[d] for d in docs])
+        highs = lows + np.array([sum(gain[i] for i in missing[d]) for d in docs])
+        top = np.argsort(-lows, kind="stable")[:k]
+        rest = np.ones(len(docs), dtype=bool)
+        rest[top] = False
+        ceiling = max(float(highs[rest].max()) if rest.any() else 0.0, sum(gain))
+        if lows[top].min() >= ceiling:
+            break
+    winners = sorted(lower, key=lower.get, reverse=True)[:k]
+    while True:
+        # A winner absent from an exhausted stream gets nothing from it; any other missing rank is still ahead
+        pending = [
+            i for i, stream in enumerate(streams)
+            if not stream.exhausted and any(i in missing[doc] for doc in winners)
+        ]
+        if not pending:
+            break
+        for i in pending:
+            pull(i)
+    return sorted(((doc, lower[doc]) for doc in winners), key=lambda item: (-item[1], item[0]))
@@ -1,5 +1,6 @@
 """Recommendation service with keyword and vector search"""
 
+import hashlib
 import os
 import pickle
 import logging
@@ -8,6 +9,10 @@ import numpy as np
 import faiss
 from sentence_transformers import SentenceTransformer
 
+from config import KEYWORD_WEIGHT, VECTOR_WEIGHT
+from services.atomic_files import ArtifactError, file_lock, read_artifact, write_artifact
+from services.rank_fusion import RankedStream, rrf_top_k
+
 logger = logging.getLogger(__name__)
 
 
@@ -60,11 +65,18 @@ class RecommendationService:
         if not prompts or not user_input:
             return []
         
-        tags = self.extract_tags(user_input)
+        scores = self._keyword_scores(user_input, prompts)
+        ids = np.flatnonzero(scores > 0)
+        order = ids[np.argsort(-scores[ids], kind="stable")]
+        return [prompts[i] for i in order[:top_k]]
+    
+    def _keyword_scores(self, user_input: str, prompts: List[Dict[str, Any]]) -> np.ndarray:
+        """Keyword score of every prompt (title hit 2, content hit 1, plus shared tags)"""
+        tags = set(self.extract_tags(user_input))
         user_words = set(user_input.lower().split())
         
-        scored_prompts = []
-        for prompt in prompts:
+        scores = np.zeros(len(prompts), dtype=np.float32)
+        for i, prompt in enumerate(prompts):
             score = 0
             
             # Check title and prompt content
@@ -75,34 +87,37 @@ class RecommendationService:
                 
             # Check keywords
             prompt_keywords = [kw.lower() for kw in prompt.get("keywords", [])]
-            score += len(set(tags) & set(prompt_keywords))
-            
-            if score > 0:
-                scored_prompts.append((score, prompt))
+            score += len(tags & set(prompt_keywords))
+            scores[i] = score
         
-        scored_prompts.sort(key=lambda x: x[0], reverse=True)
-        return [p[1] for p in scored_prompts[:top_k]]
+        return scores
     
     def _build_vector_index(self, prompts: List[Dict[str, Any]]) -> Optional[faiss.Index]:
         """Build FAISS index for vector search"""
         if not prompts:
             return None
             
-        # Check cache
+        texts = [f"{p.get('title', '')} {p.get('prompt', '')} {' '.join(p.get('keywords', []))}" 
+                for p in prompts]
+        expected = {
+            "model_name": self.model_name,
+            "fingerprint": hashlib.blake2b("\x00".join(texts).encode("utf-8"), digest_size=16).hexdigest()
+        }
+        
+        # Check cache (the manifest rejects another model, corpus or a truncated file before unpickling)
         if os.path.exists(self.cache_file):
             try:
-                with open(self.cache_file, 'rb') as f:
-                    cache = pickle.load(f)
-                    if len(cache.get('prompts', [])) == len(prompts):
-                        return cache['index']
-            except:
-                pass
+                with file_lock(self.cache_file, shared=True):
+                    _, payload = read_artifact(self.cache_file, expected)
+                return pickle.loads(payload)['index']
+            except ArtifactError as e:
+                logger.info(f"Index cache not used: {e}")
+            except Exception as e:
+                logger.error(f"Failed to load index cache: {e}")
         
         # Build new index
         try:
             model = self._load_model()
-            texts = [f"{p.get('title', '')} {p.get('prompt', '')} {' '.join(p.get('keywords', []))}" 
-                    for p in prompts]
             
             embeddings = model.encode(texts, convert_to_numpy=True)
             
@@ -114,15 +129,19 @@ class RecommendationService:
             faiss.normalize_L2(embeddings)
             index.add(embeddings.astype('float32'))
             
-            # Save cache
-            with open(self.cache_file, 'wb') as f:
-                pickle.dump({'index': index, 'prompts': prompts}, f)
-                
-            return index
-            
         except Exception as e:
             logger.error(f"Failed to build index: {e}")
             return None
+        
+        # Save cache (atomically, under an inter-process lock)
+        try:
+            payload = pickle.dumps({'index': index, 'prompts': prompts}, protocol=pickle.HIGHEST_PROTOCOL)
+            with file_lock(self.cache_file):
+                write_artifact(self.cache_file, payload, {**expected, "dimension": dimension, "count": len(prompts)})
+        except Exception as e:
+            logger.error(f"Failed to save index cache: {e}")
+        
+        return index
     
     def vector_recommend(self, user_input: str, prompts: List[Dict[str, Any]], 
                         top_k: int = 5) -> List[Dict[str, Any]]:
@@ -156,42 +175,42 @@ class RecommendationService:
     
     def hybrid_recommend(self, user_input: str, prompts: List[Dict[str, Any]], 
                         top_k: int = 5) -> List[Dict[str, Any]]:
-        """Hybrid recommendation combining keyword and vector search"""
-        keyword_results = self.keyword_recommend(user_input, prompts, top_k * 2)
-        vector_results = self.vector_recommend(user_input, prompts, top_k * 2)
-        
-        # Merge and rank
-        seen_ids = set()
-        merged = []
-        
-        # Add all results with scores
-        for i, prompt in enumerate(keyword_results):
-            prompt_id = prompt.get('id')
-            if prompt_id not in seen_ids:
-                seen_ids.add(prompt_id)
-                prompt['keyword_rank'] = i + 1
-                prompt['vector_rank'] = 999
-                merged.append(prompt)
-        
-        for i, prompt in enumerate(vector_results):
-            prompt_id = prompt.get('id')
-            if prompt_id in seen_ids:
-                # Update existing
-                for p in merged:
-                    if p.get('id') == prompt_id:
-                        p['vector_rank'] = i + 1
-                        break
-            else:
-                seen_ids.add(prompt_id)
-                prompt['keyword_rank'] = 999
-                prompt['vector_rank'] = i + 1
-                merged.append(prompt)
-        
-        # Calculate final score
-        for prompt in merged:
-            keyword_score = 1 / prompt.get('keyword_rank', 999)
-            vector_score = 1 / prompt.get('vector_rank', 999)
-            prompt['final_score'] = (0.4 * keyword_score + 0.6 * vector_score)
-        
-        merged.sort(key=lambda x: x['final_score'], reverse=True)
-        return merged[:top_k]
\ No newline at end of file
+        """Hybrid recommendation: weighted reciprocal ranks of keyword and vector search.
+        
+        Both rankings are read only as deep as needed to settle the top_k
+        (see ``services.rank_fusion``); a prompt missing from one ranking
+        gets nothing from it.
+        """
+        if not prompts or not user_input:
+            return []
+        
+        streams = [RankedStream.from_scores(self._keyword_scores(user_input, prompts))]
+        weights = [KEYWORD_WEIGHT]
+        
+        index = self._build_vector_index(prompts)
+        if index is not None:
+            try:
+                model = self._load_model()
+                query_embedding = model.encode([user_input], convert_to_numpy=True)
+                faiss.normalize_L2(query_embedding)
+                query_embedding = query_embedding.astype('float32')
+                
+                def search(depth: int) -> Tuple[np.ndarray, np.ndarray]:
+                    distances, indices = index.search(query_embedding, depth)
+                    found = (indices[0] >= 0) & (indices[0] < len(prompts))
+                    return indices[0][found], distances[0][found]
+                
+                streams.append(RankedStream(search, min(index.ntotal, len(prompts)), top_k * 2, floor=-1.0))
+                weights.append(VECTOR_WEIGHT)
+            except Exception as e:
+                logger.error(f"Vector search failed: {e}")
+        
+        # c=0 keeps the original 1/rank scoring
+        ranked = rrf_top_k(streams, top_k, weights, c=0)
+        
+        results = []
+        for idx, score in ranked:
+            prompt = prompts[idx].copy()
+            prompt['final_score'] = score
+            results.append(prompt)
+        return results
@@ -0,0 +1,155 @@
+"""
+Synthetic Korean prompt corpora for benchmarks
+"""
+
+import json
+import os
+import random
+import sys
+import zlib
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Iterator, Optional
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(BENCH_DIR, "..", "src")
+SEED_FILE = os.path.join(BENCH_DIR, "..", "data", "prompts.json")
+
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+SIZES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+
+ACTIONS = ["만들어줘", "구현해줘", "구축해줘", "작성해줘", "설계해줘", "최적화해줘", "자동화해줘", "분석해줘"]
+OBJECTS = [
+    "로그인 기능", "REST API 서버", "대시보드", "데이터 파이프라인", "챗봇", "배포 스크립트",
+    "CSV 시각화", "회원가입 폼", "검색 기능", "모니터링", "테스트 코드", "캐시 계층", "문서 요약기"
+]
+DETAILS = [
+    "에러 처리를 포함해서", "타입 힌트를 붙여서", "단위 테스트와 함께", "성능을 고려해서",
+    "초보자도 이해할 수 있게", "환경 변수로 설정을 분리해서", "로그를 남기도록", "비동기로"
+]
+# Used only when data/prompts.json is not available
+FALLBACK_VOCAB = {
+    "categories": {"프론트엔드": 3, "백엔드": 3, "AI/LLM": 3, "데이터분석": 2, "DevOps": 2, "기초": 2},
+    "levels": {"입문": 1, "중급": 5, "고급": 4},
+    "tools": {"프론트엔드": ["React"], "백엔드": ["FastAPI"], "AI/LLM": ["LangChain"],
+              "데이터분석": ["Pandas"], "DevOps": ["Docker"], "기초": ["Python"]},
+    "frameworks": {"프론트엔드": ["Next.js"], "백엔드": ["Python"], "AI/LLM": ["LangChain"],
+                   "데이터분석": ["Python"], "DevOps": ["없음"], "기초": ["없음"]},
+    "keywords": {}
+}
+
+
+def load_vocabulary(seed_file: str = SEED_FILE) -> Dict[str, Any]:
+    """Category/level weights and per-category tools, frameworks and keywords from the real data"""
+    from services.recommendation_service import RecommendationService
+
+    try:
+        with open(seed_file, "r", encoding="utf-8") as f:
+            prompts = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        prompts = []
+    if not prompts:
+        vocab = {key: dict(value) for key, value in FALLBACK_VOCAB.items()}
+    else:
+        tools, frameworks, keywords = defaultdict(set), defaultdict(set), defaultdict(set)
+        for prompt in prompts:
+            category = prompt.get("category", "기초")
+            if prompt.get("tool"):
+                tools[category].add(prompt["tool"])
+            if prompt.get("framework"):
+                frameworks[category].add(prompt["framework"])
+            keywords[category].update(prompt.get("keywords", []))
+        vocab = {
+            "categories": dict(Counter(p.get("category", "기초") for p in prompts)),
+            "levels": dict(Counter(p.get("level", "중급") for p in prompts)),
+            "tools": {c: sorted(v) for c, v in tools.items()},
+            "frameworks": {c: sorted(v) for c, v in frameworks.items()},
+            "keywords": {c: sorted(v) for c, v in keywords.items()}
+        }
+    # The recommender's own tag vocabulary, so keyword matching has something to hit
+    for category, words in RecommendationService()._category_keywords.items():
+        vocab["keywords"][category] = sorted(set(vocab["keywords"].get(category, [])) | set(words))
+        vocab["categories"].setdefault(category, 1)
+    return vocab
+
+
+def iter_corpus(size: int, seed: int = 0, vocab: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+    """Yield ``size`` deterministic synthetic prompts shaped like data/prompts.json"""
+    vocab = vocab or load_vocabulary()
+    rng = random.Random(seed)
+    categories = list(vocab["categories"])
+    category_weights = [vocab["categories"][c] for c in categories]
+    levels = list(vocab["levels"])
+    level_weights = [vocab["levels"][lv] for lv in levels]
+    all_keywords = sorted({kw for words in vocab["keywords"].values() for kw in words})
+    start = datetime(2024, 1, 1)
+
+    for i in range(size):
+        category = rng.choices(categories, category_weights)[0]
+        tool = rng.choice(vocab["tools"].get(category) or ["Python"])
+        framework = rng.choice(vocab["frameworks"].get(category) or ["없음"])
+        own_keywords = vocab["keywords"].get(category) or all_keywords
+        keywords = rng.sample(own_keywords, min(len(own_keywords), rng.randint(2, 5)))
+        if rng.random() < 0.2:
+            keywords.append(rng.choice(all_keywords))
+        obj, action = rng.choice(OBJECTS), rng.choice(ACTIONS)
+        yield {
+            "id": f"bench-{seed}-{i:07d}",
+            "title": f"{tool} {obj} {i}",
+            "prompt": f"{tool}와 {framework}로 {obj}을 {rng.choice(DETAILS)} {action}. "
+                      f"{', '.join(keywords)} 관련 요구사항을 반영해줘.",
+            "category": category,
+            "tool": tool,
+            "framework": framework,
+            "level": rng.choices(levels, level_weights)[0],
+            "keywords": list(dict.fromkeys(keywords)),
+            "created_at": (start + timedelta(seconds=i * 37)).isoformat()
+        }
+
+
+def generate_corpus(size: int, seed: int = 0, vocab: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    return list(iter_corpus(size, seed, vocab))
+
+
+def generate_queries(count: int, seed: int = 1, vocab: Optional[Dict[str, Any]] = None) -> List[str]:
+    """Free-text user requests in the style typed into the recommendation tab"""
+    vocab = vocab or load_vocabulary()
+    rng = random.Random(seed)
+    categories = sorted(vocab["keywords"])
+    queries = []
+    for _ in range(count):
+        category = rng.choice(categories)
+        keyword = rng.choice(vocab["keywords"][category])
+        tool = rng.choice(vocab["tools"].get(category) or ["Python"])
+        queries.append(f"{tool}로 {keyword} {rng.choice(OBJECTS)} {rng.choice(ACTIONS)}")
+    return queries
+
+
+class HashingEncoder:
+    """Offline stand-in for the sentence-transformer: hashed bag of words and character bigrams.
+
+    Deterministic across processes and fast enough for million-prompt
+    corpora, so benchmarks measure indexing and search rather than model
+    download or inference.
+    """
+
+    def __init__(self, dim: int = 128):
+        self.dim = dim
+
+    def _features(self, text: str) -> List[int]:
+        text = text.lower()
+        tokens = text.split()
+        grams = [text[i:i + 2] for i in range(0, max(len(text) - 1, 0), 2)]
+        return [zlib.crc32(t.encode("utf-8")) % self.dim for t in tokens + grams]
+
+    def encode(self, texts, batch_size: int = 32, convert_to_numpy: bool = True, **kwargs) -> np.ndarray:
+        if isinstance(texts, str):
+            texts = [texts]
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            vectors[row] = np.bincount(self._features(text), minlength=self.dim)
+        return vectors
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Recall/latency evaluation of FAISS index configurations
+
+Computes exact top-k by brute force, then builds each index type and
+sweeps its search parameter (nprobe for IVF, efSearch for HNSW). For every
+configuration it reports recall@k, single-query latency, build time and
+serialized size, and marks the Pareto-optimal ones (no other config is
+both at least as accurate and at least as fast).
+
+    python benchmarks/index_eval.py --size 100000
+    python benchmarks/index_eval.py --embeddings build/embeddings.npy
+"""
+
+import argparse
+import json
+import math
+import os
+import time
+from typing import List, Dict, Any, Optional, Tuple
+
+import faiss
+import numpy as np
+
+from corpus import BENCH_DIR, HashingEncoder, generate_corpus, generate_queries, load_vocabulary
+
+from services.recommendation_service import RecommendationService
+
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+DEFAULT_K = 10
+DEFAULT_QUERIES = 200
+NPROBE_VALUES = [1, 2, 4, 8, 16, 32, 64]
+EF_SEARCH_VALUES = [16, 32, 64, 128, 256]
+GROUND_TRUTH_BATCH = 1024
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def load_vectors(args: argparse.Namespace) -> Tuple[np.ndarray, np.ndarray]:
+    """Corpus and query vectors, either from a build's embeddings or from the synthetic corpus"""
+    vocab = load_vocabulary()
+    if args.encoder == "model":
+        encoder = RecommendationService()._load_model()
+    else:
+        encoder = HashingEncoder(args.dim)
+    if args.embeddings:
+        corpus = np.load(args.embeddings)
+    else:
+        text_of = RecommendationService(embedding_store_file=None)._get_prompt_text
+        prompts = generate_corpus(args.size, seed=0, vocab=vocab)
+        corpus = encoder.encode([text_of(p) for p in prompts], batch_size=256, convert_to_numpy=True)
+    queries = encoder.encode(generate_queries(args.queries, vocab=vocab), convert_to_numpy=True)
+    return normalize(corpus), normalize(queries)
+
+
+def exact_top_k(corpus: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    """Brute-force inner-product top-k ids, computed in batches of the corpus"""
+    best_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+    best_ids = np.full((len(queries), k), -1, dtype=np.int64)
+    for start in range(0, len(corpus), GROUND_TRUTH_BATCH * 64):
+        block = corpus[start:start + GROUND_TRUTH_BATCH * 64]
+        scores = queries @ block.T
+        ids = np.broadcast_to(np.arange(start, start + len(block)), scores.shape)
+        scores = np.concatenate([best_scores, scores], axis=1)
+        ids = np.concatenate([best_ids, ids], axis=1)
+        top = np.argpartition(-scores, min(k, scores.shape[1] - 1), axis=1)[:, :k]
+        best_scores = np.take_along_axis(scores, top, axis=1)
+        best_ids = np.take_along_axis(ids, top, axis=1)
+    order = np.argsort(-best_scores, axis=1)
+    return np.take_along_axis(best_ids, order, axis=1)
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    hits = sum(len(set(f[f >= 0]) & set(t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+
+def default_configs(n: int, dim: int) -> List[Tuple[str, Optional[str], List[int]]]:
+    """(factory spec, search parameter, values to sweep) for the corpus size"""
+    nlist = max(1, min(int(4 * math.sqrt(n)), n // 39))
+    pq_m = next(m for m in (32, 16, 8, 4, 2, 1) if dim % m == 0 and m <= dim)
+    nprobes = [v for v in NPROBE_VALUES if v <= nlist] or [1]
+    return [
+        ("Flat", None, [0]),
+        ("SQfp16", None, [0]),
+        ("SQ8", None, [0]),
+        ("SQ4", None, [0]),
+        (f"PQ{pq_m}", None, [0]),
+        (f"IVF{nlist},Flat", "nprobe", nprobes),
+        (f"IVF{nlist},SQ8", "nprobe", nprobes),
+        (f"IVF{nlist},PQ{pq_m}", "nprobe", nprobes),
+        ("HNSW32", "efSearch", EF_SEARCH_VALUES),
+        ("HNSW32,SQ8", "efSearch", EF_SEARCH_VALUES),
+    ]
+
+
+def parse_config(text: str) -> Tuple[str, Optional[str], List[int]]:
+    """``SPEC`` or ``SPEC:param=v1/v2/...`` e.g. ``IVF1024,PQ16:nprobe=8/32``"""
+    spec, _, sweep = text.partition(":")
+    if not sweep:
+        return spec, None, [0]
+    param, _, values = sweep.partition("=")
+    return spec, param, [int(v) for v in values.split("/")]
+
+
+def measure_latency(index: faiss.Index, queries: np.ndarray, k: int) -> Tuple[np.ndarray, float, float]:
+    """Search one query at a time, as the app does; returns ids, mean and p95 latency in ms"""
+    ids = np.empty((len(queries), k), dtype=np.int64)
+    timings = []
+    for row in range(len(queries)):
+        started = time.perf_counter()
+        _, found = index.search(queries[row:row + 1], k)
+        timings.append((time.perf_counter() - started) * 1000)
+        ids[row] = found[0]
+    return ids, float(np.mean(timings)), float(np.percentile(timings, 95))
+
+
+def evaluate(
+    corpus: np.ndarray,
+    queries: np.ndarray,
+    configs: List[Tuple[str, Optional[str], List[int]]],
+    k: int = DEFAULT_K,
+    search_threads: int = 1
+) -> List[Dict[str, Any]]:
+    """Builds use every core; searches run with ``search_threads`` for stable per-query numbers"""
+    truth = exact_top_k(corpus, queries, k)
+    parameter_space = faiss.ParameterSpace()
+    build_threads = os.cpu_count() or 1
+    results = []
+    for spec, param, values in configs:
+        faiss.omp_set_num_threads(build_threads)
+        try:
+            index = faiss.index_factory(corpus.shape[1], spec, faiss.METRIC_INNER_PRODUCT)
+            started = time.perf_counter()
+            if not index.is_trained:
+                index.train(corpus)
+            index.add(corpus)
+            build_seconds = time.perf_counter() - started
+        except RuntimeError as e:
+            print(f"  {spec:<22} skipped: {e}")
+            continue
+        memory_bytes = int(faiss.serialize_index(index).nbytes)
+        faiss.omp_set_num_threads(search_threads)
+        for value in values:
+            if param:
+                parameter_space.set_index_parameter(index, param, value)
+            found, mean_ms, p95_ms = measure_latency(index, queries, k)
+            result = {
+                "index": spec,
+                "param": f"{param}={value}" if param else "",
+                f"recall@{k}": round(recall_at_k(found, truth), 4),
+                "mean_ms": round(mean_ms, 4),
+                "p95_ms": round(p95_ms, 4),
+                "build_s": round(build_seconds, 3),
+                "memory_mb": round(memory_bytes / 2 ** 20, 2)
+            }
+            results.append(result)
+            print(f"  {spec:<22} {result['param']:<14} recall {result[f'recall@{k}']:.4f}  {mean_ms:.4f} ms")
+    faiss.omp_set_num_threads(build_threads)
+    mark_pareto(results, f"recall@{k}")
+    return results
+
+
+def mark_pareto(results: List[Dict[str, Any]], recall_key: str) -> None:
+    """Flag configurations no other configuration beats on both recall and mean latency"""
+    for result in results:
+        result["pareto"] = not any(
+            other[recall_key] >= result[recall_key] and other["mean_ms"] <= result["mean_ms"]
+            and (other[recall_key] > result[recall_key] or other["mean_ms"] < result["mean_ms"])
+            for other in results
+        )
+
+
+def print_table(results: List[Dict[str, Any]], k: int) -> None:
+    recall_key = f"recall@{k}"
+    print(f"\n{'':2}{'index':<22}{'param':<14}{recall_key:>10}{'mean ms':>10}{'p95 ms':>10}{'build s':>9}{'MB':>9}")
+    for r in sorted(results, key=lambda r: (-r[recall_key], r["mean_ms"])):
+        mark = "* " if r["pareto"] else "  "
+        print(f"{mark}{r['index']:<22}{r['param']:<14}{r[recall_key]:>10.4f}{r['mean_ms']:>10.4f}"
+              f"{r['p95_ms']:>10.4f}{r['build_s']:>9.2f}{r['memory_mb']:>9.2f}")
+    print("* Pareto-optimal on recall vs mean latency")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Recall/latency sweep over FAISS index configurations")
+    parser.add_argument("--size", type=int, default=100_000, help="Synthetic corpus size")
+    parser.add_argument("--embeddings", help="Use a saved embedding matrix (.npy) instead of the synthetic corpus")
+    parser.add_argument("--queries", type=int, default=DEFAULT_QUERIES, help="Number of queries")
+    parser.add_argument("--k", type=int, default=DEFAULT_K, help="Top-k for recall")
+    parser.add_argument("--encoder", choices=["hash", "model"], default="hash")
+    parser.add_argument("--dim", type=int, default=128, help="HashingEncoder dimension")
+    parser.add_argument("--config", action="append", type=parse_config,
+                        help="Only these configs, e.g. --config HNSW32:efSearch=32/64 (repeatable)")
+    parser.add_argument("--threads", type=int, default=1, help="FAISS OpenMP threads while searching")
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/index-<time>.json)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    corpus, queries = load_vectors(args)
+    print(f"Corpus {corpus.shape}, {len(queries)} queries, k={args.k}")
+    configs = args.config or default_configs(len(corpus), corpus.shape[1])
+    results = evaluate(corpus, queries, configs, args.k, args.threads)
+    print_table(results, args.k)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"index-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({
+            "settings": {k: v for k, v in vars(args).items() if k not in ("output", "config")},
+            "corpus": list(corpus.shape),
+            "results": results
+        }, f, indent=2)
+    print(f"Results saved to: {output}")
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Load test: many Streamlit sessions sharing one RecommendationService
+
+Every simulated session repeats what a rerun of the app does: load the
+prompts from storage, then run one request from the query mix. Sessions
+are threads sharing a single service instance (as ``@st.cache_resource``
+does); with ``--processes`` the same runs in several processes, each
+with its own service, like several app replicas on one host.
+
+Runs fully offline: storage is a local SQLite database seeded with a
+synthetic corpus, and the encoder is the hashing stand-in (micro-batched
+like the app's model; compare with PROMPT_ENCODE_BATCHING=0).
+
+    python benchmarks/load_test.py --levels 1 2 4 8 16 32 --duration 5
+    python benchmarks/load_test.py --processes 4 --levels 1 2 4 8
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import tempfile
+import threading
+import time
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+from corpus import BENCH_DIR, HashingEncoder, generate_corpus, generate_queries, load_vocabulary
+
+from services.batching_encoder import BatchingEncoder
+from services.prompt_service import PromptService
+from services.recommendation_service import RecommendationService
+from services.storage import SQLiteStorage
+from utils.config import ENCODE_BATCHING_ENABLED, ENCODE_BATCH_MAX_SIZE, ENCODE_BATCH_MAX_WAIT_MS
+from utils.helpers import filter_prompts
+
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+DEFAULT_LEVELS = [1, 2, 4, 8, 16, 32]
+DEFAULT_MIX = {"hybrid": 0.4, "vector": 0.2, "keyword": 0.2, "browse": 0.2}
+KNEE_LATENCY_FACTOR = 2.0  # p95 this many times the single-session p95 ...
+KNEE_MIN_GAIN = 0.1  # ... or throughput gaining less than this per step marks the knee
+TOP_K = 3
+
+
+def prepare_database(work_dir: str, size: int, vocab: Dict[str, Any]) -> str:
+    """Seed a SQLite stand-in for Supabase with a synthetic corpus"""
+    db_path = os.path.join(work_dir, "prompts.db")
+    storage = SQLiteStorage(db_path)
+    storage.insert_many(generate_corpus(size, seed=0, vocab=vocab))
+    storage.close()
+    return db_path
+
+
+def make_services(db_path: str, work_dir: str, dim: int) -> Tuple[PromptService, RecommendationService]:
+    prompt_service = PromptService(storage=SQLiteStorage(db_path))
+    recommendation_service = RecommendationService(
+        model_name="bench-HashingEncoder",
+        cache_file=os.path.join(work_dir, "embeddings_cache.pkl"),
+        embedding_store_file=None
+    )
+    encoder = HashingEncoder(dim)
+    if ENCODE_BATCHING_ENABLED:
+        encoder = BatchingEncoder(encoder, ENCODE_BATCH_MAX_SIZE, ENCODE_BATCH_MAX_WAIT_MS)
+    recommendation_service.model = encoder
+    return prompt_service, recommendation_service
+
+
+class RequestFailed(RuntimeError):
+    """A service call swallowed its error and returned nothing"""
+
+
+def run_request(
+    op: str,
+    query: str,
+    prompt_service: PromptService,
+    recommendation_service: RecommendationService
+) -> None:
+    """Run one request; raises if it failed, including failures the services log and turn into []"""
+    prompts = prompt_service.load_prompts()
+    if not prompts:
+        # the benchmark corpus is never empty, so [] means storage failed
+        raise RequestFailed("load_prompts returned no prompts")
+    if op in ("hybrid", "vector"):
+        recommend = (
+            recommendation_service.hybrid_recommend if op == "hybrid" else recommendation_service.vector_recommend
+        )
+        # vector similarity ranks every prompt, so a non-empty corpus always yields results
+        if not recommend(query, prompts, TOP_K):
+            raise RequestFailed(f"{op} recommendation returned no results")
+    elif op == "keyword":
+        # no keyword hit is a valid answer, so only exceptions count here
+        recommendation_service.keyword_recommend(recommendation_service.extract_tags(query), prompts, TOP_K)
+    else:
+        found = prompt_service.search_prompts(search_query=query.split()[0])
+        if found is None:
+            filter_prompts(prompts, search_query=query.split()[0])
+
+
+def run_sessions(
+    sessions: int,
+    duration: float,
+    db_path: str,
+    work_dir: str,
+    dim: int,
+    mix: Dict[str, float],
+    queries: List[str],
+    seed: int = 0
+) -> List[Tuple[str, float, bool]]:
+    """Run ``sessions`` threads against one shared service; returns (op, seconds, ok) samples"""
+    prompt_service, recommendation_service = make_services(db_path, work_dir, dim)
+    ops, weights = list(mix), list(mix.values())
+    samples: List[Tuple[str, float, bool]] = []
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(sessions)
+
+    def session(index: int) -> None:
+        rng = random.Random(seed * 1000 + index)
+        local = []
+        start_barrier.wait()
+        deadline = time.perf_counter() + duration
+        while time.perf_counter() < deadline:
+            op = rng.choices(ops, weights)[0]
+            started = time.perf_counter()
+            try:
+                run_request(op, rng.choice(queries), prompt_service, recommendation_service)
+                ok = True
+            except Exception:
+                ok = False
+            local.append((op, time.perf_counter() - started, ok))
+        with lock:
+            samples.extend(local)
+
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples
+
+
+def _process_worker(args: tuple) -> List[Tuple[str, float, bool]]:
+    return run_sessions(*args)
+
+
+def summarize(samples: List[Tuple[str, float, bool]], elapsed: float) -> Dict[str, Any]:
+    latencies = np.array([s[1] for s in samples if s[2]]) * 1000
+    errors = sum(1 for s in samples if not s[2])
+    summary = {
+        "requests": len(samples),
+        "throughput_rps": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        "error_rate": round(errors / len(samples), 4) if samples else 0.0
+    }
+    for name, q in (("p50_ms", 50), ("p95_ms", 95), ("p99_ms", 99)):
+        summary[name] = round(float(np.percentile(latencies, q)), 3) if len(latencies) else None
+    return summary
+
+
+def find_knee(
+    levels: List[Dict[str, Any]],
+    latency_factor: float = KNEE_LATENCY_FACTOR,
+    min_gain: float = KNEE_MIN_GAIN
+) -> Optional[int]:
+    """First concurrency where p95 has climbed ``latency_factor`` x the lowest level's,
+    or where adding sessions stopped buying throughput; None if neither happened"""
+    if len(levels) < 2 or levels[0]["p95_ms"] is None:
+        return None
+    base_p95 = levels[0]["p95_ms"]
+    for previous, current in zip(levels, levels[1:]):
+        if current["p95_ms"] is None:
+            return current["concurrency"]
+        gain = (current["throughput_rps"] - previous["throughput_rps"]) / max(previous["throughput_rps"], 1e-9)
+        if current["p95_ms"] >= latency_factor * base_p95 or gain < min_gain:
+            return current["concurrency"]
+    return None
+
+
+def run_level(
+    concurrency: int,
+    processes: int,
+    duration: float,
+    db_path: str,
+    work_dir: str,
+    dim: int,
+    mix: Dict[str, float],
+    queries: List[str]
+) -> Dict[str, Any]:
+    """``concurrency`` sessions in total, split evenly over ``processes``"""
+    started = time.perf_counter()
+    if processes <= 1:
+        samples = run_sessions(concurrency, duration, db_path, work_dir, dim, mix, queries)
+    else:
+        per_process = [concurrency // processes + (1 if i < concurrency % processes else 0) for i in range(processes)]
+        jobs = [(n, duration, db_path, work_dir, dim, mix, queries, i) for i, n in enumerate(per_process) if n]
+        with multiprocessing.get_context("spawn").Pool(len(jobs)) as pool:
+            samples = [s for chunk in pool.map(_process_worker, jobs) for s in chunk]
+    # Worker processes start at different times; each measures exactly ``duration`` once running
+    elapsed = duration if processes > 1 else time.perf_counter() - started
+    summary = {"concurrency": concurrency, "processes": processes, **summarize(samples, elapsed)}
+    summary["by_op"] = {
+        op: summarize([s for s in samples if s[0] == op], elapsed) for op in mix
+    }
+    return summary
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        op, _, weight = part.partition("=")
+        if op not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"unknown op {op!r}; choose from {', '.join(DEFAULT_MIX)}")
+        mix[op] = float(weight or 1)
+    return mix
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Concurrent load test against RecommendationService")
+    parser.add_argument("--levels", type=int, nargs="+", default=DEFAULT_LEVELS,
+                        help="Total concurrent sessions to test, in increasing order")
+    parser.add_argument("--processes", type=int, default=1, help="Processes to split each level over")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per level")
+    parser.add_argument("--corpus-size", type=int, default=2000, help="Prompts in the seeded database")
+    parser.add_argument("--dim", type=int, default=128, help="HashingEncoder dimension")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX,
+                        help="Query mix, e.g. hybrid=4,vector=2,keyword=2,browse=2")
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/load-<time>.json)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    vocab = load_vocabulary()
+    queries = generate_queries(50, vocab=vocab)
+
+    with tempfile.TemporaryDirectory(prefix="load_") as work_dir:
+        db_path = prepare_database(work_dir, args.corpus_size, vocab)
+        # Build the shared on-disk index once, as a warmed-up app would have
+        prompt_service, recommendation_service = make_services(db_path, work_dir, args.dim)
+        recommendation_service._build_vector_index(prompt_service.load_prompts())
+
+        levels = []
+        for concurrency in sorted(args.levels):
+            level = run_level(
+                concurrency, min(args.processes, concurrency), args.duration,
+                db_path, work_dir, args.dim, args.mix, queries
+            )
+            levels.append(level)
+            print(
+                f"{concurrency:>4} sessions: {level['throughput_rps']:>8.1f} req/s  "
+                f"p50 {level['p50_ms']}  p95 {level['p95_ms']}  p99 {level['p99_ms']} ms  "
+                f"errors {level['error_rate']:.2%}"
+            )
+
+    knee = find_knee(levels)
+    print(f"\nLatency knee: {knee if knee is not None else 'not reached'}")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"load-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({
+            "settings": {k: v for k, v in vars(args).items() if k != "output"},
+            "knee": knee,
+            "levels": levels
+        }, f, indent=2, ensure_ascii=False)
+    print(f"Results saved to: {output}")
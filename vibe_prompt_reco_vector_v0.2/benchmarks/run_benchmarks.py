@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Time the recommendation and list functions on synthetic corpora
+
+    python benchmarks/run_benchmarks.py --sizes 1k 100k
+    python benchmarks/run_benchmarks.py --sizes 1k --compare benchmarks/results/old.json
+
+Results are written as JSON (one record per size and function) so two runs
+can be compared with ``--compare``.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from typing import List, Dict, Any, Callable
+
+import faiss
+import numpy as np
+
+from corpus import BENCH_DIR, SIZES, HashingEncoder, generate_corpus, generate_queries, load_vocabulary
+
+from services.recommendation_service import RecommendationService
+from utils.helpers import filter_prompts, sort_prompts
+
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+DEFAULT_REPEAT = 5
+DEFAULT_BUDGET_SECONDS = 30.0  # stop repeating a function once it has used this much time
+QUERY_COUNT = 20
+TOP_K = 3
+
+
+def time_call(fn: Callable[[int], Any], repeat: int, budget: float) -> Dict[str, Any]:
+    """Run ``fn(i)`` up to ``repeat`` times (at least once) and summarize wall times in ms"""
+    samples = []
+    spent = 0.0
+    for i in range(repeat):
+        started = time.perf_counter()
+        fn(i)
+        elapsed = time.perf_counter() - started
+        samples.append(elapsed * 1000)
+        spent += elapsed
+        if spent >= budget:
+            break
+    samples.sort()
+    return {
+        "runs": len(samples),
+        "min_ms": round(samples[0], 3),
+        "median_ms": round(statistics.median(samples), 3),
+        "mean_ms": round(statistics.fmean(samples), 3),
+        "max_ms": round(samples[-1], 3)
+    }
+
+
+def make_service(work_dir: str, encoder) -> RecommendationService:
+    service = RecommendationService(
+        model_name=f"bench-{type(encoder).__name__}",
+        cache_file=os.path.join(work_dir, "embeddings_cache.pkl"),
+        embedding_store_file=None
+    )
+    service.model = encoder
+    return service
+
+
+def bench_size(size: int, encoder, repeat: int, budget: float, only: List[str], vocab: Dict[str, Any]) -> List[Dict[str, Any]]:
+    print(f"\n=== {size:,} prompts ===")
+    started = time.perf_counter()
+    prompts = generate_corpus(size, seed=0, vocab=vocab)
+    print(f"generated corpus in {time.perf_counter() - started:.1f}s")
+    queries = generate_queries(QUERY_COUNT, vocab=vocab)
+    categories = sorted(vocab["categories"])[:2]
+
+    with tempfile.TemporaryDirectory(prefix="bench_") as work_dir:
+        service = make_service(work_dir, encoder)
+        tags = [service.extract_tags(q) for q in queries]
+
+        def build_index(_):
+            service.invalidate_cache()
+            service._build_vector_index(prompts)
+
+        def uncached(call):
+            # Queries repeat across samples and cases; cached query vectors and scores would skip the encode
+            def run(i):
+                service._scores.clear()
+                return call(i)
+            return run
+
+        cases = [
+            ("extract_tags", lambda i: service.extract_tags(queries[i % QUERY_COUNT])),
+            ("keyword_recommend", lambda i: service.keyword_recommend(tags[i % QUERY_COUNT], prompts, TOP_K)),
+            ("filter_prompts", lambda i: filter_prompts(
+                prompts, categories=categories, levels=["중급"], search_query=queries[i % QUERY_COUNT].split()[1]
+            )),
+            ("sort_prompts", lambda i: sort_prompts(prompts, ["최신순", "제목순", "분야순", "레벨순"][i % 4])),
+            # Index build first runs cold; the two recommenders then hit the on-disk cache like the app does
+            ("index_build", build_index),
+            ("vector_recommend", uncached(
+                lambda i: service.vector_recommend(queries[i % QUERY_COUNT], prompts, TOP_K)
+            )),
+            ("hybrid_recommend", uncached(
+                lambda i: service.hybrid_recommend(queries[i % QUERY_COUNT], prompts, TOP_K)
+            )),
+        ]
+        results = []
+        for name, fn in cases:
+            if only and name not in only:
+                continue
+            if name in ("vector_recommend", "hybrid_recommend") and not os.path.exists(service.cache_file):
+                service._build_vector_index(prompts)
+            stats = time_call(fn, repeat, budget)
+            print(f"  {name:<18} median {stats['median_ms']:>12.3f} ms  ({stats['runs']} runs)")
+            results.append({"size": size, "name": name, **stats})
+    return results
+
+
+def environment() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=BENCH_DIR
+        ).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "faiss": getattr(faiss, "__version__", "")
+    }
+
+
+def compare(current: List[Dict[str, Any]], baseline_file: str) -> None:
+    with open(baseline_file, "r", encoding="utf-8") as f:
+        baseline = {(r["size"], r["name"]): r for r in json.load(f)["results"]}
+    print(f"\n=== Compared with {baseline_file} (median, new / old) ===")
+    for result in current:
+        old = baseline.get((result["size"], result["name"]))
+        if not old:
+            continue
+        ratio = result["median_ms"] / old["median_ms"] if old["median_ms"] else float("inf")
+        print(f"  {result['size']:>9,} {result['name']:<18} {old['median_ms']:>12.3f} -> {result['median_ms']:>12.3f} ms  x{ratio:.2f}")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark recommendation and list functions")
+    parser.add_argument("--sizes", nargs="+", default=["1k", "100k"], choices=sorted(SIZES),
+                        help="Corpus sizes to run (1m needs several GB of RAM)")
+    parser.add_argument("--only", nargs="*", default=[], help="Run only these functions")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Runs per function")
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET_SECONDS,
+                        help="Seconds after which a function stops being repeated")
+    parser.add_argument("--encoder", choices=["hash", "model"], default="hash",
+                        help="hash: offline HashingEncoder; model: the real sentence-transformer")
+    parser.add_argument("--dim", type=int, default=128, help="HashingEncoder dimension")
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/bench-<time>.json)")
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.encoder == "model":
+        encoder = RecommendationService()._load_model()
+    else:
+        encoder = HashingEncoder(args.dim)
+    vocab = load_vocabulary()
+
+    results = []
+    for label in args.sizes:
+        results.extend(bench_size(SIZES[label], encoder, args.repeat, args.budget, args.only, vocab))
+
+    output = args.output or os.path.join(RESULTS_DIR, f"bench-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({
+            "environment": {**environment(), "encoder": args.encoder, "dim": args.dim if args.encoder == "hash" else None},
+            "results": results
+        }, f, indent=2, ensure_ascii=False)
+    print(f"\nResults saved to: {output}")
+
+    if args.compare:
+        compare(results, args.compare)
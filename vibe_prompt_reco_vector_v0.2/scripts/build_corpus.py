@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Incremental corpus build: normalize -> dedup -> embed -> index -> snapshot
+
+Every stage is fingerprinted by its parameters and the digests of its
+inputs (like make). A stage whose fingerprint and outputs are unchanged is
+skipped; a changed input re-runs only the stages downstream of it, and the
+embed stage only encodes texts the shared embedding store has not seen.
+The last stage writes a versioned bundle that the app loads directly.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from typing import List, Dict, Any, Callable, Iterator, Optional, Union
+
+import numpy as np
+
+from merge_data import (
+    DEFAULT_INPUTS, NEAR_DUP_THRESHOLD, NUM_PERM, SHINGLE_SIZE, SEMANTIC_THRESHOLD,
+    EMBED_BATCH_SIZE, RUN_SIZE, SRC_DIR, expand_inputs, iter_json_prompts,
+    merge_data_files, embed_prompts
+)
+
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+import faiss
+
+from services.corpus_bundle import MANIFEST_FILE, write_bundle, prune_bundles
+from utils.config import BUILD_DIR, ARTIFACT_DIR, EMBEDDING_STORE_FILE
+
+# Bump a stage's version when its code changes in a way that alters its output
+STAGE_VERSIONS = {"normalize": 1, "dedup": 1, "embed": 1, "index": 1, "snapshot": 1}
+STATE_FILE = "state.json"
+INDEX_FACTORY = "Flat"  # faiss.index_factory spec, inner product metric
+KEEP_BUNDLES = 3
+
+
+def file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def stage_fingerprint(name: str, params: Dict[str, Any], input_digests: List[str]) -> str:
+    payload = {"stage": name, "version": STAGE_VERSIONS[name], "params": params, "inputs": input_digests}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class JsonPromptFile:
+    """Re-iterable stream of the prompts in a JSON file"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter_json_prompts(self.path)
+
+
+class BuildState:
+    """Stage fingerprints and output digests from previous runs (``build/state.json``)"""
+
+    def __init__(self, build_dir: str):
+        self.path = os.path.join(build_dir, STATE_FILE)
+        self.data: Dict[str, Any] = {"stages": {}, "digests": {}}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self.data = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"Ignoring unreadable build state {self.path}: {e}")
+
+    def digest(self, path: str) -> str:
+        """Content digest of a file, reused while its size and mtime are unchanged"""
+        stat = os.stat(path)
+        key = os.path.abspath(path)
+        cached = self.data["digests"].get(key)
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            return cached[2]
+        digest = file_digest(path)
+        self.data["digests"][key] = [stat.st_size, stat.st_mtime_ns, digest]
+        return digest
+
+    def is_fresh(self, name: str, fingerprint: str) -> bool:
+        entry = self.data["stages"].get(name)
+        if not entry or entry["fingerprint"] != fingerprint:
+            return False
+        return all(
+            os.path.exists(path) and self.digest(path) == digest
+            for path, digest in entry["outputs"].items()
+        )
+
+    def record(self, name: str, fingerprint: str, outputs: List[str], **extra: Any) -> None:
+        self.data["stages"][name] = {
+            "fingerprint": fingerprint,
+            "outputs": {path: self.digest(path) for path in outputs},
+            **extra
+        }
+        self.save()
+
+    def save(self) -> None:
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+class CorpusBuild:
+    """The five build stages over one set of inputs"""
+
+    def __init__(
+        self,
+        inputs: Optional[List[str]] = None,
+        build_dir: str = BUILD_DIR,
+        artifact_dir: str = ARTIFACT_DIR,
+        near_dup: bool = True,
+        near_dup_threshold: float = NEAR_DUP_THRESHOLD,
+        num_perm: int = NUM_PERM,
+        shingle_size: int = SHINGLE_SIZE,
+        semantic_dedup: bool = False,
+        semantic_threshold: float = SEMANTIC_THRESHOLD,
+        embed_batch_size: int = EMBED_BATCH_SIZE,
+        run_size: int = RUN_SIZE,
+        index_factory: str = INDEX_FACTORY,
+        keep_bundles: int = KEEP_BUNDLES,
+        force: bool = False,
+        service=None
+    ):
+        self.inputs = expand_inputs(inputs or DEFAULT_INPUTS)
+        self.build_dir = build_dir
+        self.artifact_dir = artifact_dir
+        self.near_dup = near_dup
+        self.near_dup_threshold = near_dup_threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.semantic_dedup = semantic_dedup
+        self.semantic_threshold = semantic_threshold
+        self.embed_batch_size = embed_batch_size
+        self.run_size = run_size
+        self.index_factory = index_factory
+        self.keep_bundles = keep_bundles
+        self.force = force
+        self._service = service
+        os.makedirs(build_dir, exist_ok=True)
+        self.state = BuildState(build_dir)
+        self.normalized_file = os.path.join(build_dir, "normalized.json")
+        self.deduped_file = os.path.join(build_dir, "prompts.json")
+        self.embeddings_file = os.path.join(build_dir, "embeddings.npy")
+        self.index_file = os.path.join(build_dir, "index.faiss")
+
+    @property
+    def service(self):
+        if self._service is None:
+            from services.recommendation_service import RecommendationService
+            self._service = RecommendationService(embedding_store_file=EMBEDDING_STORE_FILE)
+        return self._service
+
+    def _stage(
+        self,
+        name: str,
+        params: Dict[str, Any],
+        inputs: List[str],
+        outputs: Union[List[str], Callable[[Dict[str, Any]], List[str]]],
+        action: Callable[[], Optional[Dict[str, Any]]]
+    ) -> bool:
+        """Run ``action`` unless the stage is up to date; returns whether it ran.
+
+        ``outputs`` may be a function of what ``action`` returned, for stages
+        whose output paths are only known once they have run.
+        """
+        fingerprint = stage_fingerprint(name, params, [self.state.digest(p) for p in inputs])
+        if not self.force and self.state.is_fresh(name, fingerprint):
+            print(f"[{name}] up to date")
+            return False
+        started = time.perf_counter()
+        extra = action() or {}
+        if callable(outputs):
+            outputs = outputs(extra)
+        self.state.record(name, fingerprint, outputs, **extra)
+        print(f"[{name}] done in {time.perf_counter() - started:.2f}s")
+        return True
+
+    def normalize(self) -> bool:
+        def action():
+            statistics = merge_data_files(
+                self.inputs, self.normalized_file, near_dup=False,
+                run_size=self.run_size, update_config=False
+            )
+            if statistics is None:
+                raise RuntimeError("normalize stage failed to write its output")
+        existing = [p for p in self.inputs if os.path.exists(p)]
+        return self._stage("normalize", {}, existing, [self.normalized_file], action)
+
+    def dedup(self) -> bool:
+        params = {"near_dup": self.near_dup, "semantic_dedup": self.semantic_dedup}
+        if self.near_dup:
+            params.update(threshold=self.near_dup_threshold, num_perm=self.num_perm, shingle_size=self.shingle_size)
+        if self.semantic_dedup:
+            params.update(semantic_threshold=self.semantic_threshold, model_name=self.service.model_name)
+
+        def action():
+            statistics = merge_data_files(
+                [self.normalized_file], self.deduped_file,
+                near_dup_threshold=self.near_dup_threshold, num_perm=self.num_perm,
+                shingle_size=self.shingle_size, near_dup=self.near_dup,
+                semantic_dedup=self.semantic_dedup, semantic_threshold=self.semantic_threshold,
+                embed_batch_size=self.embed_batch_size, run_size=self.run_size,
+                update_config=False, service=self._service if self.semantic_dedup else None
+            )
+            if statistics is None:
+                raise RuntimeError("dedup stage failed to write its output")
+            return {"count": statistics.total}
+        return self._stage("dedup", params, [self.normalized_file], [self.deduped_file], action)
+
+    def embed(self) -> bool:
+        def action():
+            embeddings = embed_prompts(
+                JsonPromptFile(self.deduped_file), self.embed_batch_size, service=self.service
+            )
+            np.save(self.embeddings_file, embeddings.astype(np.float32))
+        params = {"model_name": self.service.model_name}
+        return self._stage("embed", params, [self.deduped_file], [self.embeddings_file], action)
+
+    def index(self) -> bool:
+        def action():
+            embeddings = np.load(self.embeddings_file)
+            index = faiss.index_factory(embeddings.shape[1], self.index_factory, faiss.METRIC_INNER_PRODUCT)
+            if not index.is_trained:
+                index.train(embeddings)
+            index.add(embeddings)
+            faiss.write_index(index, self.index_file)
+        params = {"index_factory": self.index_factory}
+        return self._stage("index", params, [self.embeddings_file], [self.index_file], action)
+
+    def snapshot(self) -> bool:
+        inputs = [self.deduped_file, self.embeddings_file, self.index_file]
+        params = {"model_name": self.service.model_name, "index_factory": self.index_factory}
+
+        def action():
+            stages = self.state.data["stages"]
+            manifest = {
+                "fingerprint": stage_fingerprint("snapshot", params, [self.state.digest(p) for p in inputs]),
+                "model_name": self.service.model_name,
+                "index_factory": self.index_factory,
+                "count": stages["dedup"].get("count"),
+                "stages": {name: stages[name]["fingerprint"] for name in ("normalize", "dedup", "embed", "index")},
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%S")
+            }
+            version = write_bundle(self.artifact_dir, *inputs, manifest)
+            print(f"Wrote corpus bundle {version}")
+            for removed in prune_bundles(self.artifact_dir, self.keep_bundles):
+                print(f"Removed old bundle {removed}")
+            return {"version": version}
+
+        # The bundle's manifest stands in for the whole bundle directory
+        def outputs(result):
+            return [os.path.join(self.artifact_dir, result["version"], MANIFEST_FILE)]
+        return self._stage("snapshot", params, inputs, outputs, action)
+
+    def run(self) -> Dict[str, bool]:
+        """Run all stages in order; returns which ones actually ran"""
+        return {
+            "normalize": self.normalize(),
+            "dedup": self.dedup(),
+            "embed": self.embed(),
+            "index": self.index(),
+            "snapshot": self.snapshot()
+        }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Incrementally build a versioned corpus bundle")
+    parser.add_argument("inputs", nargs="*", default=DEFAULT_INPUTS,
+                        help="Input JSON / JSON Lines files or glob patterns")
+    parser.add_argument("--build-dir", default=BUILD_DIR, help="Intermediate outputs and stage state")
+    parser.add_argument("--artifact-dir", default=ARTIFACT_DIR, help="Where corpus bundles are written")
+    parser.add_argument("--no-near-dup", action="store_true", help="Only remove exact duplicates")
+    parser.add_argument("--near-dup-threshold", type=float, default=NEAR_DUP_THRESHOLD)
+    parser.add_argument("--semantic-dedup", action="store_true",
+                        help="Also collapse prompts whose embeddings are nearly identical")
+    parser.add_argument("--semantic-threshold", type=float, default=SEMANTIC_THRESHOLD)
+    parser.add_argument("--embed-batch-size", type=int, default=EMBED_BATCH_SIZE)
+    parser.add_argument("--index-factory", default=INDEX_FACTORY,
+                        help="faiss.index_factory spec for the bundle index")
+    parser.add_argument("--keep", type=int, default=KEEP_BUNDLES, help="Bundles to keep after a new snapshot")
+    parser.add_argument("--force", action="store_true", help="Re-run every stage")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    build = CorpusBuild(
+        inputs=args.inputs,
+        build_dir=args.build_dir,
+        artifact_dir=args.artifact_dir,
+        near_dup=not args.no_near_dup,
+        near_dup_threshold=args.near_dup_threshold,
+        semantic_dedup=args.semantic_dedup,
+        semantic_threshold=args.semantic_threshold,
+        embed_batch_size=args.embed_batch_size,
+        index_factory=args.index_factory,
+        keep_bundles=args.keep,
+        force=args.force
+    )
+    ran = build.run()
+    print(f"\nStages run: {', '.join(name for name, did in ran.items() if did) or 'none'}")
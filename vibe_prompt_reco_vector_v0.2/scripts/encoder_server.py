@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Host the embedding model in worker processes shared by every app process
+
+    python scripts/encoder_server.py --workers 2
+    PROMPT_ENCODER_SOCKET=$XDG_RUNTIME_DIR/prompt-encoder/encoder.sock streamlit run src/app.py
+
+The socket directory is created with mode 0700 and both ends authenticate
+with PROMPT_ENCODER_AUTHKEY or, if unset, the 0600 key file <socket>.key.
+
+Workers that die are restarted; app processes retry on another worker and
+fall back to keyword results for a request that cannot be encoded.
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from services.encoder_pool import EncoderPool, default_socket_path
+from utils.config import DEFAULT_EMBEDDING_MODEL, ENCODER_SOCKET, ENCODER_WORKERS, LOG_LEVEL, LOG_FORMAT
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Out-of-process encoder worker pool")
+    parser.add_argument("--socket", default=ENCODER_SOCKET or default_socket_path(),
+                        help="Socket path prefix; worker n listens on <socket>.<n>")
+    parser.add_argument("--workers", type=int, default=ENCODER_WORKERS, help="Worker processes (one model copy each)")
+    parser.add_argument("--model", default=DEFAULT_EMBEDDING_MODEL, help="SentenceTransformer model name")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=LOG_LEVEL, format=LOG_FORMAT)
+    args = parse_args()
+    pool = EncoderPool(args.socket, args.model, args.workers)
+    try:
+        pool.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -3,10 +3,44 @@
 Script to merge and deduplicate prompt data files
 """
 
+import argparse
+import glob
+import hashlib
+import heapq
 import json
 import os
+import re
 import sys
-from typing import List, Dict, Any, Set
+import tempfile
+from collections import defaultdict
+from typing import List, Dict, Any, Set, Tuple, Iterable, Iterator, Optional
+
+import numpy as np
+
+# Near-duplicate (MinHash/LSH) defaults
+NEAR_DUP_THRESHOLD = 0.8
+NUM_PERM = 128
+SHINGLE_SIZE = 5
+NEAR_DUP_REPORT = "near_duplicates_report.json"
+
+# Semantic (embedding) dedup defaults
+SEMANTIC_THRESHOLD = 0.92
+EMBED_BATCH_SIZE = 64
+SEARCH_BATCH_SIZE = 1024
+SEMANTIC_REPORT = "semantic_duplicates_report.json"
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+# Streaming merge defaults
+DEFAULT_INPUTS = [
+    "data/vibe_prompts_structured_upgraded.json",
+    "data/additional_prompts.json",
+    "data/trending_prompts.json"
+]
+DEFAULT_OUTPUT = "data/prompts.json"
+RUN_SIZE = 50000  # prompts held in memory before a sorted run is spilled to disk
+READ_CHUNK_SIZE = 1 << 16
+DIGEST_SIZE = 16
 
 def load_json_file(file_path: str) -> List[Dict[str, Any]]:
     """Load JSON file and return data"""
@@ -18,6 +52,57 @@ def load_json_file(file_path: str) -> List[Dict[str, Any]]:
         print(f"Error loading {file_path}: {e}")
         return []
 
+def iter_json_prompts(file_path: str, chunk_size: int = READ_CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+    """Yield objects from a JSON array (or JSON Lines) file without loading it whole"""
+    decoder = json.JSONDecoder()
+    separators = re.compile(r"[\s,]*")
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            buffer = f.read(chunk_size)
+            eof = not buffer
+            pos = separators.match(buffer).end()
+            in_array = buffer[pos:pos + 1] == "["
+            if in_array:
+                pos += 1
+            while True:
+                pos = separators.match(buffer, pos).end()
+                if pos >= len(buffer):
+                    if eof:
+                        return
+                    buffer, pos = buffer[pos:] + f.read(chunk_size), 0
+                    eof = len(buffer) == 0
+                    continue
+                if in_array and buffer[pos] == "]":
+                    return
+                try:
+                    obj, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                    more = f.read(chunk_size)
+                    eof = not more
+                    buffer, pos = buffer[pos:] + more, 0
+                    continue
+                if isinstance(obj, dict):
+                    yield obj
+                pos = end
+                if pos > chunk_size:
+                    buffer, pos = buffer[pos:], 0
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        print(f"Error loading {file_path}: {e}")
+
+
+def expand_inputs(patterns: List[str]) -> List[str]:
+    """Expand file names and glob patterns, keeping order and dropping repeats"""
+    files = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        if not matches:
+            print(f"No files match: {pattern}")
+        files.extend(matches)
+    return list(dict.fromkeys(files))
+
+
 def normalize_prompt(prompt: Dict[str, Any]) -> Dict[str, Any]:
     """Normalize prompt data structure"""
     normalized = {
@@ -39,87 +124,556 @@ def normalize_prompt(prompt: Dict[str, Any]) -> Dict[str, Any]:
     
     return normalized
 
-def find_duplicates(prompts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """Remove duplicates based on title and content similarity"""
-    seen_titles: Set[str] = set()
-    seen_contents: Set[str] = set()
-    unique_prompts = []
-    
-    for prompt in prompts:
+def text_digest(text: str) -> bytes:
+    """Fixed-size digest standing in for a full string in the seen-sets"""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=DIGEST_SIZE).digest()
+
+
+class ExactDeduplicator:
+    """Streaming exact-match dedup on lowercase title and content.
+
+    Remembers 16-byte digests rather than the strings themselves, so the
+    cost per seen prompt is fixed no matter how long its text is.
+    """
+
+    def __init__(self, verbose: bool = True):
+        self.seen_titles: Set[bytes] = set()
+        self.seen_contents: Set[bytes] = set()
+        self.verbose = verbose
+
+    def is_new(self, prompt: Dict[str, Any]) -> bool:
         title = prompt.get("title", "").strip().lower()
         content = prompt.get("prompt", "").strip().lower()
         
         # Skip if title or content is empty
         if not title or not content:
-            continue
+            return False
+        
+        title_digest = text_digest(title)
+        content_digest = text_digest(content)
         
         # Check for exact title match
-        if title in seen_titles:
-            print(f"Duplicate title found: {prompt.get('title')}")
-            continue
+        if title_digest in self.seen_titles:
+            if self.verbose:
+                print(f"Duplicate title found: {prompt.get('title')}")
+            return False
         
         # Check for exact content match
-        if content in seen_contents:
-            print(f"Duplicate content found for: {prompt.get('title')}")
-            continue
+        if content_digest in self.seen_contents:
+            if self.verbose:
+                print(f"Duplicate content found for: {prompt.get('title')}")
+            return False
         
-        seen_titles.add(title)
-        seen_contents.add(content)
-        unique_prompts.append(prompt)
-    
-    return unique_prompts
+        self.seen_titles.add(title_digest)
+        self.seen_contents.add(content_digest)
+        return True
 
-def merge_data_files() -> None:
-    """Merge all data files and remove duplicates"""
-    data_dir = "data"
-    
-    # Define file paths
-    files_to_merge = [
-        "vibe_prompts_structured_upgraded.json",
-        "additional_prompts.json", 
-        "trending_prompts.json"
+
+def find_duplicates(prompts: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Remove duplicates based on title and content similarity"""
+    deduplicator = ExactDeduplicator()
+    return [prompt for prompt in prompts if deduplicator.is_new(prompt)]
+
+def normalize_text(text: str) -> str:
+    """Lowercase and collapse whitespace so formatting changes don't affect shingles"""
+    return re.sub(r"\s+", " ", text.lower()).strip()
+
+
+def char_shingles(text: str, k: int = SHINGLE_SIZE) -> Set[str]:
+    """Character k-grams of normalized text (works for Korean without a tokenizer)"""
+    text = normalize_text(text)
+    if len(text) <= k:
+        return {text} if text else set()
+    return {text[i:i + k] for i in range(len(text) - k + 1)}
+
+
+def shingle_hashes(shingles: Set[str]) -> np.ndarray:
+    """32-bit hashes of each shingle"""
+    return np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little") for s in shingles),
+        dtype=np.uint64,
+        count=len(shingles)
+    )
+
+
+class MinHasher:
+    """MinHash signatures using universal hashing ``(a * x + b) mod p``.
+
+    ``a`` stays below 2**31 so ``a * x + b`` never overflows uint64 for
+    32-bit shingle hashes.
+    """
+
+    PRIME = (1 << 61) - 1
+    MAX_HASH = (1 << 32) - 1
+
+    def __init__(self, num_perm: int = NUM_PERM, seed: int = 1):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self.a = rng.randint(1, 1 << 31, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, 1 << 31, size=num_perm, dtype=np.uint64)
+
+    def signature(self, hashes: np.ndarray) -> np.ndarray:
+        if hashes.size == 0:
+            return np.full(self.num_perm, self.MAX_HASH, dtype=np.uint64)
+        permuted = (np.outer(self.a, hashes) + self.b[:, None]) % np.uint64(self.PRIME)
+        return (permuted & np.uint64(self.MAX_HASH)).min(axis=1)
+
+
+def lsh_params(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """Pick (bands, rows) with bands * rows <= num_perm whose S-curve knee
+    ``(1 / bands) ** (1 / rows)`` is closest to the Jaccard threshold"""
+    best = None
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        knee = (1.0 / bands) ** (1.0 / rows)
+        error = abs(knee - threshold)
+        if best is None or error < best[0]:
+            best = (error, bands, rows)
+    return best[1], best[2]
+
+
+class UnionFind:
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+
+    def find(self, x: int) -> int:
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, x: int, y: int) -> None:
+        root_x, root_y = self.find(x), self.find(y)
+        if root_x != root_y:
+            # Lower index is the root, so each cluster is rooted at its first-seen prompt
+            self.parent[max(root_x, root_y)] = min(root_x, root_y)
+
+
+def find_near_duplicates(
+    prompts: Iterable[Dict[str, Any]],
+    threshold: float = NEAR_DUP_THRESHOLD,
+    num_perm: int = NUM_PERM,
+    shingle_size: int = SHINGLE_SIZE
+) -> List[List[Tuple[int, float]]]:
+    """Group prompts whose title+body Jaccard similarity is at least ``threshold``.
+
+    MinHash signatures are bucketed band by band (LSH), so only prompts that
+    share a bucket are compared; candidate pairs are confirmed with the
+    signature-estimated Jaccard. Returns clusters of ``(index, similarity to
+    the cluster's first prompt)``, each ordered by index; singletons omitted.
+    Only the fixed-size signatures are kept, so ``prompts`` may be a stream.
+    """
+    hasher = MinHasher(num_perm)
+    rows_list = [
+        hasher.signature(shingle_hashes(char_shingles(
+            f"{prompt.get('title', '')} {prompt.get('prompt', '')}", shingle_size
+        )))
+        for prompt in prompts
     ]
-    
-    all_prompts = []
-    
-    # Load data from all files
-    for filename in files_to_merge:
-        file_path = os.path.join(data_dir, filename)
-        if os.path.exists(file_path):
-            print(f"Loading {filename}...")
-            data = load_json_file(file_path)
-            print(f"  - Loaded {len(data)} prompts")
-            
-            # Normalize and add to all_prompts
-            for prompt in data:
-                normalized = normalize_prompt(prompt)
-                if normalized["id"] and normalized["title"] and normalized["prompt"]:
-                    all_prompts.append(normalized)
-        else:
-            print(f"File not found: {file_path}")
-    
-    print(f"\nTotal prompts before deduplication: {len(all_prompts)}")
-    
-    # Remove duplicates
-    unique_prompts = find_duplicates(all_prompts)
-    print(f"Total prompts after deduplication: {len(unique_prompts)}")
-    print(f"Removed {len(all_prompts) - len(unique_prompts)} duplicates")
-    
-    # Sort by category and title
-    unique_prompts.sort(key=lambda x: (x.get("category", ""), x.get("title", "")))
-    
-    # Save merged data
-    output_file = os.path.join(data_dir, "prompts.json")
+    if len(rows_list) < 2:
+        return []
+    signatures = np.vstack(rows_list)
+    del rows_list
+    count = len(signatures)
+
+    bands, rows = lsh_params(threshold, num_perm)
+    union_find = UnionFind(count)
+    for band in range(bands):
+        buckets: Dict[bytes, List[int]] = defaultdict(list)
+        band_slice = signatures[:, band * rows:(band + 1) * rows]
+        for i in range(count):
+            buckets[band_slice[i].tobytes()].append(i)
+        for members in buckets.values():
+            if len(members) < 2:
+                continue
+            # every pair in the bucket: b and c may match each other but not the first member
+            members = np.asarray(members)
+            member_signatures = signatures[members]
+            for pos in range(len(members) - 1):
+                similar = np.mean(member_signatures[pos + 1:] == member_signatures[pos], axis=1) >= threshold
+                for other in members[pos + 1:][similar]:
+                    union_find.union(int(members[pos]), int(other))
+
+    clusters: Dict[int, List[int]] = defaultdict(list)
+    for i in range(count):
+        clusters[union_find.find(i)].append(i)
+
+    result = []
+    for root, members in sorted(clusters.items()):
+        if len(members) < 2:
+            continue
+        result.append([
+            (i, float(np.mean(signatures[root] == signatures[i]))) for i in members
+        ])
+    return result
+
+
+def collect_by_index(prompts: Iterable[Dict[str, Any]], indices: Set[int]) -> Dict[int, Dict[str, Any]]:
+    """Pick out the prompts at ``indices`` from one pass over a stream"""
+    return {i: prompt for i, prompt in enumerate(prompts) if i in indices}
+
+
+def near_duplicate_removals(
+    prompts: Iterable[Dict[str, Any]],
+    threshold: float = NEAR_DUP_THRESHOLD,
+    num_perm: int = NUM_PERM,
+    shingle_size: int = SHINGLE_SIZE,
+    report_file: str = None
+) -> Set[int]:
+    """Indices to drop so only the first prompt of each near-duplicate cluster remains.
+
+    ``prompts`` must be re-iterable (a list or a ``SortedRuns``); it is read
+    once for signatures and once more for the report.
+    """
+    clusters = find_near_duplicates(prompts, threshold, num_perm, shingle_size)
+    removed = {i for cluster in clusters for i, _ in cluster[1:]}
+
+    if report_file:
+        members = collect_by_index(prompts, {i for cluster in clusters for i, _ in cluster})
+        report = {
+            "threshold": threshold,
+            "num_perm": num_perm,
+            "shingle_size": shingle_size,
+            "clusters": [
+                {
+                    "kept": {"id": members[cluster[0][0]]["id"], "title": members[cluster[0][0]]["title"]},
+                    "removed": [
+                        {"id": members[i]["id"], "title": members[i]["title"], "similarity": round(sim, 3)}
+                        for i, sim in cluster[1:]
+                    ]
+                }
+                for cluster in clusters
+            ]
+        }
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"Near-duplicate report saved to: {report_file}")
+
+    print(f"Found {len(clusters)} near-duplicate clusters, removing {len(removed)} prompts")
+    return removed
+
+
+def remove_near_duplicates(
+    prompts: List[Dict[str, Any]],
+    threshold: float = NEAR_DUP_THRESHOLD,
+    num_perm: int = NUM_PERM,
+    shingle_size: int = SHINGLE_SIZE,
+    report_file: str = None
+) -> List[Dict[str, Any]]:
+    """Keep the first prompt of each near-duplicate cluster and report the rest"""
+    removed = near_duplicate_removals(prompts, threshold, num_perm, shingle_size, report_file)
+    return [p for i, p in enumerate(prompts) if i not in removed]
+
+
+def embed_prompts(
+    prompts: Iterable[Dict[str, Any]],
+    batch_size: int = EMBED_BATCH_SIZE,
+    store_file: str = None,
+    service=None
+) -> np.ndarray:
+    """Embed prompts exactly as RecommendationService indexes them.
+
+    Goes through the shared embedding store, so vectors computed here are
+    reused by the next index build (and vice versa). Texts are handed to
+    the store a few batches at a time, so ``prompts`` may be a stream.
+    An existing ``RecommendationService`` may be passed in to pick the model.
+    """
+    if service is None:
+        if SRC_DIR not in sys.path:
+            sys.path.insert(0, SRC_DIR)
+        from services.recommendation_service import RecommendationService
+        from utils.config import EMBEDDING_STORE_FILE
+
+        service = RecommendationService(embedding_store_file=store_file or EMBEDDING_STORE_FILE)
+    store = service._get_embedding_store()
+    model = service._load_model()
+
+    chunks, texts = [], []
+    for prompt in prompts:
+        texts.append(service._get_prompt_text(prompt))
+        if len(texts) >= batch_size * 16:
+            chunks.append(store.encode(texts, model, batch_size=batch_size))
+            texts = []
+    if texts:
+        chunks.append(store.encode(texts, model, batch_size=batch_size))
+    store.save()
+    return np.vstack(chunks) if chunks else np.empty((0, 0), dtype=np.float32)
+
+
+def find_semantic_pairs(
+    embeddings: np.ndarray,
+    threshold: float = SEMANTIC_THRESHOLD,
+    batch_size: int = SEARCH_BATCH_SIZE
+) -> List[Tuple[int, int, float]]:
+    """Pairs ``(i, j, cosine)`` with ``i < j`` and cosine >= threshold.
+
+    Uses a FAISS inner-product range search, one batch of query vectors at
+    a time, so memory stays bounded by the batch instead of N x N.
+    """
+    import faiss
+
+    index = faiss.IndexFlatIP(embeddings.shape[1])
+    index.add(embeddings)
+    pairs = []
+    for start in range(0, len(embeddings), batch_size):
+        lims, similarities, neighbors = index.range_search(embeddings[start:start + batch_size], threshold)
+        for offset in range(len(lims) - 1):
+            i = start + offset
+            for j, sim in zip(neighbors[lims[offset]:lims[offset + 1]], similarities[lims[offset]:lims[offset + 1]]):
+                if j > i:
+                    pairs.append((i, int(j), float(sim)))
+    return pairs
+
+
+def survivor_rank(prompt: Dict[str, Any]) -> Tuple:
+    """Deterministic survivor policy: most complete metadata, then longest body, then smallest id"""
+    filled = sum(1 for field in ("category", "tool", "framework", "level") if prompt.get(field))
+    return (-filled, -len(prompt.get("keywords", [])), -len(prompt.get("prompt", "")), str(prompt.get("id", "")))
+
+
+def semantic_duplicate_removals(
+    prompts: Iterable[Dict[str, Any]],
+    threshold: float = SEMANTIC_THRESHOLD,
+    batch_size: int = EMBED_BATCH_SIZE,
+    report_file: str = None,
+    embeddings: np.ndarray = None,
+    service=None
+) -> Set[int]:
+    """Indices to drop so one survivor remains per cluster of semantically equivalent prompts.
+
+    ``prompts`` must be re-iterable; only cluster members are held in memory.
+    """
+    if embeddings is None:
+        embeddings = embed_prompts(prompts, batch_size, service=service)
+    if len(embeddings) < 2:
+        return set()
+    pairs = find_semantic_pairs(embeddings, threshold)
+
+    union_find = UnionFind(len(embeddings))
+    for i, j, _ in pairs:
+        union_find.union(i, j)
+    clusters: Dict[int, List[int]] = defaultdict(list)
+    for i in {i for pair in pairs for i in pair[:2]}:
+        clusters[union_find.find(i)].append(i)
+    members = collect_by_index(prompts, {i for group in clusters.values() for i in group})
+
+    removed = set()
+    report_clusters = []
+    for root in sorted(clusters):
+        group = sorted(clusters[root])
+        survivor = min(group, key=lambda i: survivor_rank(members[i]))
+        duplicates = [i for i in group if i != survivor]
+        removed.update(duplicates)
+        report_clusters.append({
+            "kept": {"id": members[survivor]["id"], "title": members[survivor]["title"]},
+            "removed": [
+                {
+                    "id": members[i]["id"],
+                    "title": members[i]["title"],
+                    "similarity": round(float(embeddings[survivor] @ embeddings[i]), 3)
+                }
+                for i in duplicates
+            ]
+        })
+
+    if report_file:
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump({"threshold": threshold, "clusters": report_clusters}, f, indent=2, ensure_ascii=False)
+        print(f"Semantic duplicate report saved to: {report_file}")
+
+    print(f"Found {len(clusters)} semantic duplicate clusters, removing {len(removed)} prompts")
+    return removed
+
+
+def remove_semantic_duplicates(
+    prompts: List[Dict[str, Any]],
+    threshold: float = SEMANTIC_THRESHOLD,
+    batch_size: int = EMBED_BATCH_SIZE,
+    report_file: str = None,
+    embeddings: np.ndarray = None
+) -> List[Dict[str, Any]]:
+    """Collapse clusters of semantically equivalent prompts (translations, rewordings)"""
+    removed = semantic_duplicate_removals(prompts, threshold, batch_size, report_file, embeddings)
+    return [p for i, p in enumerate(prompts) if i not in removed]
+
+
+def sort_key(prompt: Dict[str, Any]) -> Tuple[str, str]:
+    return (prompt.get("category", ""), prompt.get("title", ""))
+
+
+class SortedRuns:
+    """External sort by (category, title) with spill-to-disk runs.
+
+    Prompts are buffered up to ``run_size``, sorted and written to a JSON
+    Lines run file; iterating merges the runs with a heap, so memory holds
+    one buffered run while writing and one line per run while reading.
+    The result can be iterated any number of times. Ties keep input order.
+    """
+
+    def __init__(self, run_size: int = RUN_SIZE, temp_dir: Optional[str] = None):
+        self.run_size = run_size
+        self._temp = tempfile.TemporaryDirectory(prefix="merge_runs_", dir=temp_dir)
+        self._runs: List[str] = []
+        self._buffer: List[Tuple[str, str, int, Dict[str, Any]]] = []
+        self._seq = 0
+
+    def add(self, prompt: Dict[str, Any]) -> None:
+        category, title = sort_key(prompt)
+        self._buffer.append((category, title, self._seq, prompt))
+        self._seq += 1
+        if len(self._buffer) >= self.run_size:
+            self._spill()
+
+    def _spill(self) -> None:
+        if not self._buffer:
+            return
+        self._buffer.sort(key=lambda item: item[:3])
+        path = os.path.join(self._temp.name, f"run_{len(self._runs):05d}.jsonl")
+        with open(path, 'w', encoding='utf-8') as f:
+            for item in self._buffer:
+                f.write(json.dumps(item, ensure_ascii=False) + "\n")
+        self._runs.append(path)
+        self._buffer = []
+
+    def __len__(self) -> int:
+        return self._seq
+
+    @staticmethod
+    def _read_run(path: str) -> Iterator[Tuple]:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                yield tuple(json.loads(line))
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        self._spill()
+        merged = heapq.merge(*(self._read_run(path) for path in self._runs), key=lambda item: item[:3])
+        for item in merged:
+            yield item[3]
+
+    def cleanup(self) -> None:
+        self._temp.cleanup()
+
+
+def write_json_array(prompts: Iterable[Dict[str, Any]], output_file: str) -> int:
+    """Stream prompts into a JSON array file (atomically replaced); returns the count"""
+    tmp_file = output_file + ".tmp"
+    count = 0
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        f.write("[")
+        for prompt in prompts:
+            f.write(",\n" if count else "\n")
+            f.write("  " + json.dumps(prompt, indent=2, ensure_ascii=False).replace("\n", "\n  "))
+            count += 1
+        f.write("\n]\n" if count else "]\n")
+    os.replace(tmp_file, output_file)
+    return count
+
+
+class PromptStatistics:
+    """Category / level / tool counts accumulated while streaming"""
+
+    def __init__(self):
+        self.total = 0
+        self.categories: Dict[str, int] = {}
+        self.levels: Dict[str, int] = {}
+        self.tools: Dict[str, int] = {}
+
+    def add(self, prompt: Dict[str, Any]) -> Dict[str, Any]:
+        self.total += 1
+        for counts, field in ((self.categories, "category"), (self.levels, "level"), (self.tools, "tool")):
+            value = prompt.get(field, "Unknown")
+            counts[value] = counts.get(value, 0) + 1
+        return prompt
+
+
+def merge_data_files(
+    inputs: Optional[List[str]] = None,
+    output_file: str = DEFAULT_OUTPUT,
+    near_dup_threshold: float = NEAR_DUP_THRESHOLD,
+    num_perm: int = NUM_PERM,
+    shingle_size: int = SHINGLE_SIZE,
+    near_dup: bool = True,
+    semantic_dedup: bool = False,
+    semantic_threshold: float = SEMANTIC_THRESHOLD,
+    embed_batch_size: int = EMBED_BATCH_SIZE,
+    run_size: int = RUN_SIZE,
+    update_config: bool = True,
+    service=None
+) -> Optional[PromptStatistics]:
+    """Merge data files and remove duplicates in bounded memory.
+
+    Inputs are streamed, exact duplicates are dropped by digest, survivors
+    are spilled into sorted runs, and the optional near-duplicate and
+    semantic stages work off the merged run stream. The output is written
+    incrementally. Returns statistics of the written data.
+    """
+    report_dir = os.path.dirname(output_file) or "."
+    files = expand_inputs(inputs or DEFAULT_INPUTS)
+    deduplicator = ExactDeduplicator()
+    runs = SortedRuns(run_size, temp_dir=report_dir)
+    loaded = 0
+
     try:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(unique_prompts, f, indent=2, ensure_ascii=False)
+        # Load data from all files
+        for file_path in files:
+            if not os.path.exists(file_path):
+                print(f"File not found: {file_path}")
+                continue
+            print(f"Loading {file_path}...")
+            file_count = 0
+            for prompt in iter_json_prompts(file_path):
+                file_count += 1
+                normalized = normalize_prompt(prompt)
+                if not (normalized["id"] and normalized["title"] and normalized["prompt"]):
+                    continue
+                loaded += 1
+                if deduplicator.is_new(normalized):
+                    runs.add(normalized)
+            print(f"  - Loaded {file_count} prompts")
+        
+        print(f"\nTotal prompts before deduplication: {loaded}")
+        
+        removed: Set[int] = set()
+        if near_dup:
+            removed |= near_duplicate_removals(
+                runs, near_dup_threshold, num_perm, shingle_size,
+                report_file=os.path.join(report_dir, NEAR_DUP_REPORT)
+            )
+        if semantic_dedup:
+            survivors = SortedRuns(run_size, temp_dir=report_dir)
+            try:
+                for i, prompt in enumerate(runs):
+                    if i not in removed:
+                        survivors.add(prompt)
+                runs.cleanup()
+                runs, removed = survivors, set()
+            except Exception:
+                survivors.cleanup()
+                raise
+            removed = semantic_duplicate_removals(
+                runs, semantic_threshold, embed_batch_size,
+                report_file=os.path.join(report_dir, SEMANTIC_REPORT),
+                service=service
+            )
+        
+        # Save merged data (runs are already ordered by category and title)
+        statistics = PromptStatistics()
+        kept = (statistics.add(p) for i, p in enumerate(runs) if i not in removed)
+        try:
+            written = write_json_array(kept, output_file)
+        except Exception as e:
+            print(f"Error saving merged data: {e}")
+            return None
+        print(f"Total prompts after deduplication: {written}")
+        print(f"Removed {loaded - written} duplicates")
         print(f"\nMerged data saved to: {output_file}")
         
         # Update config to use new file
-        update_config_file()
-        
-    except Exception as e:
-        print(f"Error saving merged data: {e}")
+        if update_config:
+            update_config_file()
+        return statistics
+    finally:
+        runs.cleanup()
 
 def update_config_file() -> None:
     """Update config file to use the new merged data file"""
@@ -143,24 +697,18 @@ def update_config_file() -> None:
     except Exception as e:
         print(f"Error updating config file: {e}")
 
-def print_statistics(prompts: List[Dict[str, Any]]) -> None:
+def print_statistics(prompts: Iterable[Dict[str, Any]]) -> None:
     """Print statistics about the merged data"""
+    if isinstance(prompts, PromptStatistics):
+        statistics = prompts
+    else:
+        statistics = PromptStatistics()
+        for prompt in prompts:
+            statistics.add(prompt)
+    categories, levels, tools = statistics.categories, statistics.levels, statistics.tools
+
     print("\n=== Data Statistics ===")
-    print(f"Total prompts: {len(prompts)}")
-    
-    # Category distribution
-    categories = {}
-    levels = {}
-    tools = {}
-    
-    for prompt in prompts:
-        cat = prompt.get("category", "Unknown")
-        level = prompt.get("level", "Unknown")
-        tool = prompt.get("tool", "Unknown")
-        
-        categories[cat] = categories.get(cat, 0) + 1
-        levels[level] = levels.get(level, 0) + 1
-        tools[tool] = tools.get(tool, 0) + 1
+    print(f"Total prompts: {statistics.total}")
     
     print("\nCategories:")
     for cat, count in sorted(categories.items()):
@@ -176,13 +724,48 @@ def print_statistics(prompts: List[Dict[str, Any]]) -> None:
         if tool and tool != "Unknown":
             print(f"  {tool}: {count}")
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Merge and deduplicate prompt data files")
+    parser.add_argument("inputs", nargs="*", default=DEFAULT_INPUTS,
+                        help="Input JSON / JSON Lines files or glob patterns (default: the three bundled files)")
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT,
+                        help="Merged output file")
+    parser.add_argument("--run-size", type=int, default=RUN_SIZE,
+                        help="Prompts per in-memory sorted run before spilling to disk")
+    parser.add_argument("--near-dup-threshold", type=float, default=NEAR_DUP_THRESHOLD,
+                        help="Jaccard similarity above which prompts count as near-duplicates")
+    parser.add_argument("--num-perm", type=int, default=NUM_PERM,
+                        help="Number of MinHash permutations")
+    parser.add_argument("--shingle-size", type=int, default=SHINGLE_SIZE,
+                        help="Character shingle length")
+    parser.add_argument("--no-near-dup", action="store_true",
+                        help="Only remove exact duplicates")
+    parser.add_argument("--semantic-dedup", action="store_true",
+                        help="Also collapse prompts whose embeddings are nearly identical")
+    parser.add_argument("--semantic-threshold", type=float, default=SEMANTIC_THRESHOLD,
+                        help="Cosine similarity above which prompts count as semantic duplicates")
+    parser.add_argument("--embed-batch-size", type=int, default=EMBED_BATCH_SIZE,
+                        help="Prompts per encoder batch")
+    return parser.parse_args()
+
 if __name__ == "__main__":
+    args = parse_args()
     print("Starting data merge process...")
-    merge_data_files()
+    statistics = merge_data_files(
+        inputs=args.inputs,
+        output_file=args.output,
+        run_size=args.run_size,
+        near_dup_threshold=args.near_dup_threshold,
+        num_perm=args.num_perm,
+        shingle_size=args.shingle_size,
+        near_dup=not args.no_near_dup,
+        semantic_dedup=args.semantic_dedup,
+        semantic_threshold=args.semantic_threshold,
+        embed_batch_size=args.embed_batch_size
+    )
     
-    # Load and print statistics
-    merged_data = load_json_file("data/prompts.json")
-    if merged_data:
-        print_statistics(merged_data)
+    # Print statistics gathered while writing
+    if statistics and statistics.total:
+        print_statistics(statistics)
     
     print("\nData merge completed!")
\ No newline at end of file
@@ -12,24 +12,60 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from services.prompt_service import PromptService
 from services.recommendation_service import RecommendationService
+from services.model_registry import ModelRegistry
+from services.corpus_bundle import load_bundle
 from utils.config import (
     CATEGORIES, LEVELS, TOOLS, ITEMS_PER_PAGE,
-    DB_FILE, EMBEDDING_CACHE_FILE, LOG_LEVEL, LOG_FORMAT
+    DB_FILE, EMBEDDING_CACHE_FILE, ARTIFACT_DIR, LOG_LEVEL, LOG_FORMAT, PROFILE_ENABLED,
+    METRICS_FILE, METRICS_PORT, METRICS_EXPORT_INTERVAL, ADMIN_ENABLED, EMBEDDING_MODELS
 )
 from utils.helpers import display_prompt_card, display_prompt_detail, validate_prompt_input
+from utils.metrics import REGISTRY, MetricsExporter, render_openmetrics
+from utils.cache_policy import CACHES
+from utils.tracing import request_scope
+from utils.profiling import profile_request
 
 # Configure logging``
 logging.basicConfig(level=LOG_LEVEL, format=LOG_FORMAT)
 logger = logging.getLogger(__name__)
 
+# 추천 방식 라디오 라벨 -> RecommendationService.recommend 모드
+RECOMMEND_MODES = {'키워드 기반': 'keyword', '벡터 기반': 'vector', '하이브리드': 'hybrid'}
+
 # Initialize services
 @st.cache_resource
 def get_services():
     """Initialize and cache services"""
     cache_path = EMBEDDING_CACHE_FILE
     prompt_service = PromptService()
-    recommendation_service = RecommendationService(cache_file=cache_path)
-    return prompt_service, recommendation_service
+    models = ModelRegistry(cache_file=cache_path)
+    bundle = load_bundle(ARTIFACT_DIR)
+    if bundle is not None:
+        models.use_bundle(bundle)
+    return prompt_service, models
+
+@st.cache_resource
+def get_metrics_exporter():
+    """Start the metrics file writer / HTTP endpoint once per process"""
+    if not METRICS_FILE and not METRICS_PORT:
+        return None
+    try:
+        return MetricsExporter(METRICS_FILE or None, METRICS_PORT, METRICS_EXPORT_INTERVAL)
+    except OSError as e:
+        logger.error(f"메트릭 내보내기 시작 실패: {e}")
+        return None
+
+def profiling_on() -> bool:
+    """Profile this session's requests: env var, ?profile=1, or the sidebar toggle"""
+    return (
+        PROFILE_ENABLED
+        or st.query_params.get("profile") == "1"
+        or st.session_state.get("profile_requests", False)
+    )
+
+def admin_on() -> bool:
+    """The metrics tab is hidden unless PROMPT_ADMIN=1 or ?admin=1"""
+    return ADMIN_ENABLED or st.query_params.get("admin") == "1"
 
 def main():
     """Main application function"""
@@ -43,10 +79,20 @@ def main():
     st.title("🧠 바이브 코딩 프롬프트 추천 시스템")
     
     # Initialize services
-    prompt_service, recommendation_service = get_services()
+    prompt_service, models = get_services()
+    get_metrics_exporter()
+    
+    with st.sidebar.expander("🛠 개발자 도구"):
+        st.checkbox("요청 프로파일링 (cProfile)", key="profile_requests")
+        if admin_on() and len(EMBEDDING_MODELS) > 1:
+            show_model_selector(models, prompt_service)
+    recommendation_service = models.active
     
     # Create tabs
-    tab1, tab2, tab3 = st.tabs(["✨ 추천 받기", "📄 프롬프트 목록", "➕ 프롬프트 추가"])
+    tab_names = ["✨ 추천 받기", "📄 프롬프트 목록", "➕ 프롬프트 추가"]
+    if admin_on():
+        tab_names.append("📊 메트릭")
+    tab1, tab2, tab3, *admin_tab = st.tabs(tab_names)
     
     # Tab 1: 추천 받기
     with tab1:
@@ -58,7 +104,22 @@ def main():
     
     # Tab 3: 프롬프트 추가
     with tab3:
-        show_add_prompt_tab(prompt_service, recommendation_service)
+        show_add_prompt_tab(prompt_service, models)
+    
+    # Tab 4: 메트릭 (관리자 전용)
+    if admin_tab:
+        with admin_tab[0]:
+            show_metrics_tab()
+
+def show_model_selector(models: ModelRegistry, prompt_service: PromptService):
+    """Switch the embedding model; the new index is built in the background while the current model serves"""
+    target = models.target_model
+    options = EMBEDDING_MODELS if target in EMBEDDING_MODELS else [target] + EMBEDDING_MODELS
+    chosen = st.selectbox("임베딩 모델", options, index=options.index(target))
+    if chosen != target:
+        models.switch(chosen, prompt_service.load_prompts())
+    if models.target_model != models.active_model:
+        st.caption(f"`{models.target_model}` 인덱스 준비 중 — 완료될 때까지 `{models.active_model}`로 추천합니다.")
 
 def show_recommendation_tab(recommendation_service: RecommendationService, prompt_service: PromptService):
     """Show recommendation tab"""
@@ -76,20 +137,19 @@ def show_recommendation_tab(recommendation_service: RecommendationService, promp
         """
         )
     
-    recommend_mode = st.radio('추천 방식 선택', ['키워드 기반', '벡터 기반', '하이브리드'])
+    recommend_mode = st.radio('추천 방식 선택', list(RECOMMEND_MODES))
     user_input = st.text_input("원하는 작업을 설명해주세요", placeholder="예: fastapi로 로그인 api 만들고 싶어")
     
     if user_input:
-        prompts = prompt_service.load_prompts()
-        
         try:
-            if recommend_mode == '키워드 기반':
-                tags = recommendation_service.extract_tags(user_input)
-                results = recommendation_service.keyword_recommend(tags, prompts)
-            elif recommend_mode == '벡터 기반':
-                results = recommendation_service.vector_recommend(user_input, prompts)
-            else:  # 하이브리드
-                results = recommendation_service.hybrid_recommend(user_input, prompts)
+            with request_scope("request.recommend", mode=recommend_mode, query=user_input), \
+                    profile_request("recommend", profiling_on(), query=user_input, mode=recommend_mode) as profile:
+                prompts = prompt_service.load_prompts()
+                profile.tag(corpus=len(prompts))
+                # 같은 입력이면 방식을 바꿔도 캐시된 점수만 다시 조합 (재인코딩 없음)
+                results = recommendation_service.recommend(user_input, prompts, RECOMMEND_MODES[recommend_mode])
+            if profile.path:
+                st.caption(f"프로파일 저장됨: `{profile.path}`")
             
             if results:
                 st.subheader("🔍 추천 프롬프트")
@@ -141,15 +201,27 @@ def show_browse_tab(prompt_service: PromptService):
         # 필터링 및 정렬 적용
         from utils.helpers import filter_prompts, sort_prompts
         
-        filtered_prompts = filter_prompts(
-            prompts,
-            categories=selected_category,
-            levels=selected_level,
-            tools=selected_tool,
-            search_query=search_query
-        )
-        
-        filtered_prompts = sort_prompts(filtered_prompts, sort_by)
+        with request_scope("request.browse", query=search_query, sort_by=sort_by), \
+                profile_request("browse", profiling_on(), query=search_query, sort_by=sort_by, corpus=len(prompts)) as profile:
+            # 저장소가 지원하면(SQLite FTS5) DB 안에서 검색, 아니면 메모리에서 필터링
+            filtered_prompts = prompt_service.search_prompts(
+                search_query=search_query,
+                categories=selected_category,
+                levels=selected_level,
+                tools=selected_tool
+            )
+            if filtered_prompts is None:
+                filtered_prompts = filter_prompts(
+                    prompts,
+                    categories=selected_category,
+                    levels=selected_level,
+                    tools=selected_tool,
+                    search_query=search_query
+                )
+            
+            filtered_prompts = sort_prompts(filtered_prompts, sort_by)
+        if profile.path:
+            st.caption(f"프로파일 저장됨: `{profile.path}`")
         
         # 필터링 후 결과 확인
         if not filtered_prompts and prompts:
@@ -179,7 +251,7 @@ def show_browse_tab(prompt_service: PromptService):
     else:
         st.info("저장된 프롬프트가 없습니다. ➕ '프롬프트 추가' 탭에서 새 프롬프트를 만들어보세요.")
 
-def show_add_prompt_tab(prompt_service: PromptService, recommendation_service: RecommendationService):
+def show_add_prompt_tab(prompt_service: PromptService, models: ModelRegistry):
     """Show add prompt tab"""
     st.subheader("➕ 새 프롬프트 추가")
     
@@ -214,11 +286,48 @@ def show_add_prompt_tab(prompt_service: PromptService, recommendation_service: R
                 
                 if new_prompt:
                     # 캐시 무효화
-                    recommendation_service.invalidate_cache()
+                    models.invalidate_cache()
                     st.success("프롬프트가 저장되었습니다.")
                     st.cache_data.clear()
                 else:
                     st.error("프롬프트 저장 중 오류가 발생했습니다.")
 
+def show_metrics_tab():
+    """Display the process-wide metrics registry"""
+    st.subheader("📊 운영 메트릭")
+    if st.button("🔄 새로고침"):
+        st.rerun()
+    
+    snapshot = REGISTRY.snapshot()
+    if not any(snapshot.values()):
+        st.info("아직 수집된 메트릭이 없습니다.")
+        return
+    
+    cache_stats = CACHES.stats()
+    if cache_stats:
+        st.markdown("**캐시 사용량**")
+        st.dataframe(
+            [
+                {"cache": name, **{k: v for k, v in stats.items() if k != "evictions"},
+                 "evictions": sum(stats.get("evictions", {}).values())}
+                for name, stats in sorted(cache_stats.items())
+            ],
+            use_container_width=True,
+            hide_index=True
+        )
+    
+    for name, rows in snapshot.items():
+        if not rows:
+            continue
+        st.markdown(f"**{name}**")
+        st.dataframe(
+            [{**row.pop("labels"), **row} for row in rows],
+            use_container_width=True,
+            hide_index=True
+        )
+    
+    with st.expander("OpenMetrics 텍스트"):
+        st.code(render_openmetrics(), language="text")
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,215 @@
+"""
+Asynchronous prompt service with batch operations
+"""
+
+import asyncio
+import logging
+import os
+import threading
+from typing import List, Dict, Any, Optional, Iterable
+from uuid import uuid4
+
+import httpx
+
+from services.storage import StorageError
+from utils.config import PROMPTS_TABLE, BATCH_SIZE, ASYNC_MAX_CONCURRENCY, HTTP_TIMEOUT_SECONDS
+from utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+HTTP_ERRORS = REGISTRY.counter("supabase_http_errors", "Failed Supabase REST requests", labels=("method",))
+
+
+def _chunks(items: List[Any], size: int) -> Iterable[List[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _in_filter(ids: List[str]) -> str:
+    """PostgREST ``in`` filter with quoted values (ids may contain commas or dots)"""
+    quoted = ",".join('"{}"'.format(str(i).replace('"', '\\"')) for i in ids)
+    return f"in.({quoted})"
+
+
+class AsyncPromptService:
+    """Batched CRUD against the Supabase REST (PostgREST) endpoint.
+
+    Every batch call splits its input into ``batch_size`` chunks and runs
+    them concurrently, bounded by ``max_concurrency``, over one pooled
+    ``httpx.AsyncClient``. Errors are logged and the call returns whatever
+    succeeded, matching ``PromptService``.
+    """
+
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        key: Optional[str] = None,
+        table: str = PROMPTS_TABLE,
+        batch_size: int = BATCH_SIZE,
+        max_concurrency: int = ASYNC_MAX_CONCURRENCY,
+        timeout: float = HTTP_TIMEOUT_SECONDS,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        url = url or os.getenv("SUPABASE_URL")
+        key = key or os.getenv("SUPABASE_KEY")
+        self.enabled = bool(url and key)
+        if not self.enabled:
+            logger.error("SUPABASE_URL and SUPABASE_KEY 환경변수가 필요합니다.")
+        self.base_url = f"{url.rstrip('/')}/rest/v1" if url else ""
+        self.key = key
+        self.table = table
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Create the pooled client lazily, inside the running event loop"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={
+                    "apikey": self.key or "",
+                    "Authorization": f"Bearer {self.key or ''}",
+                    "Content-Type": "application/json",
+                },
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency
+                ),
+                transport=self._transport
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    async def _request(
+        self, method: str, params: Dict[str, str], strict: bool = False, **kwargs
+    ) -> Optional[List[Dict[str, Any]]]:
+        client = self._get_client()
+        async with self._semaphore:
+            try:
+                response = await client.request(method, f"/{self.table}", params=params, **kwargs)
+                response.raise_for_status()
+            except httpx.HTTPError as e:
+                logger.error(f"Supabase {method} 요청 오류: {e}")
+                HTTP_ERRORS.labels(method=method).inc()
+                if strict:
+                    raise StorageError(str(e)) from e
+                return None
+        return response.json() if response.content else []
+
+    async def _gather(self, coroutines) -> List[Optional[List[Dict[str, Any]]]]:
+        return await asyncio.gather(*coroutines)
+
+    async def get_prompts_by_ids(self, prompt_ids: List[str], strict: bool = False) -> List[Dict[str, Any]]:
+        """Fetch prompts by id; results follow the input order, missing ids are skipped.
+
+        With ``strict`` a failed request raises ``StorageError`` instead of
+        leaving its ids out.
+        """
+        if strict and not self.enabled:
+            raise StorageError("SUPABASE_URL and SUPABASE_KEY are not set")
+        if not self.enabled or not prompt_ids:
+            return []
+        unique_ids = list(dict.fromkeys(prompt_ids))
+        pages = await self._gather(
+            self._request("GET", {"select": "*", "id": _in_filter(chunk)}, strict=strict)
+            for chunk in _chunks(unique_ids, self.batch_size)
+        )
+        by_id = {row["id"]: row for page in pages if page for row in page}
+        return [by_id[i] for i in prompt_ids if i in by_id]
+
+    async def add_prompts(self, prompts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Insert prompts in batches and return the rows that were stored"""
+        if not self.enabled or not prompts:
+            return []
+        rows = [dict(p, id=p.get("id") or str(uuid4())) for p in prompts]
+        pages = await self._gather(
+            self._request("POST", {}, json=chunk, headers={"Prefer": "return=representation"})
+            for chunk in _chunks(rows, self.batch_size)
+        )
+        return [row for page in pages if page for row in page]
+
+    async def update_prompts(self, updates: Dict[str, Dict[str, Any]]) -> Dict[str, bool]:
+        """Apply per-id updates concurrently; returns ``{id: succeeded}``"""
+        if not self.enabled or not updates:
+            return {}
+        prompt_ids = list(updates)
+        pages = await self._gather(
+            self._request(
+                "PATCH", {"id": f"eq.{prompt_id}"},
+                json=updates[prompt_id], headers={"Prefer": "return=representation"}
+            )
+            for prompt_id in prompt_ids
+        )
+        return {prompt_id: bool(page) for prompt_id, page in zip(prompt_ids, pages)}
+
+    async def delete_prompts(self, prompt_ids: List[str]) -> List[str]:
+        """Delete prompts in batches and return the ids that were removed"""
+        if not self.enabled or not prompt_ids:
+            return []
+        pages = await self._gather(
+            self._request(
+                "DELETE", {"id": _in_filter(chunk)},
+                headers={"Prefer": "return=representation"}
+            )
+            for chunk in _chunks(list(dict.fromkeys(prompt_ids)), self.batch_size)
+        )
+        return [row["id"] for page in pages if page for row in page]
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class PromptBatchClient:
+    """Blocking facade over ``AsyncPromptService`` for Streamlit code.
+
+    All calls run on one background event loop, so the pooled HTTP client
+    and its connections are shared by every session in the process.
+    """
+
+    def __init__(self, service: Optional[AsyncPromptService] = None):
+        self.service = service or AsyncPromptService()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="prompt-batch-loop", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    def get_prompts_by_ids(self, prompt_ids: List[str], strict: bool = False) -> List[Dict[str, Any]]:
+        return self._run(self.service.get_prompts_by_ids(prompt_ids, strict=strict))
+
+    def add_prompts(self, prompts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return self._run(self.service.add_prompts(prompts))
+
+    def update_prompts(self, updates: Dict[str, Dict[str, Any]]) -> Dict[str, bool]:
+        return self._run(self.service.update_prompts(updates))
+
+    def delete_prompts(self, prompt_ids: List[str]) -> List[str]:
+        return self._run(self.service.delete_prompts(prompt_ids))
+
+    def close(self) -> None:
+        self._run(self.service.aclose())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+
+_batch_client: Optional[PromptBatchClient] = None
+_batch_client_lock = threading.Lock()
+
+
+def get_batch_client() -> PromptBatchClient:
+    """Process-wide ``PromptBatchClient`` (one loop, one connection pool)"""
+    global _batch_client
+    with _batch_client_lock:
+        if _batch_client is None:
+            _batch_client = PromptBatchClient()
+        return _batch_client
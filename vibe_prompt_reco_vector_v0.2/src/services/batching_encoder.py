@@ -0,0 +1,142 @@
+"""
+Micro-batching front-end for query encodes from concurrent sessions
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Any, Optional
+
+import numpy as np
+
+from utils.metrics import REGISTRY
+from utils.tracing import span
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZES = REGISTRY.histogram(
+    "encode_batch_size", "Texts per micro-batched encode call", bounds=[1, 2, 4, 8, 16, 32, 64, 128]
+)
+
+
+class _Pending:
+    __slots__ = ("texts", "future")
+
+    def __init__(self, texts: List[str]):
+        self.texts = texts
+        self.future: Future = Future()
+
+
+class BatchingEncoder:
+    """Drop-in wrapper around a model's ``encode`` that batches small concurrent calls.
+
+    Calls with up to ``max_batch_size`` texts are queued; a worker thread
+    encodes everything queued as one batch and hands each caller its own
+    rows. The worker waits up to ``max_wait_ms`` for more requests only while
+    other callers are known to be on their way, so a lone user is encoded
+    immediately. Larger calls (corpus encodes) go straight to the model.
+    Other attributes are forwarded to the wrapped model. ``close`` stops the
+    worker thread, which otherwise keeps the model alive for the process.
+    """
+
+    def __init__(self, model: Any, max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue: "queue.Queue[Optional[_Pending]]" = queue.Queue()  # None stops the worker
+        self._waiting = 0
+        self._closed = False
+        self._lock = threading.Lock()
+        self._worker = threading.Thread(target=self._run, name="encode-batcher", daemon=True)
+        self._worker.start()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.model, name)
+
+    def encode(self, texts, batch_size: int = 32, convert_to_numpy: bool = True, **kwargs: Any) -> np.ndarray:
+        if isinstance(texts, str):
+            return self.encode([texts], batch_size, convert_to_numpy, **kwargs)[0]
+        texts = list(texts)
+        if not texts or len(texts) > self.max_batch_size or not convert_to_numpy or kwargs:
+            return self.model.encode(texts, batch_size=batch_size, convert_to_numpy=convert_to_numpy, **kwargs)
+        pending = _Pending(texts)
+        with self._lock:
+            # checked and queued under the lock, so nothing can land behind close()'s stop marker
+            queued = not self._closed
+            if queued:
+                self._waiting += 1
+                self._queue.put(pending)
+        if not queued:
+            return self.model.encode(texts, batch_size=batch_size, convert_to_numpy=convert_to_numpy)
+        return pending.future.result()
+
+    def _collect(self) -> List[_Pending]:
+        first = self._queue.get()
+        if first is None:
+            return []
+        batch = [first]
+        count = len(batch[0].texts)
+        deadline = time.perf_counter() + self.max_wait
+        while count < self.max_batch_size:
+            try:
+                if self._waiting > len(batch):
+                    # Someone else has called encode; give them until the deadline to arrive
+                    item = self._queue.get(timeout=max(deadline - time.perf_counter(), 0))
+                else:
+                    item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)  # stop after this batch
+                break
+            batch.append(item)
+            count += len(item.texts)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            if not batch:
+                return
+            texts = [text for item in batch for text in item.texts]
+            BATCH_SIZES.observe(len(texts))
+            try:
+                with span("encoder.batch"):
+                    vectors = self.model.encode(texts, batch_size=len(texts), convert_to_numpy=True)
+                error = None
+            except Exception as e:
+                logger.error(f"Batched encode of {len(texts)} texts failed: {e}")
+                error = e
+            with self._lock:
+                self._waiting -= len(batch)
+            start = 0
+            for item in batch:
+                if error is not None:
+                    item.future.set_exception(error)
+                else:
+                    item.future.set_result(vectors[start:start + len(item.texts)])
+                start += len(item.texts)
+
+    def close(self, timeout: Optional[float] = 5.0) -> None:
+        """Encode what is already queued, then stop the worker thread"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._worker.join(timeout)
+        # the worker is still busy after the timeout: encode what it has not picked up yet here
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                try:
+                    item.future.set_result(self.model.encode(item.texts, batch_size=len(item.texts), convert_to_numpy=True))
+                except Exception as e:
+                    item.future.set_exception(e)
+        if self._worker.is_alive():
+            self._queue.put(None)  # the marker may have been drained above
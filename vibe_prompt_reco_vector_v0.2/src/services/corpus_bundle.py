@@ -0,0 +1,130 @@
+"""
+Versioned corpus bundles produced by scripts/build_corpus.py
+"""
+
+import json
+import logging
+import os
+import shutil
+import time
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional
+
+import faiss
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BUNDLE_FORMAT = 1
+CURRENT_FILE = "CURRENT"
+MANIFEST_FILE = "manifest.json"
+PROMPTS_FILE = "prompts.json"
+EMBEDDINGS_FILE = "embeddings.npy"
+INDEX_FILE = "index.faiss"
+
+
+@dataclass
+class CorpusBundle:
+    """Prompts with their embeddings and search index, built together"""
+    version: str
+    path: str
+    manifest: Dict[str, Any]
+    prompts: List[Dict[str, Any]]
+    embeddings: np.ndarray
+    index: faiss.Index = field(repr=False)
+
+    @property
+    def model_name(self) -> str:
+        return self.manifest.get("model_name", "")
+
+
+def _write_pointer(artifact_dir: str, version: str) -> None:
+    tmp_path = os.path.join(artifact_dir, CURRENT_FILE + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(version + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, os.path.join(artifact_dir, CURRENT_FILE))
+
+
+def write_bundle(
+    artifact_dir: str,
+    prompts_file: str,
+    embeddings_file: str,
+    index_file: str,
+    manifest: Dict[str, Any]
+) -> str:
+    """Copy build outputs into a new bundle directory and make it current; returns the version.
+
+    The bundle is assembled under a temporary name and renamed into place,
+    and ``CURRENT`` is switched last, so readers never see a partial bundle.
+    """
+    os.makedirs(artifact_dir, exist_ok=True)
+    version = time.strftime("%Y%m%d-%H%M%S") + "-" + manifest["fingerprint"][:8]
+    bundle_dir = os.path.join(artifact_dir, version)
+    tmp_dir = bundle_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    shutil.copyfile(prompts_file, os.path.join(tmp_dir, PROMPTS_FILE))
+    shutil.copyfile(embeddings_file, os.path.join(tmp_dir, EMBEDDINGS_FILE))
+    shutil.copyfile(index_file, os.path.join(tmp_dir, INDEX_FILE))
+    with open(os.path.join(tmp_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump({**manifest, "version": version, "format": BUNDLE_FORMAT}, f, indent=2, ensure_ascii=False)
+    if os.path.exists(bundle_dir):
+        shutil.rmtree(bundle_dir)
+    os.replace(tmp_dir, bundle_dir)
+    _write_pointer(artifact_dir, version)
+    return version
+
+
+def current_version(artifact_dir: str) -> Optional[str]:
+    try:
+        with open(os.path.join(artifact_dir, CURRENT_FILE), "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def list_versions(artifact_dir: str) -> List[str]:
+    """Complete bundle versions, oldest first"""
+    if not os.path.isdir(artifact_dir):
+        return []
+    return sorted(
+        name for name in os.listdir(artifact_dir)
+        if os.path.exists(os.path.join(artifact_dir, name, MANIFEST_FILE))
+    )
+
+
+def prune_bundles(artifact_dir: str, keep: int) -> List[str]:
+    """Delete all but the newest ``keep`` bundles (never the current one)"""
+    current = current_version(artifact_dir)
+    versions = list_versions(artifact_dir)
+    removed = [v for v in versions[:max(0, len(versions) - keep)] if v != current]
+    for version in removed:
+        shutil.rmtree(os.path.join(artifact_dir, version), ignore_errors=True)
+    return removed
+
+
+def load_bundle(artifact_dir: str, version: Optional[str] = None) -> Optional[CorpusBundle]:
+    """Load the given (default: current) bundle, or None if there is none"""
+    version = version or current_version(artifact_dir)
+    if not version:
+        return None
+    bundle_dir = os.path.join(artifact_dir, version)
+    try:
+        with open(os.path.join(bundle_dir, MANIFEST_FILE), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("format") != BUNDLE_FORMAT:
+            logger.warning(f"Unsupported bundle format in {bundle_dir}")
+            return None
+        with open(os.path.join(bundle_dir, PROMPTS_FILE), "r", encoding="utf-8") as f:
+            prompts = json.load(f)
+        embeddings = np.load(os.path.join(bundle_dir, EMBEDDINGS_FILE))
+        index = faiss.read_index(os.path.join(bundle_dir, INDEX_FILE))
+    except Exception as e:
+        logger.error(f"Failed to load corpus bundle {bundle_dir}: {e}")
+        return None
+    if len(prompts) != len(embeddings) or index.ntotal != len(prompts):
+        logger.error(f"Corpus bundle {bundle_dir} is inconsistent; ignoring it")
+        return None
+    return CorpusBundle(version, bundle_dir, manifest, prompts, embeddings, index)
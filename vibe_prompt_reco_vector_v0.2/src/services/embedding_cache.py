@@ -0,0 +1,177 @@
+"""
+Content-addressed store of normalized text embeddings
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from typing import List, Dict, Optional
+
+import numpy as np
+
+from utils.atomic_files import atomic_write, file_lock
+from utils.cache_policy import CACHE_EVICTIONS, CACHE_BYTES, CACHE_ENTRIES, CachePolicy
+from utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+USAGE_SAVE_INTERVAL_SECONDS = 3600  # hits alone rewrite the file at most this often
+
+STORE_LOOKUPS = REGISTRY.counter("embedding_store_texts", "Texts looked up in the embedding store", labels=("result",))
+
+
+def text_key(text: str) -> str:
+    """Stable key for a text's embedding"""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Embeddings keyed by a hash of the exact text that was encoded.
+
+    Both the merge pipeline and ``RecommendationService`` encode prompts
+    through this store, so a prompt embedded once is never encoded again
+    by either of them. Vectors are L2-normalized float32. The file is
+    bound to one model; a store written by another model is ignored.
+
+    With a ``policy``, each row remembers when it was last used and how
+    often: rows unused past the TTL are dropped on load, and rows beyond the
+    entry or memory budget are evicted LRU or LFU when new ones are added.
+    """
+
+    def __init__(self, path: str, model_name: str, policy: Optional[CachePolicy] = None):
+        self.path = path
+        self.model_name = model_name
+        self.policy = policy or CachePolicy("embedding")
+        self._lock = threading.Lock()
+        self._index: Dict[str, int] = {}
+        self._vectors: Optional[np.ndarray] = None
+        self._used = np.empty(0, dtype=np.float64)
+        self._hits = np.empty(0, dtype=np.int64)
+        self._dirty = False  # rows added or dropped
+        self._usage_changed = False  # only last-used times and hit counts moved
+        self._saved_at = time.time()
+        self._load()
+
+    def _load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                if str(data["model_name"]) != self.model_name:
+                    logger.info(f"Embedding store {self.path} belongs to another model; starting empty")
+                    return
+                keys = data["keys"].tolist()
+                self._vectors = data["vectors"].astype(np.float32)
+                # stores written before usage tracking count as used when last saved
+                self._used = data["used"] if "used" in data.files else np.full(len(keys), os.path.getmtime(self.path))
+                self._hits = data["hits"] if "hits" in data.files else np.zeros(len(keys), dtype=np.int64)
+            self._index = {key: i for i, key in enumerate(keys)}
+            expired = (
+                time.time() - self._used > self.policy.ttl_seconds
+                if self.policy.ttl_seconds is not None else np.zeros(len(keys), dtype=bool)
+            )
+            if expired.any():
+                self._drop(np.flatnonzero(expired), "expired")
+                self._dirty = True
+            self._publish_stats()
+        except Exception as e:
+            logger.error(f"Failed to load embedding store: {e}")
+            self._index, self._vectors = {}, None
+            self._used, self._hits = np.empty(0, dtype=np.float64), np.empty(0, dtype=np.int64)
+
+    def _drop(self, rows: np.ndarray, reason: str) -> None:
+        """Remove ``rows`` and renumber the rest (caller holds ``_lock`` or is loading)"""
+        keep = np.ones(len(self._index), dtype=bool)
+        keep[rows] = False
+        keys = sorted(self._index, key=self._index.get)
+        self._index = {key: i for i, key in enumerate(k for k, kept in zip(keys, keep) if kept)}
+        self._vectors, self._used, self._hits = self._vectors[keep], self._used[keep], self._hits[keep]
+        CACHE_EVICTIONS.labels(cache=self.policy.name, reason=reason).inc(len(rows))
+
+    def _enforce_budget(self, added: int) -> None:
+        """Evict rows LRU/LFU while over the entry or memory budget, the ``added`` newest rows last
+        (caller holds ``_lock``)"""
+        row_bytes = self._vectors.shape[1] * self._vectors.itemsize
+        over = len(self._index) - min(
+            self.policy.max_entries if self.policy.max_entries is not None else len(self._index),
+            self.policy.max_memory_bytes // row_bytes if self.policy.max_memory_bytes is not None else len(self._index)
+        )
+        if over > 0:
+            order = self.policy.eviction_order(self._used, self._hits)
+            first_new = len(self._index) - added
+            order = np.concatenate([order[order < first_new], order[order >= first_new]])
+            self._drop(order[:over], "capacity")
+
+    def _publish_stats(self) -> None:
+        CACHE_ENTRIES.labels(cache=self.policy.name).set(len(self._index))
+        CACHE_BYTES.labels(cache=self.policy.name, medium="memory").set(
+            0 if self._vectors is None else self._vectors.nbytes
+        )
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def lookup(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        with self._lock:
+            rows = [self._index.get(key) for key in map(text_key, texts)]
+            found = np.array([row for row in rows if row is not None], dtype=np.int64)
+            if len(found):
+                self._used[found] = time.time()
+                np.add.at(self._hits, found, 1)
+                self._usage_changed = True
+            return [None if row is None else self._vectors[row] for row in rows]
+
+    def add(self, texts: List[str], vectors: np.ndarray) -> None:
+        with self._lock:
+            new_rows = []
+            for text, vector in zip(texts, vectors):
+                key = text_key(text)
+                if key not in self._index:
+                    self._index[key] = len(self._index)
+                    new_rows.append(vector)
+            if not new_rows:
+                return
+            stacked = np.asarray(new_rows, dtype=np.float32)
+            self._vectors = stacked if self._vectors is None else np.vstack([self._vectors, stacked])
+            self._used = np.concatenate([self._used, np.full(len(new_rows), time.time())])
+            self._hits = np.concatenate([self._hits, np.zeros(len(new_rows), dtype=np.int64)])
+            self._enforce_budget(len(new_rows))
+            self._publish_stats()
+            self._dirty = True
+
+    def encode(self, texts: List[str], model, batch_size: int = 64) -> np.ndarray:
+        """Return normalized embeddings for ``texts``, encoding only unseen ones"""
+        cached = self.lookup(texts)
+        missing = list(dict.fromkeys(t for t, v in zip(texts, cached) if v is None))
+        STORE_LOOKUPS.labels(result="hit").inc(len(texts) - len(missing))
+        STORE_LOOKUPS.labels(result="encoded").inc(len(missing))
+        if missing:
+            logger.info(f"Encoding {len(missing)} of {len(texts)} texts ({len(texts) - len(missing)} cached)")
+            vectors = model.encode(missing, batch_size=batch_size, convert_to_numpy=True).astype(np.float32)
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors /= np.maximum(norms, 1e-12)
+            self.add(missing, vectors)
+            # built from the fresh vectors: the budget may already have evicted some of them
+            fresh = dict(zip(missing, vectors))
+            cached = [fresh[t] if v is None else v for t, v in zip(texts, cached)]
+        return np.vstack(cached).astype(np.float32) if texts else np.empty((0, 0), dtype=np.float32)
+
+    def save(self) -> None:
+        """Write the store if rows changed, or if only usage changed and was last written over an hour ago"""
+        with self._lock:
+            usage_due = self._usage_changed and time.time() - self._saved_at >= USAGE_SAVE_INTERVAL_SECONDS
+            if not (self._dirty or usage_due) or not self.path or self._vectors is None:
+                return
+            keys = sorted(self._index, key=self._index.get)
+            try:
+                with file_lock(self.path), atomic_write(self.path) as f:
+                    np.savez(
+                        f, model_name=np.array(self.model_name), keys=np.array(keys), vectors=self._vectors,
+                        used=self._used, hits=self._hits
+                    )
+                self._dirty = self._usage_changed = False
+                self._saved_at = time.time()
+            except Exception as e:
+                logger.error(f"Failed to save embedding store: {e}")
@@ -0,0 +1,351 @@
+"""
+Out-of-process encoder workers reached over Unix sockets
+
+Connections carry pickles, so both ends authenticate with a shared key and
+the sockets live in a directory only the owning user can enter.
+"""
+
+import itertools
+import logging
+import multiprocessing
+import os
+import secrets
+import threading
+import time
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Connection, Listener
+from typing import List, Dict, Any, Callable, Optional, Tuple
+
+import numpy as np
+
+from utils.config import ENCODER_AUTHKEY
+from utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+POOL_REQUESTS = REGISTRY.counter("encoder_pool_requests", "Encode calls sent to encoder workers", labels=("result",))
+WORKER_RESTARTS = REGISTRY.counter("encoder_worker_restarts", "Encoder worker processes restarted after dying")
+
+MONITOR_INTERVAL_SECONDS = 1.0
+MAX_IDLE_CONNECTIONS = 8
+
+
+class EncoderUnavailable(RuntimeError):
+    """No encoder worker could serve the request"""
+
+
+class EncoderModelMismatch(EncoderUnavailable):
+    """The encoder workers serve a different model than the client expects"""
+
+
+def load_sentence_transformer(model_name: str):
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name)
+
+
+def worker_address(socket_path: str, worker: int) -> str:
+    return f"{socket_path}.{worker}"
+
+
+def default_socket_path() -> str:
+    """Socket prefix in the user's private runtime directory (never a shared one like /tmp)"""
+    base = os.getenv("XDG_RUNTIME_DIR") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "prompt-encoder", "encoder.sock")
+
+
+def _check_private(path: str, mask: int) -> None:
+    st = os.stat(path)
+    if st.st_uid != os.getuid() or st.st_mode & mask:
+        raise PermissionError(f"{path} must be owned by this user and not accessible to others")
+
+
+def ensure_private_dir(socket_path: str) -> None:
+    """Create the socket's directory with mode 0700, refusing an existing one others can enter"""
+    directory = os.path.dirname(os.path.abspath(socket_path))
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    _check_private(directory, 0o077)
+
+
+def authkey_path(socket_path: str) -> str:
+    return f"{socket_path}.key"
+
+
+def load_authkey(socket_path: str, create: bool = False) -> bytes:
+    """Key both ends authenticate with: ``ENCODER_AUTHKEY``, else the 0600 file ``<socket_path>.key``"""
+    if ENCODER_AUTHKEY:
+        return ENCODER_AUTHKEY.encode("utf-8")
+    path = authkey_path(socket_path)
+    if create:
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            pass
+        else:
+            with os.fdopen(fd, "w") as f:
+                f.write(secrets.token_hex(32))
+    _check_private(path, 0o077)
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read().strip().encode("utf-8")
+
+
+def _serve_connection(conn: Connection, model: Any, model_name: str, lock: threading.Lock) -> None:
+    with conn:
+        while True:
+            try:
+                op, payload = conn.recv()
+            except (EOFError, OSError):
+                return
+            try:
+                if op == "hello":
+                    conn.send(("ok", model_name))
+                elif op == "encode":
+                    texts, kwargs = payload
+                    # One encode at a time per worker; parallelism comes from more workers
+                    with lock:
+                        vectors = model.encode(texts, convert_to_numpy=True, **kwargs)
+                    conn.send(("ok", np.asarray(vectors, dtype=np.float32)))
+                else:
+                    conn.send(("error", f"unknown op {op!r}"))
+            except (EOFError, OSError):
+                return
+            except Exception as e:
+                conn.send(("error", str(e)))
+
+
+def _worker_main(address: str, model_name: str, factory: Callable[[str], Any], authkey: bytes) -> None:
+    """Entry point of one worker process: load the model once, then serve authenticated connections"""
+    model = factory(model_name)
+    if os.path.exists(address):
+        os.unlink(address)
+    listener = Listener(address, family="AF_UNIX", authkey=authkey)
+    lock = threading.Lock()
+    while True:
+        try:
+            conn = listener.accept()
+        except (AuthenticationError, EOFError, OSError) as e:
+            logger.warning(f"Rejected encoder connection on {address}: {e}")
+            continue
+        threading.Thread(target=_serve_connection, args=(conn, model, model_name, lock), daemon=True).start()
+
+
+class EncoderPool:
+    """Supervisor of encoder worker processes; restarts any that die.
+
+    Each worker hosts one copy of the model and listens on
+    ``<socket_path>.<n>``. Run one pool per host (``scripts/encoder_server.py``)
+    and point every app process at it with ``PROMPT_ENCODER_SOCKET``.
+    ``start`` refuses a socket directory other users can enter and creates
+    the auth key file unless ``PROMPT_ENCODER_AUTHKEY`` is set.
+    """
+
+    def __init__(
+        self,
+        socket_path: str,
+        model_name: str,
+        workers: int = 1,
+        factory: Callable[[str], Any] = load_sentence_transformer
+    ):
+        self.socket_path = socket_path
+        self.model_name = model_name
+        self.workers = workers
+        self.factory = factory
+        self._context = multiprocessing.get_context("spawn")
+        self._processes: List[Optional[multiprocessing.Process]] = [None] * workers
+        self._stopped = threading.Event()
+        self._authkey = b""
+
+    def _spawn(self, worker: int) -> None:
+        process = self._context.Process(
+            target=_worker_main,
+            args=(worker_address(self.socket_path, worker), self.model_name, self.factory, self._authkey),
+            name=f"encoder-worker-{worker}",
+            daemon=True
+        )
+        process.start()
+        self._processes[worker] = process
+
+    def start(self) -> None:
+        ensure_private_dir(self.socket_path)
+        self._authkey = load_authkey(self.socket_path, create=True)
+        for worker in range(self.workers):
+            self._spawn(worker)
+        logger.info(f"Started {self.workers} encoder worker(s) for {self.model_name} at {self.socket_path}.*")
+
+    def check_workers(self) -> int:
+        """Restart dead workers; returns how many were restarted"""
+        restarted = 0
+        for worker, process in enumerate(self._processes):
+            if process is not None and not process.is_alive() and not self._stopped.is_set():
+                logger.warning(f"Encoder worker {worker} exited with {process.exitcode}; restarting")
+                self._spawn(worker)
+                WORKER_RESTARTS.inc()
+                restarted += 1
+        return restarted
+
+    def wait_ready(self, timeout: float = 60.0) -> bool:
+        """Wait until every worker accepts connections"""
+        deadline = time.monotonic() + timeout
+        for worker in range(self.workers):
+            while True:
+                try:
+                    with Client(worker_address(self.socket_path, worker), family="AF_UNIX", authkey=self._authkey):
+                        break
+                except OSError:
+                    if time.monotonic() > deadline:
+                        return False
+                    time.sleep(0.05)
+        return True
+
+    def serve_forever(self) -> None:
+        self.start()
+        try:
+            while not self._stopped.wait(MONITOR_INTERVAL_SECONDS):
+                self.check_workers()
+        finally:
+            self.stop()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        for worker, process in enumerate(self._processes):
+            if process is not None and process.is_alive():
+                process.terminate()
+                process.join(timeout=5)
+            address = worker_address(self.socket_path, worker)
+            if os.path.exists(address):
+                os.unlink(address)
+
+
+class RemoteEncoder:
+    """Client with the ``encode`` interface of a SentenceTransformer, backed by an ``EncoderPool``.
+
+    Calls are spread round-robin over the workers and retried on another
+    worker when one has died, so a crashed worker costs at most a failed
+    request (``EncoderUnavailable``) while the pool restarts it. Idle
+    connections are kept per worker and shared across threads; when one
+    turns out dead, all of that worker's are dropped. The auth key
+    is read on the first connection, so the app may start before the pool.
+
+    Workers report the model they serve. If it is not ``model_name``, the
+    client loads ``fallback(model_name)`` once and encodes in-process from
+    then on; without a fallback it raises ``EncoderModelMismatch``.
+    """
+
+    def __init__(
+        self,
+        socket_path: str,
+        workers: int = 1,
+        model_name: Optional[str] = None,
+        timeout: float = 30.0,
+        fallback: Optional[Callable[[str], Any]] = None
+    ):
+        self.socket_path = socket_path
+        self.workers = workers
+        self.model_name = model_name
+        self.timeout = timeout
+        self.fallback = fallback
+        self._local: Any = None
+        self._next = itertools.count()
+        self._idle: Dict[int, List[Connection]] = {worker: [] for worker in range(workers)}
+        self._lock = threading.Lock()
+        self._local_lock = threading.Lock()
+        self._authkey: Optional[bytes] = None
+
+    def _connect(self, worker: int) -> Tuple[Connection, bool]:
+        """An idle connection to ``worker`` (and True), else a new one (and False)"""
+        with self._lock:
+            if self._idle[worker]:
+                return self._idle[worker].pop(), True
+        if self._authkey is None:
+            self._authkey = load_authkey(self.socket_path)
+        try:
+            conn = Client(worker_address(self.socket_path, worker), family="AF_UNIX", authkey=self._authkey)
+        except AuthenticationError as e:
+            raise EncoderUnavailable(f"Encoder worker {worker} failed authentication: {e}")
+        served = self._call(conn, "hello", None)
+        if self.model_name and served != self.model_name:
+            conn.close()
+            raise EncoderModelMismatch(f"Encoder worker serves {served}, expected {self.model_name}")
+        return conn, False
+
+    def _release(self, worker: int, conn: Connection) -> None:
+        with self._lock:
+            if len(self._idle[worker]) < MAX_IDLE_CONNECTIONS:
+                self._idle[worker].append(conn)
+                return
+        conn.close()
+
+    def _discard(self, worker: int) -> None:
+        with self._lock:
+            idle, self._idle[worker] = self._idle[worker], []
+        for conn in idle:
+            conn.close()
+
+    def _call(self, conn: Connection, op: str, payload: Any) -> Any:
+        conn.send((op, payload))
+        if not conn.poll(self.timeout):
+            raise TimeoutError(f"Encoder worker did not answer within {self.timeout}s")
+        status, result = conn.recv()
+        if status != "ok":
+            raise EncoderUnavailable(result)
+        return result
+
+    def encode(self, texts, batch_size: int = 32, convert_to_numpy: bool = True, **kwargs: Any) -> np.ndarray:
+        if isinstance(texts, str):
+            return self.encode([texts], batch_size, convert_to_numpy, **kwargs)[0]
+        if self._local is not None:
+            return self._local.encode(texts, batch_size=batch_size, convert_to_numpy=convert_to_numpy, **kwargs)
+        payload = (list(texts), dict(kwargs, batch_size=batch_size))
+        start = next(self._next)
+        last_error: Optional[Exception] = None
+        attempt = 0
+        while attempt < max(self.workers, 2):
+            worker = (start + attempt) % self.workers
+            conn, reused = None, False
+            try:
+                conn, reused = self._connect(worker)
+                vectors = self._call(conn, "encode", payload)
+            except EncoderModelMismatch as e:
+                if self.fallback is None:
+                    POOL_REQUESTS.labels(result="failed").inc()
+                    raise
+                POOL_REQUESTS.labels(result="local").inc()
+                return self._encode_locally(e).encode(
+                    texts, batch_size=batch_size, convert_to_numpy=convert_to_numpy, **kwargs
+                )
+            except EncoderUnavailable:
+                POOL_REQUESTS.labels(result="failed").inc()
+                if conn is not None:
+                    self._release(worker, conn)
+                raise
+            except (EOFError, OSError, TimeoutError) as e:
+                # Dead or restarted worker: its other idle connections are stale too. A stale one
+                # says nothing about the worker now, so it gets a fresh connection before the next one.
+                if conn is not None:
+                    conn.close()
+                self._discard(worker)
+                last_error = e
+                POOL_REQUESTS.labels(result="retry").inc()
+                if not reused:
+                    attempt += 1
+                continue
+            self._release(worker, conn)
+            POOL_REQUESTS.labels(result="ok").inc()
+            return vectors
+        POOL_REQUESTS.labels(result="failed").inc()
+        raise EncoderUnavailable(f"No encoder worker at {self.socket_path}.* answered: {last_error}")
+
+    def _encode_locally(self, reason: Exception) -> Any:
+        """Load the fallback model once; vectors of another model would not match the index"""
+        with self._local_lock:
+            if self._local is None:
+                logger.warning(f"{reason}; encoding {self.model_name} in this process instead")
+                self._local = self.fallback(self.model_name)
+                self.close()
+        return self._local
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, {worker: [] for worker in range(self.workers)}
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
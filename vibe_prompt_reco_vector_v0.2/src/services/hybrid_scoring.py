@@ -0,0 +1,90 @@
+"""
+Vectorized whole-corpus scoring for hybrid recommendations
+"""
+
+from typing import List, Dict, Any, Hashable, Tuple
+
+import numpy as np
+from scipy import sparse
+
+# Points per hit in keyword scoring (not the fusion weights KEYWORD_WEIGHT/VECTOR_WEIGHT in utils.config)
+CATEGORY_HIT_SCORE = 2.0
+KEYWORD_HIT_SCORE = 1.0
+
+
+class KeywordMatrix:
+    """Sparse prompt x term matrix of category and keyword hits.
+
+    ``scores(tags)`` gives ``keyword_recommend``'s score (2 for a matching
+    category plus 1 per shared keyword) for every prompt at once, as one
+    sparse matrix-vector product.
+    """
+
+    def __init__(self, prompts: List[Dict[str, Any]]):
+        self.terms: Dict[Tuple[str, Hashable], int] = {}
+        rows, cols, weights = [], [], []
+        for row, prompt in enumerate(prompts):
+            category = prompt.get("category")
+            if category:
+                rows.append(row)
+                cols.append(self.terms.setdefault(("category", category), len(self.terms)))
+                weights.append(CATEGORY_HIT_SCORE)
+            for keyword in set(prompt.get("keywords") or []):
+                rows.append(row)
+                cols.append(self.terms.setdefault(("keyword", keyword), len(self.terms)))
+                weights.append(KEYWORD_HIT_SCORE)
+        self.matrix = sparse.csr_matrix(
+            (np.asarray(weights, dtype=np.float32), (rows, cols)),
+            shape=(len(prompts), len(self.terms))
+        )
+
+    def query_vector(self, tags: Dict[str, List[str]]) -> np.ndarray:
+        vector = np.zeros(len(self.terms), dtype=np.float32)
+        for kind, values in (("category", tags.get("categories", [])), ("keyword", tags.get("keywords", []))):
+            for value in values:
+                column = self.terms.get((kind, value))
+                if column is not None:
+                    vector[column] = 1.0
+        return vector
+
+    def scores(self, tags: Dict[str, List[str]]) -> np.ndarray:
+        return self.matrix @ self.query_vector(tags)
+
+
+def fuse_scores(
+    keyword_scores: np.ndarray,
+    similarities: np.ndarray,
+    keyword_weight: float,
+    vector_weight: float
+) -> np.ndarray:
+    """Weighted sum of keyword scores scaled to [0, 1] and cosine similarities"""
+    top = float(keyword_scores.max()) if len(keyword_scores) else 0.0
+    if top > 0:
+        keyword_scores = keyword_scores / top
+    return keyword_weight * keyword_scores + vector_weight * similarities
+
+
+def rrf_scores(
+    keyword_scores: np.ndarray,
+    similarities: np.ndarray,
+    keyword_weight: float,
+    vector_weight: float,
+    c: float = 60.0
+) -> np.ndarray:
+    """Weighted reciprocal-rank fusion; prompts without a keyword hit get no keyword term"""
+    def ranks(scores: np.ndarray) -> np.ndarray:
+        result = np.empty(len(scores), dtype=np.float64)
+        result[np.argsort(-scores, kind="stable")] = np.arange(1, len(scores) + 1)
+        return result
+
+    keyword_term = np.where(keyword_scores > 0, keyword_weight / (c + ranks(keyword_scores)), 0.0)
+    return keyword_term + vector_weight / (c + ranks(similarities))
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the ``k`` highest scores, best first (argpartition, then a sort of only k)"""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind="stable")]
@@ -0,0 +1,129 @@
+"""
+Immutable vector index snapshots with single-flight background rebuilds
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Callable, Iterable, Optional, Tuple
+
+import faiss
+import numpy as np
+
+from utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+REBUILDS = REGISTRY.counter("index_rebuilds", "Background index rebuilds", labels=("result",))
+
+
+def texts_fingerprint(texts: Iterable[str]) -> str:
+    """Digest identifying an exact, ordered list of prompt texts"""
+    digest = hashlib.blake2b(digest_size=16)
+    for text in texts:
+        digest.update(text.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+@dataclass(frozen=True)
+class IndexSnapshot:
+    """An index and the exact prompts it was built from; never modified once published"""
+    fingerprint: str
+    generation: int
+    prompts: List[Dict[str, Any]]
+    index: faiss.Index = field(repr=False)
+    embeddings: np.ndarray = field(repr=False)
+    built_at: float = field(default_factory=time.time)
+
+    @property
+    def size(self) -> int:
+        return len(self.prompts)
+
+
+BuildFn = Callable[[List[Dict[str, Any]], str], Optional[Tuple[faiss.Index, np.ndarray]]]
+
+
+class SnapshotHolder:
+    """Publishes index snapshots by swapping a single reference.
+
+    Readers use ``current`` without locking; the reference is replaced only
+    after a snapshot is fully built, so they see the old snapshot or the new
+    one and never a partial build. ``request`` starts at most one rebuild
+    thread; requests arriving while it runs only move the target it builds
+    next. ``invalidate`` marks every published snapshot stale.
+    """
+
+    def __init__(self, build: BuildFn, thread_name: str = "index-rebuild"):
+        self._build = build
+        self._thread_name = thread_name
+        self._current: Optional[IndexSnapshot] = None
+        self._generation = 0
+        self._target: Optional[Tuple[List[Dict[str, Any]], str]] = None
+        self._future: Optional[Future] = None
+        self._lock = threading.Lock()
+
+    @property
+    def current(self) -> Optional[IndexSnapshot]:
+        return self._current
+
+    def is_fresh(self, snapshot: Optional[IndexSnapshot], fingerprint: str) -> bool:
+        return snapshot is not None and snapshot.fingerprint == fingerprint and snapshot.generation == self._generation
+
+    def publish(
+        self, prompts: List[Dict[str, Any]], fingerprint: str, index: faiss.Index, embeddings: np.ndarray
+    ) -> IndexSnapshot:
+        """Publish an index built elsewhere (e.g. a corpus bundle)"""
+        with self._lock:
+            snapshot = IndexSnapshot(fingerprint, self._generation, prompts, index, embeddings)
+            self._current = snapshot
+        return snapshot
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._generation += 1
+
+    def request(self, prompts: List[Dict[str, Any]], fingerprint: str) -> Future:
+        """Ask for a snapshot of ``prompts``; the future resolves to the newest snapshot"""
+        with self._lock:
+            self._target = (prompts, fingerprint)
+            if self._future is None:
+                self._future = Future()
+                threading.Thread(
+                    target=self._run, args=(self._future,), name=self._thread_name, daemon=True
+                ).start()
+            return self._future
+
+    def wait(self, timeout: Optional[float] = None) -> Optional[IndexSnapshot]:
+        """Block until the in-flight rebuild (if any) has published"""
+        future = self._future
+        if future is not None:
+            future.result(timeout)
+        return self._current
+
+    def _run(self, future: Future) -> None:
+        failed = False
+        while True:
+            with self._lock:
+                prompts, fingerprint = self._target
+                generation = self._generation
+                if failed or self.is_fresh(self._current, fingerprint):
+                    self._future = None
+                    break
+            try:
+                built = self._build(prompts, fingerprint)
+            except Exception as e:
+                logger.error(f"Index rebuild failed: {e}")
+                built = None
+            if built is None:
+                REBUILDS.labels(result="failed").inc()
+                failed = True
+                continue
+            index, embeddings = built
+            self._current = IndexSnapshot(fingerprint, generation, prompts, index, embeddings)
+            REBUILDS.labels(result="ok").inc()
+            logger.info(f"Published index snapshot {fingerprint[:8]} ({len(prompts)} prompts)")
+        future.set_result(self._current)
@@ -0,0 +1,162 @@
+"""
+Registry of embedding models, each served by its own RecommendationService
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import List, Dict, Any, Callable, Optional
+
+from services.corpus_bundle import CorpusBundle
+from services.recommendation_service import RecommendationService
+from utils.config import (
+    DEFAULT_EMBEDDING_MODEL, EMBEDDING_CACHE_FILE, EMBEDDING_STORE_FILE, ENCODER_SOCKET, MAX_RESIDENT_MODELS,
+    SHARED_INDEX_DIR
+)
+from utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+MODEL_SWITCHES = REGISTRY.counter("embedding_model_switches", "Requested embedding model switches", labels=("result",))
+RESIDENT_MODELS = REGISTRY.gauge("embedding_models_resident", "Embedding models loaded with their indexes")
+
+ServiceFactory = Callable[..., RecommendationService]
+
+
+class ModelRegistry:
+    """One ``RecommendationService`` per embedding model; up to ``max_resident`` stay loaded.
+
+    Every service namespaces its index cache, embedding store and shared
+    index directory by model name, so models never serve each other's
+    vectors. ``switch`` builds the new model's index in the background and
+    makes it ``active`` only once it is ready; until then the current model
+    keeps serving. The encoder socket serves a single model (whatever
+    ``scripts/encoder_server.py --model`` loaded); every service checks the
+    model it reports and encodes in-process when it is not its own.
+    """
+
+    def __init__(
+        self,
+        default_model: str = DEFAULT_EMBEDDING_MODEL,
+        cache_file: str = EMBEDDING_CACHE_FILE,
+        embedding_store_file: Optional[str] = EMBEDDING_STORE_FILE,
+        encoder_socket: str = ENCODER_SOCKET,
+        shared_index_dir: str = SHARED_INDEX_DIR,
+        max_resident: int = MAX_RESIDENT_MODELS,
+        factory: ServiceFactory = RecommendationService
+    ):
+        self.default_model = default_model
+        self.cache_file = cache_file
+        self.embedding_store_file = embedding_store_file
+        self.encoder_socket = encoder_socket
+        self.shared_index_dir = shared_index_dir
+        self.max_resident = max(1, max_resident)
+        self.factory = factory
+        self.active_model = default_model
+        self._pending: Optional[str] = None
+        self._services: "OrderedDict[str, RecommendationService]" = OrderedDict()
+        self._bundles: Dict[str, CorpusBundle] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def active(self) -> RecommendationService:
+        """Service of the model currently answering requests"""
+        return self.get(self.active_model)
+
+    @property
+    def target_model(self) -> str:
+        """Model being switched to, or the active one when no switch is in progress"""
+        return self._pending or self.active_model
+
+    @property
+    def resident(self) -> List[str]:
+        return list(self._services)
+
+    def get(self, model_name: str) -> RecommendationService:
+        """Service for ``model_name``, created on first use (evicting the least recently used idle model)"""
+        with self._lock:
+            service = self._services.get(model_name)
+            if service is None:
+                service = self.factory(
+                    model_name=model_name,
+                    cache_file=self.cache_file,
+                    embedding_store_file=self.embedding_store_file,
+                    encoder_socket=self.encoder_socket,
+                    shared_index_dir=self.shared_index_dir
+                )
+                if model_name in self._bundles:
+                    service.use_bundle(self._bundles[model_name])
+                self._services[model_name] = service
+            self._services.move_to_end(model_name)
+            unloaded = self._evict(keep=model_name)
+        self._close(unloaded)
+        return service
+
+    def _evict(self, keep: Optional[str] = None) -> List[RecommendationService]:
+        """Drop idle models beyond ``max_resident``, never ``keep`` (caller holds ``_lock``).
+
+        Returns the dropped services for the caller to ``_close`` once the lock is released.
+        """
+        keep = {self.active_model, self._pending, keep}
+        unloaded = []
+        for model_name in list(self._services):
+            if len(self._services) <= self.max_resident:
+                break
+            if model_name not in keep:
+                unloaded.append(self._services.pop(model_name))
+                logger.info(f"Unloaded embedding model {model_name}")
+        RESIDENT_MODELS.set(len(self._services))
+        return unloaded
+
+    @staticmethod
+    def _close(services: List[RecommendationService]) -> None:
+        """Stop the encoder threads of unloaded services so their models can be freed"""
+        for service in services:
+            try:
+                service.close()
+            except Exception as e:
+                logger.warning(f"Failed to close {service.model_name}: {e}")
+
+    def use_bundle(self, bundle: CorpusBundle) -> None:
+        """Serve ``bundle`` from the service of the model it was built with"""
+        self._bundles[bundle.model_name] = bundle
+        self.get(bundle.model_name).use_bundle(bundle)
+
+    def switch(self, model_name: str, prompts: List[Dict[str, Any]]) -> Future:
+        """Make ``model_name`` active once its index for ``prompts`` is built.
+
+        The returned future resolves to whether ``model_name`` became active:
+        a failed build leaves the current model active, and a later ``switch``
+        supersedes one still in progress.
+        """
+        with self._lock:
+            self._pending = None if model_name == self.active_model else model_name
+        service = self.get(model_name)
+        switched: Future = Future()
+
+        def activate(done: Future) -> None:
+            snapshot = None if done.exception() else done.result()
+            unloaded: List[RecommendationService] = []
+            with self._lock:
+                if self._pending == model_name:
+                    self._pending = None
+                    if snapshot is None:
+                        MODEL_SWITCHES.labels(result="failed").inc()
+                        logger.error(f"Index build for {model_name} failed; staying on {self.active_model}")
+                    else:
+                        self.active_model = model_name
+                        unloaded = self._evict()
+                        MODEL_SWITCHES.labels(result="ok").inc()
+                        logger.info(f"Switched embedding model to {model_name}")
+                active = self.active_model == model_name
+            self._close(unloaded)
+            switched.set_result(active)
+
+        service.prepare(prompts).add_done_callback(activate)
+        return switched
+
+    def invalidate_cache(self) -> None:
+        """The prompts changed: every resident model rebuilds on its next search"""
+        for service in list(self._services.values()):
+            service.invalidate_cache()
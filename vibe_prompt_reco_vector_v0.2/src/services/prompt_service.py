@@ -5,51 +5,128 @@ Prompt management service
 import json
 import logging
 import os
+import threading
 from typing import List, Dict, Any, Optional
 from uuid import uuid4
-from supabase import create_client, Client
+from services.storage import PromptStorage, create_storage
+from services.write_journal import WriteJournal, INSERT, UPDATE, DELETE
+from utils.config import (
+    STORAGE_BACKEND, SQLITE_DB_PATH, BATCH_SIZE,
+    WRITE_BEHIND_ENABLED, WRITE_JOURNAL_PATH, WRITE_BEHIND_FLUSH_INTERVAL
+)
+from utils.metrics import REGISTRY
+from utils.tracing import traced
 
 logger = logging.getLogger(__name__)
 
+JSON_FALLBACKS = REGISTRY.counter("json_fallback_loads", "Prompt loads served from the local JSON file")
+PROMPTS_LOADED = REGISTRY.gauge("prompts_loaded", "Prompts returned by the latest load")
+
+DEFAULT_DATA_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data", "prompts.json"
+)
+
+
+class PromptCorpus(list):
+    """Prompts returned by ``load_prompts``: one object per corpus version.
+
+    While the stored rows are unchanged ``load_prompts`` hands out the same
+    object, so per-corpus work (the recommendation fingerprint, memoized in
+    ``fingerprint``) runs once per version. Treat it as read-only.
+    """
+
+    def __init__(self, prompts: List[Dict[str, Any]], version: int):
+        super().__init__(prompts)
+        self.version = version
+        self.fingerprint: Optional[str] = None
+
 
 class PromptService:
-    """Service for managing prompts (CRUD operations) - supabase only"""
-    def __init__(self, data_path: str = None):
-        url = os.getenv("SUPABASE_URL")
-        key = os.getenv("SUPABASE_KEY")
-        if not url or not key:
-            logger.error("SUPABASE_URL and SUPABASE_KEY 환경변수가 필요합니다.")
-            self.supabase = None
-        else:
-            self.supabase: Client = create_client(url, key)
+    """Service for managing prompts (CRUD operations) on a pluggable storage backend"""
+    def __init__(
+        self,
+        data_path: str = None,
+        storage: Optional[PromptStorage] = None,
+        journal: Optional[WriteJournal] = None
+    ):
+        self.data_path = data_path or DEFAULT_DATA_PATH
+        if storage is None:
+            storage = create_storage(STORAGE_BACKEND, SQLITE_DB_PATH, seed_file=self.data_path)
+        self.storage = storage
+        if journal is None and WRITE_BEHIND_ENABLED:
+            journal = WriteJournal(
+                WRITE_JOURNAL_PATH, storage,
+                batch_size=BATCH_SIZE, flush_interval=WRITE_BEHIND_FLUSH_INTERVAL
+            )
+        # 설정 시 쓰기는 로컬 저널에 기록된 즉시 완료로 처리하고 백그라운드에서 반영
+        self.journal = journal
+        self._corpus: Optional[PromptCorpus] = None
+        self._corpus_version = 0
+        self._corpus_lock = threading.Lock()
+
+    @property
+    def corpus_version(self) -> int:
+        """Bumped whenever a load returns different rows or this service writes"""
+        return self._corpus_version
+
+    def _as_corpus(self, data: List[Dict[str, Any]]) -> PromptCorpus:
+        """The previous ``PromptCorpus`` if ``data`` has the same rows, else a new version"""
+        with self._corpus_lock:
+            if self._corpus is not None and self._corpus == data:
+                return self._corpus
+            self._corpus_version += 1
+            self._corpus = PromptCorpus(data, self._corpus_version)
+            return self._corpus
 
+    def _corpus_changed(self) -> None:
+        with self._corpus_lock:
+            self._corpus = None
+            self._corpus_version += 1
+
+    @traced("prompts.load")
     def load_prompts(self) -> List[Dict[str, Any]]:
-        """Supabase에서 prompt 데이터를 읽어옴. 실패 시 로컬 파일에서 읽음."""
-        # Supabase에서 데이터 읽기 시도
-        if self.supabase:
-            try:
-                response = self.supabase.table("prompts").select("*").execute()
-                data = response.data
-                if isinstance(data, list) and len(data) > 0:
-                    return data
-            except Exception as e:
-                logger.error(f"Supabase에서 프롬프트를 불러오는 중 오류 발생: {e}")
-        
+        """저장소에서 prompt 데이터를 읽어옴. 원격 저장소 실패 시 로컬 파일에서 읽음.
+
+        내용이 바뀌지 않았으면 이전과 같은 ``PromptCorpus`` 객체를 반환
+        """
+        data = self.storage.load_all()
+        if self.journal:
+            data = self.journal.overlay(data)
+        if data or not self.storage.json_fallback:
+            PROMPTS_LOADED.set(len(data))
+            return self._as_corpus(data)
+
         # 로컬 JSON 파일에서 읽기 (폴백)
-        json_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data", "prompts.json")
-        
-        if os.path.exists(json_path):
+        JSON_FALLBACKS.inc()
+        if os.path.exists(self.data_path):
             try:
-                with open(json_path, 'r', encoding='utf-8') as f:
+                with open(self.data_path, 'r', encoding='utf-8') as f:
                     data = json.load(f)
+                    if isinstance(data, dict):
+                        data = data.get("prompts")
                     if isinstance(data, list):
-                        return data
-                    elif isinstance(data, dict) and "prompts" in data:
-                        return data["prompts"]
+                        PROMPTS_LOADED.set(len(data))
+                        return self._as_corpus(data)
             except Exception as e:
                 logger.error(f"로컬 파일 읽기 오류: {e}")
         
-        return []
+        PROMPTS_LOADED.set(0)
+        return self._as_corpus([])
+
+    @traced("prompts.search")
+    def search_prompts(
+        self,
+        search_query: Optional[str] = None,
+        categories: Optional[List[str]] = None,
+        levels: Optional[List[str]] = None,
+        tools: Optional[List[str]] = None,
+        keywords: Optional[List[str]] = None
+    ) -> Optional[List[Dict[str, Any]]]:
+        """저장소 내부에서 필터/검색 실행. 지원하지 않는 저장소면 None"""
+        if self.journal and self.journal.pending_count:
+            # 아직 반영되지 않은 쓰기가 있으면 저장소 결과가 최신이 아님
+            return None
+        return self.storage.search(search_query, categories, levels, tools, keywords)
 
     def add_prompt(
         self,
@@ -61,12 +138,26 @@ class PromptService:
         level: str = "중급",
         keywords: List[str] = None
     ) -> Optional[Dict[str, Any]]:
-        """Supabase에 새 프롬프트 추가"""
-        if not self.supabase:
-            return None
-        if keywords is None:
-            keywords = []
-        new_prompt = {
+        """새 프롬프트 추가"""
+        new_prompt = self._build_prompt(title, prompt, category, tool, framework, level, keywords)
+        self._corpus_changed()
+        if self.journal:
+            self.journal.append(INSERT, new_prompt["id"], new_prompt)
+            return new_prompt
+        return self.storage.insert(new_prompt)
+
+    @staticmethod
+    def _build_prompt(
+        title: str,
+        prompt: str,
+        category: str,
+        tool: str = "",
+        framework: str = "",
+        level: str = "중급",
+        keywords: List[str] = None
+    ) -> Dict[str, Any]:
+        """입력값을 정리해 저장할 프롬프트 레코드 생성"""
+        return {
             "id": str(uuid4()),
             "title": title.strip(),
             "prompt": prompt.strip(),
@@ -74,45 +165,64 @@ class PromptService:
             "tool": tool.strip() if tool else "",
             "framework": framework.strip() if framework else "",
             "level": level,
-            "keywords": keywords
+            "keywords": keywords if keywords is not None else []
         }
-        try:
-            result = self.supabase.table("prompts").insert(new_prompt).execute()
-            return new_prompt if result.data else None
-        except Exception as e:
-            logger.error(f"Supabase에 프롬프트 추가 중 오류 발생: {e}")
-            return None
 
     def get_prompt_by_id(self, prompt_id: str) -> Optional[Dict[str, Any]]:
-        """ID로 프롬프트 조회 (supabase)"""
-        if not self.supabase:
-            return None
-        try:
-            response = self.supabase.table("prompts").select("*").eq("id", prompt_id).single().execute()
-            return response.data if response.data else None
-        except Exception as e:
-            logger.error(f"Supabase에서 프롬프트 단건 조회 오류: {e}")
-            return None
+        """ID로 프롬프트 조회"""
+        if self.journal:
+            found = self.get_prompts_by_ids([prompt_id])
+            return found[0] if found else None
+        return self.storage.get(prompt_id)
 
     def update_prompt(self, prompt_id: str, updates: Dict[str, Any]) -> bool:
-        """프롬프트 수정 (supabase)"""
-        if not self.supabase:
-            return False
-        try:
-            result = self.supabase.table("prompts").update(updates).eq("id", prompt_id).execute()
-            return bool(result.data)
-        except Exception as e:
-            logger.error(f"Supabase에서 프롬프트 수정 오류: {e}")
-            return False
+        """프롬프트 수정"""
+        self._corpus_changed()
+        if self.journal:
+            self.journal.append(UPDATE, prompt_id, updates)
+            return True
+        return self.storage.update(prompt_id, updates)
 
     def delete_prompt(self, prompt_id: str) -> bool:
-        """프롬프트 삭제 (supabase)"""
-        if not self.supabase:
-            return False
-        try:
-            result = self.supabase.table("prompts").delete().eq("id", prompt_id).execute()
-            return bool(result.data)
-        except Exception as e:
-            logger.error(f"Supabase에서 프롬프트 삭제 오류: {e}")
-            return False
+        """프롬프트 삭제"""
+        self._corpus_changed()
+        if self.journal:
+            self.journal.append(DELETE, prompt_id)
+            return True
+        return self.storage.delete(prompt_id)
+
+    # 배치 작업: 저장소가 지원하면 요청을 묶어서 처리
+
+    def get_prompts_by_ids(self, prompt_ids: List[str]) -> List[Dict[str, Any]]:
+        """여러 ID의 프롬프트를 한 번에 조회 (입력 순서 유지)"""
+        found = self.storage.get_many(prompt_ids)
+        if self.journal:
+            wanted = set(prompt_ids)
+            by_id = {p["id"]: p for p in self.journal.overlay(found) if p.get("id") in wanted}
+            found = [by_id[i] for i in prompt_ids if i in by_id]
+        return found
+
+    def add_prompts(self, prompts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """여러 프롬프트를 배치로 추가. prompts는 add_prompt 인자와 같은 키를 가진 dict 목록"""
+        records = [self._build_prompt(**p) for p in prompts]
+        self._corpus_changed()
+        if self.journal:
+            self.journal.append_many([(INSERT, record["id"], record) for record in records])
+            return records
+        return self.storage.insert_many(records)
+
+    def update_prompts(self, updates: Dict[str, Dict[str, Any]]) -> Dict[str, bool]:
+        """{id: 수정 내용} 형태의 여러 수정을 적용"""
+        self._corpus_changed()
+        if self.journal:
+            self.journal.append_many([(UPDATE, prompt_id, changes) for prompt_id, changes in updates.items()])
+            return {prompt_id: True for prompt_id in updates}
+        return self.storage.update_many(updates)
 
+    def delete_prompts(self, prompt_ids: List[str]) -> List[str]:
+        """여러 프롬프트를 배치로 삭제하고 삭제된 ID 목록 반환"""
+        self._corpus_changed()
+        if self.journal:
+            self.journal.append_many([(DELETE, prompt_id, None) for prompt_id in prompt_ids])
+            return list(prompt_ids)
+        return self.storage.delete_many(prompt_ids)
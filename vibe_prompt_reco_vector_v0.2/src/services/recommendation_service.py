@@ -2,28 +2,119 @@
 Recommendation service for prompt recommendations
 """
 
+import glob
+import hashlib
 import logging
 import os
 import pickle
+import re
+import threading
+from concurrent.futures import Future
 from typing import List, Dict, Any, Tuple, Optional
 import numpy as np
 import faiss
 from sentence_transformers import SentenceTransformer
 
+from services.batching_encoder import BatchingEncoder
+from services.corpus_bundle import CorpusBundle
+from services.embedding_cache import EmbeddingCache
+from services.encoder_pool import RemoteEncoder
+from services.hybrid_scoring import KeywordMatrix, fuse_scores, rrf_scores, top_k_indices
+from services.index_snapshot import IndexSnapshot, SnapshotHolder, texts_fingerprint
+from services.prompt_service import PromptCorpus
+from services.rank_fusion import RankedStream, rrf_top_k, threshold_top_k
+from services.score_cache import ScoreCache, ScoreComponents
+from services.shared_embeddings import MmapFlatIndex, SharedEmbeddingStore
+from utils.config import (
+    DEFAULT_EMBEDDING_MODEL, KEYWORD_WEIGHT, VECTOR_WEIGHT, HYBRID_FUSION_MODE, HYBRID_FUSION_METHOD, RRF_K,
+    EMBEDDING_STORE_FILE, ENCODE_BATCHING_ENABLED, ENCODE_BATCH_MAX_SIZE, ENCODE_BATCH_MAX_WAIT_MS,
+    ENCODER_SOCKET, ENCODER_WORKERS, ENCODER_TIMEOUT_SECONDS, SHARED_INDEX_DIR
+)
+from utils.atomic_files import (
+    ArtifactError, MANIFEST_SUFFIX, file_lock, read_artifact, remove_artifact, write_artifact
+)
+from utils.cache_policy import CACHES
+from utils.metrics import REGISTRY
+from utils.tracing import span, traced
+
 logger = logging.getLogger(__name__)
 
+INDEX_LOOKUPS = REGISTRY.counter("index_cache_lookups", "Vector index requests by source", labels=("result",))
+ENCODE_CALLS = REGISTRY.counter("encoder_calls", "Calls into the embedding model", labels=("kind",))
+INDEX_SIZE = REGISTRY.gauge("vector_index_size", "Vectors in the most recently used index")
+RECOMMENDATIONS = REGISTRY.counter("recommendations", "Recommendation requests", labels=("mode",))
+FUSION_CANDIDATES = REGISTRY.histogram(
+    "fusion_candidates", "Ranked results pulled by threshold fusion", labels=("method",),
+    bounds=[8, 16, 32, 64, 128, 256, 512, 1024, 4096, 16384]
+)
+RECOMMENDATION_ERRORS = REGISTRY.counter("recommendation_errors", "Recommendation requests that failed", labels=("mode",))
+
+INDEX_CACHE_FORMAT = 2  # 1 was a bare pickle without a manifest
+
+
+def model_namespace(model_name: str) -> str:
+    """Filesystem-safe name for one model's cache files: a readable slug plus a short hash"""
+    slug = re.sub(r"[^A-Za-z0-9._-]+", "-", model_name.rsplit("/", 1)[-1]).strip("-.")[:40]
+    return f"{slug}-{hashlib.blake2b(model_name.encode('utf-8'), digest_size=4).hexdigest()}"
+
+
+def namespaced_path(path: Optional[str], model_name: str) -> Optional[str]:
+    """``path`` with the model's namespace before the extension (cache.pkl -> cache.<namespace>.pkl)"""
+    if not path:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.{model_namespace(model_name)}{ext}"
+
+
+def namespaced_glob(path: str) -> str:
+    """Glob matching ``path`` namespaced for any model"""
+    root, ext = os.path.splitext(path)
+    return f"{glob.escape(root)}.*{ext}"
+
 
 class RecommendationService:
-    """Service for generating prompt recommendations"""
+    """Service for generating prompt recommendations.
+
+    One instance is shared by every session. Searches read an immutable
+    ``IndexSnapshot``; when the prompts change, the snapshot is rebuilt on a
+    background thread and swapped in, while searches keep using the old one.
+    Cache files and the shared index directory are namespaced by model, so
+    services for different models never read each other's vectors.
+    Every cache follows its policy in ``CACHES``: "corpus" for the index
+    cache file, "embedding" for the per-text store, "query" for the
+    per-query score components.
+    """
     
     def __init__(
         self, 
-        model_name: str = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2",
-        cache_file: str = "embeddings_cache.pkl"
+        model_name: str = DEFAULT_EMBEDDING_MODEL,
+        cache_file: str = "embeddings_cache.pkl",
+        embedding_store_file: Optional[str] = EMBEDDING_STORE_FILE,
+        encoder_socket: str = ENCODER_SOCKET,
+        shared_index_dir: str = SHARED_INDEX_DIR
     ):
         self.model_name = model_name
-        self.cache_file = cache_file
+        self.cache_file = namespaced_path(cache_file, model_name)
+        self.embedding_store_file = namespaced_path(embedding_store_file, model_name)
+        self.encoder_socket = encoder_socket
         self.model = None
+        self._embedding_store = None
+        self._bundle: Optional[CorpusBundle] = None
+        self._bundle_fingerprint: Optional[str] = None
+        self._snapshots = SnapshotHolder(self._build_snapshot)
+        self._shared = (
+            SharedEmbeddingStore(os.path.join(shared_index_dir, model_namespace(model_name)))
+            if shared_index_dir else None
+        )
+        self._seen_shared_generation = 0
+        self._keyword_matrices: Dict[str, KeywordMatrix] = {}
+        self._keyword_lock = threading.Lock()
+        self._scores = ScoreCache(policy=CACHES.policy("query"), manager=CACHES)
+        self._index_policy = CACHES.policy("corpus")
+        if cache_file:
+            CACHES.register_files("corpus", namespaced_glob(cache_file), sidecars=(MANIFEST_SUFFIX,))
+        if embedding_store_file:
+            CACHES.register_files("embedding", namespaced_glob(embedding_store_file))
         self._category_keywords = {
             "프론트엔드": ["ui", "폼", "리액트", "react", "tailwind", "상태", "프론트"],
             "백엔드": ["api", "로그인", "fastapi", "서버", "rest", "인증"],
@@ -34,15 +125,66 @@ class RecommendationService:
         }
     
     def _load_model(self) -> SentenceTransformer:
-        """Load and cache the sentence transformer model"""
+        """Load and cache the sentence transformer model (query encodes are micro-batched).
+
+        With an encoder socket configured the model lives in the encoder
+        pool's worker processes instead and is called over the socket,
+        unless the pool serves another model.
+        """
         if self.model is None:
             try:
-                self.model = SentenceTransformer(self.model_name)
+                if self.encoder_socket:
+                    model = RemoteEncoder(
+                        self.encoder_socket, ENCODER_WORKERS, self.model_name, ENCODER_TIMEOUT_SECONDS,
+                        fallback=SentenceTransformer
+                    )
+                else:
+                    model = SentenceTransformer(self.model_name)
+                if ENCODE_BATCHING_ENABLED:
+                    model = BatchingEncoder(model, ENCODE_BATCH_MAX_SIZE, ENCODE_BATCH_MAX_WAIT_MS)
+                self.model = model
             except Exception as e:
                 logger.error(f"Failed to load embedding model: {e}")
                 raise
         return self.model
     
+    def _get_embedding_store(self) -> Optional[EmbeddingCache]:
+        """Per-text embedding store shared with the merge pipeline"""
+        if self._embedding_store is None and self.embedding_store_file:
+            policy = CACHES.policy("embedding")
+            if not policy.enabled:
+                return None
+            self._embedding_store = EmbeddingCache(self.embedding_store_file, self.model_name, policy)
+        return self._embedding_store
+    
+    def _encode_corpus(self, model: SentenceTransformer, texts: List[str]) -> np.ndarray:
+        """Encode prompt texts to L2-normalized float32 vectors, reusing stored embeddings"""
+        ENCODE_CALLS.labels(kind="corpus").inc()
+        store = self._get_embedding_store()
+        if store is None:
+            embeddings = model.encode(texts, convert_to_numpy=True).astype('float32')
+            faiss.normalize_L2(embeddings)
+            return embeddings
+        embeddings = store.encode(texts, model)
+        store.save()
+        return embeddings
+    
+    def use_bundle(self, bundle: CorpusBundle) -> bool:
+        """Serve vector search from a prebuilt corpus bundle while the prompts match it"""
+        if bundle.model_name != self.model_name:
+            logger.warning(f"Corpus bundle {bundle.version} was built with {bundle.model_name}; ignoring it")
+            return False
+        self._bundle = bundle
+        self._bundle_fingerprint = self._fingerprint(bundle.prompts)
+        self._snapshots.publish(bundle.prompts, self._bundle_fingerprint, bundle.index, bundle.embeddings)
+        logger.info(f"Using corpus bundle {bundle.version} ({len(bundle.prompts)} prompts)")
+        return True
+    
+    def _bundle_matches(self, prompts: List[Dict[str, Any]], fingerprint: Optional[str] = None) -> bool:
+        if self._bundle is None:
+            return False
+        return (fingerprint or self._fingerprint(prompts)) == self._bundle_fingerprint
+    
     def extract_tags(self, text: str) -> Dict[str, List[str]]:
         """Extract categories and keywords from user input"""
         if not text:
@@ -63,6 +205,7 @@ class RecommendationService:
             "keywords": sorted(set(matched_keywords))
         }
     
+    @traced("keyword_recommend")
     def keyword_recommend(
         self, 
         tags: Dict[str, List[str]], 
@@ -73,6 +216,7 @@ class RecommendationService:
         if not prompts or not tags:
             return []
         
+        RECOMMENDATIONS.labels(mode="keyword").inc()
         scored = []
         for prompt in prompts:
             score = 0
@@ -89,13 +233,112 @@ class RecommendationService:
         """Convert prompt to text for embedding"""
         return f"{prompt.get('title', '')} {prompt.get('prompt', '')} {' '.join(prompt.get('keywords', []))}"
     
+    def _fingerprint(self, prompts: List[Dict[str, Any]]) -> str:
+        """Digest of the prompt texts; memoized on a ``PromptCorpus``, so each corpus version is hashed once"""
+        fingerprint = getattr(prompts, "fingerprint", None)
+        if fingerprint is None:
+            fingerprint = texts_fingerprint(self._get_prompt_text(p) for p in prompts)
+            if isinstance(prompts, PromptCorpus):
+                prompts.fingerprint = fingerprint
+        return fingerprint
+    
+    def get_snapshot(self, prompts: List[Dict[str, Any]]) -> Optional[IndexSnapshot]:
+        """Index snapshot to search for ``prompts`` without waiting on rebuilds.
+
+        A stale snapshot is served while its replacement is built in the
+        background; only a cold start (nothing published yet) waits.
+        """
+        fingerprint = self._fingerprint(prompts)
+        self._check_shared_generation()
+        snapshot = self._snapshots.current
+        if self._snapshots.is_fresh(snapshot, fingerprint):
+            return snapshot
+        future = self._snapshots.request(prompts, fingerprint)
+        if snapshot is None:
+            return future.result()
+        return snapshot
+    
+    def prepare(self, prompts: List[Dict[str, Any]]) -> Future:
+        """Start building the snapshot for ``prompts`` in the background without waiting for it.
+
+        The future resolves to the newest snapshot (None if the build failed
+        and nothing was published before).
+        """
+        fingerprint = self._fingerprint(prompts)
+        snapshot = self._snapshots.current
+        if self._snapshots.is_fresh(snapshot, fingerprint):
+            future = Future()
+            future.set_result(snapshot)
+            return future
+        return self._snapshots.request(prompts, fingerprint)
+    
+    def wait_for_rebuild(self, timeout: Optional[float] = None) -> Optional[IndexSnapshot]:
+        """Block until a pending background rebuild has been published"""
+        return self._snapshots.wait(timeout)
+    
+    def _check_shared_generation(self) -> None:
+        """Mark the snapshot stale once when another process publishes a new shared generation"""
+        if self._shared is None:
+            return
+        generation = self._shared.current_generation()
+        if generation != self._seen_shared_generation:
+            self._seen_shared_generation = generation
+            self._snapshots.invalidate()
+    
+    def _build_snapshot(
+        self, prompts: List[Dict[str, Any]], fingerprint: str
+    ) -> Optional[Tuple[faiss.Index, np.ndarray]]:
+        if self._shared is not None:
+            built = self._build_shared_snapshot(prompts, fingerprint)
+        else:
+            with span("index.rebuild"):
+                index, embeddings = self._build_vector_index(prompts, fingerprint)
+            built = None if index is None else (index, embeddings)
+        if built is not None:
+            # Hybrid search needs this too; build it here rather than on the first request
+            self._store_keyword_matrix(fingerprint, prompts)
+        return built
+    
+    def _build_shared_snapshot(
+        self, prompts: List[Dict[str, Any]], fingerprint: str
+    ) -> Optional[Tuple[MmapFlatIndex, np.ndarray]]:
+        """Attach to the host-wide embedding matrix, publishing it first if nobody has"""
+        ids = [str(p.get("id", "")) for p in prompts]
+        shared = self._shared.attach()
+        if not (
+            shared is not None
+            and shared.fingerprint == fingerprint
+            and shared.model_name == self.model_name
+            and shared.ids.tolist() == ids
+        ):
+            with span("index.rebuild"):
+                index, embeddings = self._build_vector_index(prompts, fingerprint)
+            if index is None:
+                return None
+            generation = self._shared.publish(fingerprint, self.model_name, embeddings, ids)
+            shared = self._shared.attach(generation)
+            if shared is None:
+                return index, embeddings
+        self._seen_shared_generation = shared.generation
+        INDEX_SIZE.set(len(shared.embeddings))
+        logger.info(f"Attached shared embeddings generation {shared.generation}")
+        return MmapFlatIndex(shared.embeddings), shared.embeddings
+    
     def _build_vector_index(
         self, 
-        prompts: List[Dict[str, Any]]
+        prompts: List[Dict[str, Any]],
+        fingerprint: Optional[str] = None
     ) -> Tuple[Optional[faiss.Index], Optional[np.ndarray]]:
         """Build or load vector index for prompts"""
         if not prompts:
             return None, None
+        fingerprint = fingerprint or self._fingerprint(prompts)
+        
+        # A prebuilt bundle of exactly these prompts needs no corpus encoding
+        if self._bundle_matches(prompts, fingerprint):
+            INDEX_LOOKUPS.labels(result="bundle").inc()
+            INDEX_SIZE.set(self._bundle.index.ntotal)
+            return self._bundle.index, self._bundle.embeddings
         
         try:
             model = self._load_model()
@@ -104,43 +347,172 @@ class RecommendationService:
             return None, None
         
         # Check for cached embeddings
-        if os.path.exists(self.cache_file):
-            try:
-                with open(self.cache_file, 'rb') as f:
-                    cached_data = pickle.load(f)
-                    if len(cached_data.get('prompts', [])) == len(prompts):
-                        return cached_data['index'], cached_data['embeddings']
-            except Exception as e:
-                logger.error(f"Failed to load cache: {e}")
+        if self._index_policy.enabled and os.path.exists(self.cache_file):
+            cached = self._load_index_cache(fingerprint)
+            if cached is not None:
+                INDEX_LOOKUPS.labels(result="hit").inc()
+                INDEX_SIZE.set(cached[0].ntotal)
+                return cached
+        INDEX_LOOKUPS.labels(result="miss").inc()
         
         # Generate prompt texts
         prompt_texts = [self._get_prompt_text(prompt) for prompt in prompts]
         
-        # Generate embeddings
-        embeddings = model.encode(prompt_texts, convert_to_numpy=True)
+        # Generate normalized embeddings (only texts not seen before are encoded)
+        with span("index.encode_corpus"):
+            embeddings = self._encode_corpus(model, prompt_texts)
         
         # Create FAISS index
-        dimension = embeddings.shape[1]
-        index = faiss.IndexFlatIP(dimension)  # Inner Product (cosine similarity)
-        
-        # Normalize and add to index
-        faiss.normalize_L2(embeddings)
-        index.add(embeddings.astype('float32'))
+        with span("index.build"):
+            dimension = embeddings.shape[1]
+            index = faiss.IndexFlatIP(dimension)  # Inner Product (cosine similarity)
+            index.add(embeddings)
+        INDEX_SIZE.set(index.ntotal)
         
         # Save cache
+        self._save_index_cache(index, embeddings, prompts, fingerprint)
+        
+        return index, embeddings
+    
+    def _index_cache_manifest(self, fingerprint: str) -> Dict[str, Any]:
+        """Manifest fields a cached index must match to be used"""
+        return {"format": INDEX_CACHE_FORMAT, "model_name": self.model_name, "fingerprint": fingerprint}
+    
+    def _load_index_cache(self, fingerprint: str) -> Optional[Tuple[faiss.Index, np.ndarray]]:
+        """Cached index and embeddings for ``fingerprint``, verified against the cache manifest.
+        
+        Another model's or corpus's cache, or a truncated one, is rejected from
+        the manifest and file size without unpickling anything. A cache unused
+        for longer than the "corpus" TTL counts as missing.
+        """
+        try:
+            if self._index_policy.expired(os.path.getmtime(self.cache_file)):
+                raise ArtifactError("expired")
+            with span("index.cache_load"), file_lock(self.cache_file, shared=True):
+                manifest, payload = read_artifact(self.cache_file, self._index_cache_manifest(fingerprint))
+            cached_data = pickle.loads(payload)
+            index, embeddings = cached_data['index'], cached_data['embeddings']
+            if not (index.d == embeddings.shape[1] == manifest.get("dimension")
+                    and index.ntotal == len(embeddings) == manifest.get("count")):
+                raise ArtifactError("index does not match the manifest's dimension and count")
+            os.utime(self.cache_file)  # mtime = last use, for expiry and disk eviction
+            return index, embeddings
+        except ArtifactError as e:
+            logger.info(f"Index cache {self.cache_file} not used: {e}")
+        except Exception as e:
+            logger.error(f"Failed to load cache: {e}")
+        return None
+    
+    def _save_index_cache(
+        self, index: faiss.Index, embeddings: np.ndarray, prompts: List[Dict[str, Any]], fingerprint: str
+    ) -> None:
+        """Write the index cache and its manifest atomically, under the cache's inter-process lock"""
+        if not self._index_policy.enabled:
+            return
         try:
             cache_data = {
                 'index': index,
                 'embeddings': embeddings,
-                'prompts': prompts
+                'prompts': prompts,
+                'fingerprint': fingerprint
             }
-            with open(self.cache_file, 'wb') as f:
-                pickle.dump(cache_data, f)
+            with span("index.cache_save"):
+                payload = pickle.dumps(cache_data, protocol=pickle.HIGHEST_PROTOCOL)
+                with file_lock(self.cache_file):
+                    write_artifact(self.cache_file, payload, {
+                        **self._index_cache_manifest(fingerprint),
+                        "dimension": int(embeddings.shape[1]),
+                        "count": len(embeddings)
+                    })
+            CACHES.sweep_disk(protect=[self.cache_file, self.embedding_store_file])
         except Exception as e:
             logger.error(f"Failed to save cache: {e}")
+    
+    def _encode_query(self, model: SentenceTransformer, user_input: str) -> np.ndarray:
+        """L2-normalized float32 query embedding, shape (1, dim)"""
+        ENCODE_CALLS.labels(kind="query").inc()
+        with span("vector.encode_query"):
+            query_embedding = np.ascontiguousarray(model.encode([user_input], convert_to_numpy=True), dtype=np.float32)
+            faiss.normalize_L2(query_embedding)
+        return query_embedding
+    
+    def _keyword_matrix(self, fingerprint: str, prompts: List[Dict[str, Any]]) -> KeywordMatrix:
+        """Keyword matrix of ``prompts``, built once per corpus fingerprint"""
+        matrix = self._keyword_matrices.get(fingerprint)
+        if matrix is None:
+            matrix = self._store_keyword_matrix(fingerprint, prompts)
+        return matrix
+    
+    def _store_keyword_matrix(self, fingerprint: str, prompts: List[Dict[str, Any]]) -> KeywordMatrix:
+        with span("hybrid.keyword_matrix"):
+            matrix = KeywordMatrix(prompts)
+        with self._keyword_lock:
+            self._keyword_matrices[fingerprint] = matrix
+            # Keep the serving snapshot's matrix and the one being swapped in
+            while len(self._keyword_matrices) > 2:
+                del self._keyword_matrices[next(iter(self._keyword_matrices))]
+        return matrix
+    
+    def _score_components(
+        self, user_input: str, fingerprint: str, prompts: List[Dict[str, Any]]
+    ) -> ScoreComponents:
+        """Cached tags and keyword scores of ``user_input`` against the corpus version ``fingerprint``"""
+        components = self._scores.get(user_input, fingerprint)
+        if components is None:
+            tags = self.extract_tags(user_input)
+            with span("keyword.scores"):
+                keyword_scores = self._keyword_matrix(fingerprint, prompts).scores(tags)
+            components = self._scores.put(ScoreComponents(user_input, fingerprint, prompts, tags, keyword_scores))
+        return components
+    
+    def _vector_components(
+        self, user_input: str, snapshot: IndexSnapshot, similarities: bool = True
+    ) -> ScoreComponents:
+        """Score components against the snapshot's corpus, adding the query embedding and,
+        if asked, similarities to every prompt. Each query is encoded once per corpus version."""
+        components = self._score_components(user_input, snapshot.fingerprint, snapshot.prompts)
+        if components.query_embedding is None:
+            query_embedding = self._encode_query(self._load_model(), user_input)
+            components = self._scores.with_vectors(components, query_embedding)
+        if similarities and components.similarities is None:
+            with span("vector.search"):
+                scores = np.asarray(snapshot.embeddings @ components.query_embedding[0], dtype=np.float32)
+            components = self._scores.with_vectors(components, components.query_embedding, scores)
+        return components
+    
+    def recommend(
+        self,
+        user_input: str,
+        prompts: List[Dict[str, Any]],
+        mode: str = "hybrid",
+        top_k: int = 3,
+        keyword_weight: float = KEYWORD_WEIGHT,
+        vector_weight: float = VECTOR_WEIGHT
+    ) -> List[Dict[str, Any]]:
+        """Recommend in ``mode`` ("keyword", "vector" or "hybrid") from cached score components.
+
+        Repeating a query in another mode or with other weights re-fuses the
+        stored scores without another encode or corpus scan.
+        """
+        if mode == "keyword":
+            return self._keyword_recommend_cached(user_input, prompts, top_k)
+        if mode == "vector":
+            return self.vector_recommend(user_input, prompts, top_k)
+        return self.hybrid_recommend(user_input, prompts, top_k, keyword_weight, vector_weight)
+    
+    @traced("keyword_recommend.cached")
+    def _keyword_recommend_cached(
+        self, user_input: str, prompts: List[Dict[str, Any]], top_k: int
+    ) -> List[Dict[str, Any]]:
+        """``keyword_recommend`` of the query's tags, from the cached keyword scores"""
+        if not prompts or not user_input:
+            return []
         
-        return index, embeddings
+        RECOMMENDATIONS.labels(mode="keyword").inc()
+        components = self._score_components(user_input, self._fingerprint(prompts), prompts)
+        return [prompts[idx] for idx in components.keyword_candidates[:top_k]]
     
+    @traced("vector_recommend")
     def vector_recommend(
         self, 
         user_input: str, 
@@ -151,91 +523,161 @@ class RecommendationService:
         if not prompts or not user_input:
             return []
         
+        RECOMMENDATIONS.labels(mode="vector").inc()
         try:
-            model = self._load_model()
-            index, embeddings = self._build_vector_index(prompts)
+            self._load_model()
+            with span("vector.index"):
+                snapshot = self.get_snapshot(prompts)
             
-            if index is None or embeddings is None:
+            if snapshot is None:
                 logger.error("Failed to build vector index")
                 return []
             
-            # Convert user input to embedding
-            query_embedding = model.encode([user_input], convert_to_numpy=True)
-            faiss.normalize_L2(query_embedding)
-            
-            # Similarity search
-            scores, indices = index.search(query_embedding.astype('float32'), min(top_k, len(prompts)))
+            # Similarities to every prompt, cached per query and corpus version
+            similarities = self._vector_components(user_input, snapshot).similarities
             
-            # Return results
+            # Return results (from the snapshot's own prompts, which the ids refer to)
             results = []
-            for i, (score, idx) in enumerate(zip(scores[0], indices[0])):
-                if 0 <= idx < len(prompts):
-                    prompt = prompts[idx].copy()
-                    prompt['similarity_score'] = float(score)
-                    results.append(prompt)
+            for idx in top_k_indices(similarities, top_k):
+                prompt = snapshot.prompts[idx].copy()
+                prompt['similarity_score'] = float(similarities[idx])
+                results.append(prompt)
             
             return results
         except Exception as e:
             logger.error(f"Error in vector recommendation: {e}")
+            RECOMMENDATION_ERRORS.labels(mode="vector").inc()
             return []
     
+    @traced("hybrid_recommend")
     def hybrid_recommend(
         self, 
         user_input: str, 
         prompts: List[Dict[str, Any]], 
         top_k: int = 3,
-        keyword_weight: float = 0.4,
-        vector_weight: float = 0.6
+        keyword_weight: float = KEYWORD_WEIGHT,
+        vector_weight: float = VECTOR_WEIGHT,
+        fusion: str = HYBRID_FUSION_MODE,
+        method: str = HYBRID_FUSION_METHOD
     ) -> List[Dict[str, Any]]:
-        """Hybrid recommendation combining keyword and vector similarity"""
+        """Hybrid recommendation combining keyword and vector similarity.
+
+        ``fusion="full"`` scores both signals for the whole corpus in NumPy
+        (a sparse keyword product and one dense similarity product);
+        ``"threshold"`` pulls ranked candidates from both signals only until
+        the fused top-k is provably final. ``method`` is ``"weighted"`` (sum
+        of weighted scores) or ``"rrf"`` (weighted reciprocal-rank fusion).
+        Scores are cached per query, so once similarities for the query are
+        known (e.g. from vector mode) the full fusion is used either way.
+        """
         if not prompts or not user_input:
             return []
         
+        RECOMMENDATIONS.labels(mode="hybrid").inc()
         try:
-            # Keyword-based results
-            keyword_results = self.keyword_recommend(
-                self.extract_tags(user_input), 
-                prompts, 
-                top_k * 2
-            )
+            self._load_model()
+            with span("vector.index"):
+                snapshot = self.get_snapshot(prompts)
             
-            # Vector-based results
-            vector_results = self.vector_recommend(user_input, prompts, top_k * 2)
+            if snapshot is None:
+                logger.error("Failed to build vector index; using keyword results only")
+                return self.keyword_recommend(self.extract_tags(user_input), prompts, top_k)
             
-            # Combine results and remove duplicates
-            combined = {}
+            components = self._vector_components(user_input, snapshot, similarities=fusion != "threshold")
+            keyword_scores, similarities = components.keyword_scores, components.similarities
+            query_embedding = components.query_embedding
             
-            # Keyword results (weighted)
-            for i, item in enumerate(keyword_results):
-                item_id = item.get('id')
-                if item_id:
-                    score = (len(keyword_results) - i) * keyword_weight
-                    combined[item_id] = {'item': item, 'score': score}
-            
-            # Vector results (weighted)
-            for i, item in enumerate(vector_results):
-                item_id = item.get('id')
-                if item_id:
-                    vector_score = item.get('similarity_score', 0) * vector_weight
-                    
-                    if item_id in combined:
-                        combined[item_id]['score'] += vector_score
+            with span("hybrid.fusion"):
+                if similarities is None:
+                    ranked = self._threshold_fusion(
+                        snapshot, keyword_scores, query_embedding, top_k, keyword_weight, vector_weight, method
+                    )
+                else:
+                    if method == "rrf":
+                        fused = rrf_scores(keyword_scores, similarities, keyword_weight, vector_weight, RRF_K)
                     else:
-                        combined[item_id] = {'item': item, 'score': vector_score}
-            
-            # Sort by score
-            sorted_results = sorted(combined.values(), key=lambda x: x['score'], reverse=True)
+                        fused = fuse_scores(keyword_scores, similarities, keyword_weight, vector_weight)
+                    ranked = [(int(idx), float(fused[idx])) for idx in top_k_indices(fused, top_k)]
             
-            return [result['item'] for result in sorted_results[:top_k]]
+            results = []
+            for idx, score in ranked:
+                prompt = snapshot.prompts[idx].copy()
+                prompt['similarity_score'] = float(
+                    similarities[idx] if similarities is not None else snapshot.embeddings[idx] @ query_embedding[0]
+                )
+                prompt['hybrid_score'] = score
+                results.append(prompt)
+            return results
         except Exception as e:
             logger.error(f"Error in hybrid recommendation: {e}")
+            RECOMMENDATION_ERRORS.labels(mode="hybrid").inc()
             return []
     
+    def _threshold_fusion(
+        self,
+        snapshot: IndexSnapshot,
+        keyword_scores: np.ndarray,
+        query_embedding: np.ndarray,
+        top_k: int,
+        keyword_weight: float,
+        vector_weight: float,
+        method: str
+    ) -> List[Tuple[int, float]]:
+        """Early-terminating fusion over the keyword ranking and growing index searches"""
+        top_keyword = float(keyword_scores.max()) if len(keyword_scores) else 0.0
+        if top_keyword > 0:
+            keyword_scores = keyword_scores / top_keyword
+        
+        embeddings, query = snapshot.embeddings, query_embedding[0]
+        
+        def search(depth: int) -> Tuple[np.ndarray, np.ndarray]:
+            # Rank like full scoring: exact similarities, ties by position. The index breaks ties
+            # its own way, so a run of equal scores cut off by the depth waits for a deeper fetch.
+            fetch = depth
+            while True:
+                _, ids = snapshot.index.search(query_embedding, min(fetch + 1, snapshot.size))
+                ids = ids[0][ids[0] >= 0]
+                scores = np.asarray(embeddings[ids] @ query, dtype=np.float32)
+                order = np.lexsort((ids, -scores))
+                ids, scores = ids[order], scores[order]
+                if len(ids) <= fetch:
+                    return ids, scores
+                complete = scores > scores[-1]
+                if complete.sum() >= depth:
+                    return ids[complete], scores[complete]
+                fetch *= 2
+        
+        streams = [
+            RankedStream.from_scores(keyword_scores),
+            RankedStream(search, snapshot.size, first_depth=max(4 * top_k, 16), floor=-1.0)
+        ]
+        if method == "rrf":
+            ranked = rrf_top_k(streams, top_k, [keyword_weight, vector_weight], RRF_K)
+        else:
+            ranked = threshold_top_k(
+                streams, [keyword_weight, vector_weight],
+                [lambda doc: float(keyword_scores[doc]), lambda doc: float(embeddings[doc] @ query)],
+                top_k
+            )
+        FUSION_CANDIDATES.labels(method=method).observe(sum(stream.position for stream in streams))
+        return ranked
+    
+    def close(self) -> None:
+        """Stop the query micro-batcher and drop encoder pool connections (the service stays usable)"""
+        model = self.model
+        if isinstance(model, BatchingEncoder):
+            model.close()
+            model = model.model
+        if isinstance(model, RemoteEncoder):
+            model.close()
+    
     def invalidate_cache(self) -> None:
-        """Remove the embedding cache file"""
+        """Remove the embedding cache file; the next search schedules a rebuild"""
+        self._snapshots.invalidate()
+        self._scores.clear()
         try:
-            if os.path.exists(self.cache_file):
-                os.remove(self.cache_file)
-                logger.info("Cache invalidated")
+            with file_lock(self.cache_file):
+                if remove_artifact(self.cache_file):
+                    logger.info("Cache invalidated")
         except Exception as e:
             logger.warning(f"Failed to invalidate cache: {e}")
\ No newline at end of file
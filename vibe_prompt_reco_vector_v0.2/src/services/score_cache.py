@@ -0,0 +1,84 @@
+"""
+Per-query cache of raw score components, so switching modes or weights only re-fuses
+"""
+
+from dataclasses import dataclass, field, replace
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+from utils.cache_policy import CacheManager, CachePolicy, PolicyCache
+
+
+@dataclass(frozen=True)
+class ScoreComponents:
+    """Raw scores of one query against one corpus version, before any fusion.
+
+    ``keyword_scores`` and ``similarities`` hold one score per prompt of
+    ``prompts``; ``similarities`` and ``query_embedding`` stay None until a
+    vector or hybrid request needs them, so keyword-only queries never encode.
+    """
+    query: str
+    fingerprint: str
+    prompts: List[Dict[str, Any]] = field(repr=False)
+    tags: Dict[str, List[str]]
+    keyword_scores: np.ndarray = field(repr=False)
+    query_embedding: Optional[np.ndarray] = field(default=None, repr=False)
+    similarities: Optional[np.ndarray] = field(default=None, repr=False)
+
+    @property
+    def keyword_candidates(self) -> np.ndarray:
+        """Ids of prompts with a keyword hit, best first (ties in corpus order)"""
+        ids = np.flatnonzero(self.keyword_scores > 0)
+        return ids[np.argsort(-self.keyword_scores[ids], kind="stable")]
+
+    @property
+    def nbytes(self) -> int:
+        arrays = (self.keyword_scores, self.query_embedding, self.similarities)
+        return sum(a.nbytes for a in arrays if a is not None)
+
+
+class ScoreCache:
+    """LRU of ``ScoreComponents`` keyed by (query, corpus fingerprint), bounded by entries and bytes.
+
+    Entries are immutable; adding similarities to an entry replaces it.
+    The prompt list is shared with the index snapshot, not copied, so only
+    the score arrays count toward ``max_bytes``. A ``policy`` (the "query"
+    cache policy) replaces the two bounds and adds expiry and eviction order.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        max_bytes: int = 64 * 1024 * 1024,
+        policy: Optional[CachePolicy] = None,
+        manager: Optional[CacheManager] = None
+    ):
+        policy = policy or CachePolicy("query", max_entries=max_entries, max_memory_bytes=max_bytes)
+        self._cache = PolicyCache(policy, sizeof=lambda components: components.nbytes, manager=manager)
+
+    @property
+    def policy(self) -> CachePolicy:
+        return self._cache.policy
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    @property
+    def nbytes(self) -> int:
+        return self._cache.nbytes
+
+    def get(self, query: str, fingerprint: str) -> Optional[ScoreComponents]:
+        return self._cache.get((query, fingerprint))
+
+    def put(self, components: ScoreComponents) -> ScoreComponents:
+        return self._cache.put((components.query, components.fingerprint), components)
+
+    def with_vectors(
+        self, components: ScoreComponents, query_embedding: np.ndarray, similarities: Optional[np.ndarray] = None
+    ) -> ScoreComponents:
+        """Store ``components`` extended with the query embedding (and similarities, if computed)"""
+        return self.put(replace(components, query_embedding=query_embedding, similarities=similarities))
+
+    def clear(self) -> None:
+        self._cache.clear()
@@ -0,0 +1,137 @@
+"""
+Embedding matrix shared by every app process on a host through mmap'd files
+"""
+
+import json
+import logging
+import os
+import shutil
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from utils.atomic_files import atomic_write, file_lock
+
+logger = logging.getLogger(__name__)
+
+GENERATION_FILE = "GENERATION"
+LOCK_NAME = "publish"  # locked through publish.lock
+META_FILE = "meta.json"
+EMBEDDINGS_FILE = "embeddings.npy"
+IDS_FILE = "ids.npy"
+KEEP_GENERATIONS = 2  # the current one plus the one processes may still be searching
+
+
+class MmapFlatIndex:
+    """Exact inner-product search over a (possibly mmap'd) matrix; the faiss ``search`` interface.
+
+    Unlike ``faiss.IndexFlatIP`` it does not copy the vectors, so every
+    process searching the same file shares one copy in the page cache.
+    """
+
+    def __init__(self, vectors: np.ndarray):
+        self.vectors = vectors
+        self.ntotal, self.d = vectors.shape
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        scores = np.asarray(queries, dtype=np.float32) @ self.vectors.T
+        k = min(k, self.ntotal)
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+        return np.take_along_axis(top_scores, order, axis=1), np.take_along_axis(top, order, axis=1).astype(np.int64)
+
+
+@dataclass(frozen=True)
+class SharedGeneration:
+    """One published embedding matrix, attached read-only"""
+    generation: int
+    fingerprint: str
+    model_name: str
+    embeddings: np.ndarray = field(repr=False)
+    ids: np.ndarray = field(repr=False)
+
+
+class SharedEmbeddingStore:
+    """Generations of normalized embeddings plus prompt ids under one directory.
+
+    A publisher writes ``gen-<n>/`` under a temporary name, renames it into
+    place and then replaces the ``GENERATION`` pointer, so readers only ever
+    attach complete generations. Readers map the matrix with
+    ``np.load(mmap_mode="r")``; old generations are unlinked after a newer
+    one is published, which is safe for processes still mapping them.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _generation_dir(self, generation: int) -> str:
+        return os.path.join(self.directory, f"gen-{generation}")
+
+    def current_generation(self) -> int:
+        try:
+            with open(os.path.join(self.directory, GENERATION_FILE), "r", encoding="utf-8") as f:
+                return int(f.read().strip() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def attach(self, generation: Optional[int] = None) -> Optional[SharedGeneration]:
+        """Map the given (default: current) generation read-only, or None if there is none"""
+        generation = generation or self.current_generation()
+        if not generation:
+            return None
+        path = self._generation_dir(generation)
+        try:
+            with open(os.path.join(path, META_FILE), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            embeddings = np.load(os.path.join(path, EMBEDDINGS_FILE), mmap_mode="r")
+            ids = np.load(os.path.join(path, IDS_FILE), allow_pickle=False)
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to attach shared embeddings {path}: {e}")
+            return None
+        return SharedGeneration(generation, meta["fingerprint"], meta["model_name"], embeddings, ids)
+
+    def publish(self, fingerprint: str, model_name: str, embeddings: np.ndarray, ids: List[str]) -> int:
+        """Write a new generation and make it current; returns its number.
+
+        If another process already published the same fingerprint while we
+        waited for the lock, that generation is reused.
+        """
+        with file_lock(os.path.join(self.directory, LOCK_NAME)):
+            current = self.current_generation()
+            attached = self.attach(current) if current else None
+            if attached is not None and attached.fingerprint == fingerprint and attached.model_name == model_name:
+                return current
+            generation = current + 1
+            path = self._generation_dir(generation)
+            tmp_path = path + ".tmp"
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            os.makedirs(tmp_path)
+            np.save(os.path.join(tmp_path, EMBEDDINGS_FILE), np.ascontiguousarray(embeddings, dtype=np.float32))
+            np.save(os.path.join(tmp_path, IDS_FILE), np.array([str(i) for i in ids]))
+            with open(os.path.join(tmp_path, META_FILE), "w", encoding="utf-8") as f:
+                json.dump({
+                    "generation": generation,
+                    "fingerprint": fingerprint,
+                    "model_name": model_name,
+                    "count": len(embeddings)
+                }, f, indent=2, ensure_ascii=False)
+            shutil.rmtree(path, ignore_errors=True)
+            os.replace(tmp_path, path)
+            with atomic_write(os.path.join(self.directory, GENERATION_FILE), "w", encoding="utf-8") as f:
+                f.write(f"{generation}\n")
+            self.prune(generation)
+        logger.info(f"Published shared embeddings generation {generation} ({len(embeddings)} vectors)")
+        return generation
+
+    def prune(self, current: int, keep: int = KEEP_GENERATIONS) -> List[int]:
+        removed = []
+        for name in os.listdir(self.directory):
+            if name.startswith("gen-") and not name.endswith(".tmp"):
+                generation = int(name[4:])
+                if generation <= current - keep:
+                    shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+                    removed.append(generation)
+        return sorted(removed)
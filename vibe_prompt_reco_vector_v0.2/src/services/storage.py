@@ -0,0 +1,474 @@
+"""
+Storage backends for prompt data
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional
+
+from utils.config import PROMPTS_TABLE
+from utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+STORAGE_ERRORS = REGISTRY.counter("storage_errors", "Failed storage operations", labels=("backend", "operation"))
+
+PROMPT_COLUMNS = ["id", "title", "prompt", "category", "tool", "framework", "level", "keywords"]
+
+
+class StorageError(Exception):
+    """A strict read could not tell whether the rows exist"""
+
+
+class PromptStorage(ABC):
+    """CRUD contract shared by every prompt storage backend.
+
+    Single-row methods follow ``PromptService``: failures are logged and
+    reported as ``None``/``False``. Batch methods default to looping over
+    the single-row ones; backends override them when they can do better.
+    ``get_many(..., strict=True)`` raises ``StorageError`` instead, so a
+    failed read is never mistaken for missing rows.
+    """
+
+    name = "base"
+    # Whether PromptService may fall back to the bundled JSON file when
+    # this backend returns nothing (only makes sense for remote stores).
+    json_fallback = False
+
+    @abstractmethod
+    def load_all(self) -> List[Dict[str, Any]]:
+        """Return every prompt, oldest first"""
+
+    @abstractmethod
+    def insert(self, record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Store a new prompt and return it"""
+
+    @abstractmethod
+    def get(self, prompt_id: str) -> Optional[Dict[str, Any]]:
+        """Return one prompt by id"""
+
+    @abstractmethod
+    def update(self, prompt_id: str, updates: Dict[str, Any]) -> bool:
+        """Apply partial updates to one prompt"""
+
+    @abstractmethod
+    def delete(self, prompt_id: str) -> bool:
+        """Delete one prompt"""
+
+    def search(
+        self,
+        query: Optional[str] = None,
+        categories: Optional[List[str]] = None,
+        levels: Optional[List[str]] = None,
+        tools: Optional[List[str]] = None,
+        keywords: Optional[List[str]] = None
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Filter prompts inside the store; ``None`` means unsupported"""
+        return None
+
+    def get_many(self, prompt_ids: List[str], strict: bool = False) -> List[Dict[str, Any]]:
+        # get() cannot tell a failed read from a missing row; backends that can should override this
+        found = (self.get(prompt_id) for prompt_id in prompt_ids)
+        return [row for row in found if row]
+
+    def insert_many(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        stored = (self.insert(record) for record in records)
+        return [row for row in stored if row]
+
+    def update_many(self, updates: Dict[str, Dict[str, Any]]) -> Dict[str, bool]:
+        return {prompt_id: self.update(prompt_id, changes) for prompt_id, changes in updates.items()}
+
+    def delete_many(self, prompt_ids: List[str]) -> List[str]:
+        return [prompt_id for prompt_id in prompt_ids if self.delete(prompt_id)]
+
+
+class SupabaseStorage(PromptStorage):
+    """Prompts stored in a Supabase table"""
+
+    name = "supabase"
+    json_fallback = True
+
+    def __init__(self, url: Optional[str] = None, key: Optional[str] = None, table: str = PROMPTS_TABLE):
+        from supabase import create_client
+
+        url = url or os.getenv("SUPABASE_URL")
+        key = key or os.getenv("SUPABASE_KEY")
+        self.table = table
+        if not url or not key:
+            logger.error("SUPABASE_URL and SUPABASE_KEY 환경변수가 필요합니다.")
+            self.client = None
+        else:
+            self.client = create_client(url, key)
+
+    def load_all(self) -> List[Dict[str, Any]]:
+        if not self.client:
+            return []
+        try:
+            response = self.client.table(self.table).select("*").execute()
+            return response.data if isinstance(response.data, list) else []
+        except Exception as e:
+            logger.error(f"Supabase에서 프롬프트를 불러오는 중 오류 발생: {e}")
+            STORAGE_ERRORS.labels(backend=self.name, operation="load_all").inc()
+            return []
+
+    def insert(self, record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if not self.client:
+            return None
+        try:
+            result = self.client.table(self.table).insert(record).execute()
+            return record if result.data else None
+        except Exception as e:
+            logger.error(f"Supabase에 프롬프트 추가 중 오류 발생: {e}")
+            STORAGE_ERRORS.labels(backend=self.name, operation="insert").inc()
+            return None
+
+    def get(self, prompt_id: str) -> Optional[Dict[str, Any]]:
+        if not self.client:
+            return None
+        try:
+            response = self.client.table(self.table).select("*").eq("id", prompt_id).single().execute()
+            return response.data if response.data else None
+        except Exception as e:
+            logger.error(f"Supabase에서 프롬프트 단건 조회 오류: {e}")
+            STORAGE_ERRORS.labels(backend=self.name, operation="get").inc()
+            return None
+
+    def update(self, prompt_id: str, updates: Dict[str, Any]) -> bool:
+        if not self.client:
+            return False
+        try:
+            result = self.client.table(self.table).update(updates).eq("id", prompt_id).execute()
+            return bool(result.data)
+        except Exception as e:
+            logger.error(f"Supabase에서 프롬프트 수정 오류: {e}")
+            STORAGE_ERRORS.labels(backend=self.name, operation="update").inc()
+            return False
+
+    def delete(self, prompt_id: str) -> bool:
+        if not self.client:
+            return False
+        try:
+            result = self.client.table(self.table).delete().eq("id", prompt_id).execute()
+            return bool(result.data)
+        except Exception as e:
+            logger.error(f"Supabase에서 프롬프트 삭제 오류: {e}")
+            STORAGE_ERRORS.labels(backend=self.name, operation="delete").inc()
+            return False
+
+    # 배치 작업은 프로세스 공용 비동기 클라이언트로 묶어서 병렬 처리
+
+    def get_many(self, prompt_ids: List[str], strict: bool = False) -> List[Dict[str, Any]]:
+        from services.async_prompt_service import get_batch_client
+        if not self.client:
+            if strict:
+                raise StorageError("Supabase client is not configured")
+            return []
+        return get_batch_client().get_prompts_by_ids(prompt_ids, strict=strict)
+
+    def insert_many(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        from services.async_prompt_service import get_batch_client
+        return get_batch_client().add_prompts(records) if self.client else []
+
+    def update_many(self, updates: Dict[str, Dict[str, Any]]) -> Dict[str, bool]:
+        from services.async_prompt_service import get_batch_client
+        return get_batch_client().update_prompts(updates) if self.client else {}
+
+    def delete_many(self, prompt_ids: List[str]) -> List[str]:
+        from services.async_prompt_service import get_batch_client
+        return get_batch_client().delete_prompts(prompt_ids) if self.client else []
+
+
+class SQLiteStorage(PromptStorage):
+    """Prompts stored in a local SQLite database.
+
+    Runs in WAL mode so Streamlit sessions can read while another writes,
+    keeps B-tree indexes on the filter columns and mirrors title, prompt
+    and keywords into an FTS5 trigram table for substring search. An empty
+    database is seeded from ``seed_file`` (the bundled prompts.json).
+    """
+
+    name = "sqlite"
+
+    _SCHEMA = [
+        """
+        CREATE TABLE IF NOT EXISTS prompts (
+            id TEXT PRIMARY KEY,
+            title TEXT NOT NULL,
+            prompt TEXT NOT NULL,
+            category TEXT NOT NULL DEFAULT '',
+            tool TEXT NOT NULL DEFAULT '',
+            framework TEXT NOT NULL DEFAULT '',
+            level TEXT NOT NULL DEFAULT '',
+            keywords TEXT NOT NULL DEFAULT '[]',
+            created_at TEXT NOT NULL,
+            updated_at TEXT
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_prompts_category ON prompts(category)",
+        "CREATE INDEX IF NOT EXISTS idx_prompts_level ON prompts(level)",
+        "CREATE INDEX IF NOT EXISTS idx_prompts_tool ON prompts(tool)",
+        "CREATE INDEX IF NOT EXISTS idx_prompts_created_at ON prompts(created_at)",
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS prompts_fts USING fts5(
+            title, prompt, keywords,
+            content='prompts', content_rowid='rowid', tokenize='trigram'
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS prompts_ai AFTER INSERT ON prompts BEGIN
+            INSERT INTO prompts_fts(rowid, title, prompt, keywords)
+            VALUES (new.rowid, new.title, new.prompt, new.keywords);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS prompts_ad AFTER DELETE ON prompts BEGIN
+            INSERT INTO prompts_fts(prompts_fts, rowid, title, prompt, keywords)
+            VALUES ('delete', old.rowid, old.title, old.prompt, old.keywords);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS prompts_au AFTER UPDATE ON prompts BEGIN
+            INSERT INTO prompts_fts(prompts_fts, rowid, title, prompt, keywords)
+            VALUES ('delete', old.rowid, old.title, old.prompt, old.keywords);
+            INSERT INTO prompts_fts(rowid, title, prompt, keywords)
+            VALUES (new.rowid, new.title, new.prompt, new.keywords);
+        END
+        """,
+    ]
+
+    # The trigram tokenizer cannot match queries shorter than three characters
+    _MIN_FTS_QUERY = 3
+
+    def __init__(self, db_path: str, seed_file: Optional[str] = None):
+        self.db_path = db_path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            for statement in self._SCHEMA:
+                conn.execute(statement)
+        if seed_file and os.path.exists(seed_file) and self._count() == 0:
+            self._seed(seed_file)
+
+    def _connect(self) -> sqlite3.Connection:
+        """One connection per thread; sqlite3 connections are not shareable"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    def _count(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM prompts").fetchone()[0]
+
+    def _seed(self, seed_file: str) -> None:
+        try:
+            with open(seed_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                data = data.get("prompts", [])
+            # One bad or duplicate row would abort the whole batch insert
+            rows = list({row["id"]: row for row in data if row.get("id")}.values())
+            stored = self.insert_many(rows)
+            logger.info(f"Seeded SQLite store with {len(stored)} prompts from {seed_file}")
+        except Exception as e:
+            logger.error(f"SQLite 초기 데이터 적재 오류: {e}")
+            STORAGE_ERRORS.labels(backend=self.name, operation="seed").inc()
+
+    @staticmethod
+    def _now() -> str:
+        return datetime.now(timezone.utc).isoformat()
+
+    @staticmethod
+    def _to_row(record: Dict[str, Any], created_at: str) -> tuple:
+        return (
+            record["id"],
+            record.get("title", ""),
+            record.get("prompt", ""),
+            record.get("category") or "",
+            record.get("tool") or "",
+            record.get("framework") or "",
+            record.get("level") or "",
+            json.dumps(record.get("keywords") or [], ensure_ascii=False),
+            record.get("created_at") or created_at,
+            record.get("updated_at"),
+        )
+
+    @staticmethod
+    def _from_row(row: sqlite3.Row) -> Dict[str, Any]:
+        record = {column: row[column] for column in PROMPT_COLUMNS}
+        record["keywords"] = json.loads(row["keywords"])
+        record["created_at"] = row["created_at"]
+        record["updated_at"] = row["updated_at"]
+        return record
+
+    _INSERT = (
+        "INSERT INTO prompts (id, title, prompt, category, tool, framework, level, keywords, created_at, updated_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+    )
+    _ORDER = " ORDER BY created_at, rowid"
+
+    def load_all(self) -> List[Dict[str, Any]]:
+        try:
+            rows = self._connect().execute("SELECT * FROM prompts" + self._ORDER).fetchall()
+            return [self._from_row(row) for row in rows]
+        except sqlite3.Error as e:
+            logger.error(f"SQLite에서 프롬프트를 불러오는 중 오류 발생: {e}")
+            STORAGE_ERRORS.labels(backend=self.name, operation="load_all").inc()
+            return []
+
+    def insert(self, record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        stored = self.insert_many([record])
+        return stored[0] if stored else None
+
+    def insert_many(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if not records:
+            return []
+        now = self._now()
+        rows = [self._to_row(record, now) for record in records]
+        try:
+            with self._connect() as conn:
+                conn.executemany(self._INSERT, rows)
+        except sqlite3.Error as e:
+            logger.error(f"SQLite에 프롬프트 추가 중 오류 발생: {e}")
+            STORAGE_ERRORS.labels(backend=self.name, operation="insert_many").inc()
+            return []
+        return [dict(record, created_at=row[8]) for record, row in zip(records, rows)]
+
+    def get(self, prompt_id: str) -> Optional[Dict[str, Any]]:
+        rows = self.get_many([prompt_id])
+        return rows[0] if rows else None
+
+    def get_many(self, prompt_ids: List[str], strict: bool = False) -> List[Dict[str, Any]]:
+        if not prompt_ids:
+            return []
+        by_id = {}
+        try:
+            conn = self._connect()
+            # Stay well under SQLite's bound-parameter limit
+            for start in range(0, len(prompt_ids), 500):
+                chunk = prompt_ids[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                for row in conn.execute(f"SELECT * FROM prompts WHERE id IN ({placeholders})", chunk):
+                    by_id[row["id"]] = self._from_row(row)
+        except sqlite3.Error as e:
+            logger.error(f"SQLite에서 프롬프트 조회 오류: {e}")
+            STORAGE_ERRORS.labels(backend=self.name, operation="get_many").inc()
+            if strict:
+                raise StorageError(str(e)) from e
+        return [by_id[i] for i in prompt_ids if i in by_id]
+
+    def update(self, prompt_id: str, updates: Dict[str, Any]) -> bool:
+        return self.update_many({prompt_id: updates}).get(prompt_id, False)
+
+    def update_many(self, updates: Dict[str, Dict[str, Any]]) -> Dict[str, bool]:
+        results = {}
+        now = self._now()
+        try:
+            with self._connect() as conn:
+                for prompt_id, changes in updates.items():
+                    columns = [c for c in changes if c in PROMPT_COLUMNS and c != "id"]
+                    if not columns:
+                        results[prompt_id] = False
+                        continue
+                    values = [
+                        json.dumps(changes[c] or [], ensure_ascii=False) if c == "keywords" else changes[c]
+                        for c in columns
+                    ]
+                    assignments = ", ".join(f"{c} = ?" for c in columns)
+                    cursor = conn.execute(
+                        f"UPDATE prompts SET {assignments}, updated_at = ? WHERE id = ?",
+                        values + [now, prompt_id]
+                    )
+                    results[prompt_id] = cursor.rowcount > 0
+        except sqlite3.Error as e:
+            logger.error(f"SQLite에서 프롬프트 수정 오류: {e}")
+            STORAGE_ERRORS.labels(backend=self.name, operation="update_many").inc()
+            return {prompt_id: False for prompt_id in updates}
+        return results
+
+    def delete(self, prompt_id: str) -> bool:
+        return prompt_id in self.delete_many([prompt_id])
+
+    def delete_many(self, prompt_ids: List[str]) -> List[str]:
+        if not prompt_ids:
+            return []
+        existing = [row["id"] for row in self.get_many(prompt_ids)]
+        try:
+            with self._connect() as conn:
+                conn.executemany("DELETE FROM prompts WHERE id = ?", [(i,) for i in existing])
+        except sqlite3.Error as e:
+            logger.error(f"SQLite에서 프롬프트 삭제 오류: {e}")
+            STORAGE_ERRORS.labels(backend=self.name, operation="delete_many").inc()
+            return []
+        return existing
+
+    def search(
+        self,
+        query: Optional[str] = None,
+        categories: Optional[List[str]] = None,
+        levels: Optional[List[str]] = None,
+        tools: Optional[List[str]] = None,
+        keywords: Optional[List[str]] = None
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Same semantics as ``utils.helpers.filter_prompts``, evaluated in SQLite.
+
+        ``query`` is a case-insensitive substring match on title, prompt
+        and keywords. ``keywords`` matches prompts carrying any of the
+        given keywords exactly.
+        """
+        clauses, params = [], []
+        for column, values in (("category", categories), ("level", levels), ("tool", tools)):
+            if values:
+                clauses.append(f"{column} IN ({','.join('?' * len(values))})")
+                params.extend(values)
+        if keywords:
+            clauses.append(
+                f"EXISTS (SELECT 1 FROM json_each(prompts.keywords) WHERE value IN ({','.join('?' * len(keywords))}))"
+            )
+            params.extend(keywords)
+        if query:
+            if len(query) >= self._MIN_FTS_QUERY:
+                phrase = '"' + query.replace('"', '""') + '"'
+                clauses.append("rowid IN (SELECT rowid FROM prompts_fts WHERE prompts_fts MATCH ?)")
+                params.append(phrase)
+            else:
+                pattern = "%" + query.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+                clauses.append(
+                    "(lower(title) LIKE ? ESCAPE '\\' OR lower(prompt) LIKE ? ESCAPE '\\' "
+                    "OR lower(keywords) LIKE ? ESCAPE '\\')"
+                )
+                params.extend([pattern] * 3)
+
+        sql = "SELECT * FROM prompts"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        try:
+            rows = self._connect().execute(sql + self._ORDER, params).fetchall()
+            return [self._from_row(row) for row in rows]
+        except sqlite3.Error as e:
+            logger.error(f"SQLite 검색 오류: {e}")
+            STORAGE_ERRORS.labels(backend=self.name, operation="search").inc()
+            return None
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+def create_storage(backend: str, sqlite_path: Optional[str] = None, seed_file: Optional[str] = None) -> PromptStorage:
+    """Instantiate the configured storage backend"""
+    if backend == "sqlite":
+        return SQLiteStorage(sqlite_path, seed_file=seed_file)
+    if backend == "supabase":
+        return SupabaseStorage()
+    raise ValueError(f"Unknown storage backend: {backend}")
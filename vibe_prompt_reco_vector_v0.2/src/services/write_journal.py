@@ -0,0 +1,280 @@
+"""
+Write-behind journal for prompt writes
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import List, Dict, Any, Optional, Tuple
+
+from services.storage import PromptStorage
+from utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_PENDING = REGISTRY.gauge("write_journal_pending", "Journaled writes not yet flushed upstream")
+JOURNAL_FLUSH_FAILURES = REGISTRY.counter("write_journal_flush_failures", "Flushes that left writes for retry")
+
+INSERT = "insert"
+UPDATE = "update"
+DELETE = "delete"
+# delete followed by insert of the same id: sent upstream as both
+REPLACE = "replace"
+
+
+def coalesce(entries: List[Dict[str, Any]]) -> Dict[str, Tuple[str, Optional[Dict[str, Any]]]]:
+    """Collapse journal entries into one pending operation per prompt id.
+
+    insert + update -> insert with the update merged in
+    update + update -> one merged update
+    insert + delete -> delete (the insert may have landed before a crash;
+                      deleting a row that is not there counts as done)
+    update + delete -> delete
+    """
+    state: Dict[str, Tuple[str, Optional[Dict[str, Any]]]] = {}
+    for entry in entries:
+        prompt_id, op, data = entry["id"], entry["op"], entry.get("data")
+        current = state.get(prompt_id)
+        if op == INSERT:
+            kind = REPLACE if current and current[0] == DELETE else INSERT
+            state[prompt_id] = (kind, dict(data))
+        elif op == UPDATE:
+            if current is None:
+                state[prompt_id] = (UPDATE, dict(data))
+            elif current[0] != DELETE:
+                state[prompt_id] = (current[0], {**current[1], **data})
+        elif op == DELETE:
+            state[prompt_id] = (DELETE, None)
+    return state
+
+
+class WriteJournal:
+    """Durable, append-only journal in front of a ``PromptStorage``.
+
+    A write is acknowledged once its journal line is fsynced to local disk.
+    A background thread coalesces pending entries per id and sends them
+    upstream in batches; entries that fail stay in the journal and are
+    retried with backoff. On start-up any entries left over from a previous
+    process are replayed. Unacknowledged writes are checked against the
+    store, so replaying an entry that already landed is harmless; an insert
+    that already landed is re-sent as an update.
+
+    Each process needs its own journal file.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        storage: PromptStorage,
+        batch_size: int = 200,
+        flush_interval: float = 1.0,
+        max_backoff: float = 60.0,
+        start: bool = True
+    ):
+        self.path = path
+        self.storage = storage
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_backoff = max_backoff
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._pending: List[Dict[str, Any]] = self._replay()
+        self._seq = max((e["seq"] for e in self._pending), default=0)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._thread: Optional[threading.Thread] = None
+        if self._pending:
+            logger.info(f"Replaying {len(self._pending)} journaled writes from {self.path}")
+        if start:
+            self.start()
+
+    def _replay(self) -> List[Dict[str, Any]]:
+        if not os.path.exists(self.path):
+            return []
+        entries = []
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # A crash mid-append can leave a torn final line; it was never acknowledged.
+                    logger.warning(f"Skipping unreadable journal line {line_no} in {self.path}")
+        return entries
+
+    @property
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def append(self, op: str, prompt_id: str, data: Optional[Dict[str, Any]] = None) -> None:
+        """Durably record a write; returns once it is on local disk"""
+        self.append_many([(op, prompt_id, data)])
+
+    def append_many(self, writes: List[Tuple[str, str, Optional[Dict[str, Any]]]]) -> None:
+        """Record several ``(op, id, data)`` writes with a single fsync"""
+        if not writes:
+            return
+        with self._lock:
+            now = time.time()
+            entries = []
+            for op, prompt_id, data in writes:
+                self._seq += 1
+                entries.append({"seq": self._seq, "op": op, "id": prompt_id, "data": data, "ts": now})
+            self._file.write("".join(json.dumps(e, ensure_ascii=False) + "\n" for e in entries))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._pending.extend(entries)
+            JOURNAL_PENDING.set(len(self._pending))
+        self._wakeup.set()
+
+    def pending_state(self) -> Dict[str, Tuple[str, Optional[Dict[str, Any]]]]:
+        with self._lock:
+            return coalesce(self._pending)
+
+    def overlay(self, prompts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Apply not-yet-flushed writes to rows read from the store (read-your-writes)"""
+        state = self.pending_state()
+        if not state:
+            return prompts
+        merged = []
+        for prompt in prompts:
+            pending = state.get(prompt.get("id"))
+            if pending is None:
+                merged.append(prompt)
+            elif pending[0] == UPDATE:
+                merged.append({**prompt, **pending[1]})
+            elif pending[0] in (INSERT, REPLACE):
+                # the journaled row is newer than what the store returned
+                merged.append(pending[1])
+        known = {p.get("id") for p in prompts}
+        merged.extend(
+            data for prompt_id, (kind, data) in state.items()
+            if kind in (INSERT, REPLACE) and prompt_id not in known
+        )
+        return merged
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="prompt-write-behind", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        backoff = self.flush_interval
+        while not self._stopped.is_set():
+            self._wakeup.wait(backoff)
+            self._wakeup.clear()
+            if self._stopped.is_set():
+                break
+            if self.flush():
+                backoff = self.flush_interval
+            else:
+                backoff = min(self.max_backoff, backoff * 2)
+
+    def flush(self) -> bool:
+        """Send pending writes upstream; returns False if any had to be kept for retry"""
+        with self._flush_lock:
+            with self._lock:
+                snapshot = list(self._pending)
+            if not snapshot:
+                return True
+
+            failed_ids = self._send(coalesce(snapshot))
+            flushed_seqs = {e["seq"] for e in snapshot if e["id"] not in failed_ids}
+
+            with self._lock:
+                self._pending = [e for e in self._pending if e["seq"] not in flushed_seqs]
+                self._compact()
+                JOURNAL_PENDING.set(len(self._pending))
+            if failed_ids:
+                JOURNAL_FLUSH_FAILURES.inc()
+                logger.warning(f"{len(failed_ids)} journaled writes could not be flushed; will retry")
+            return not failed_ids
+
+    def _send(self, state: Dict[str, Tuple[str, Optional[Dict[str, Any]]]]) -> set:
+        """Apply coalesced operations in batches; returns ids that must be retried.
+
+        Whether a write that was not acknowledged landed anyway is decided by
+        a strict read; when that read fails too, the write is kept for retry.
+        """
+        deletes = [i for i, (kind, _) in state.items() if kind in (DELETE, REPLACE)]
+        inserts = [data for kind, data in state.values() if kind in (INSERT, REPLACE)]
+        updates = {i: data for i, (kind, data) in state.items() if kind == UPDATE}
+        failed = set()
+
+        for start in range(0, len(deletes), self.batch_size):
+            chunk = deletes[start:start + self.batch_size]
+            try:
+                done = set(self.storage.delete_many(chunk))
+                missing = [i for i in chunk if i not in done]
+                # Already gone upstream (e.g. flushed before a crash) counts as done
+                still_there = {row["id"] for row in self.storage.get_many(missing, strict=True)} if missing else set()
+                failed.update(still_there)
+            except Exception as e:
+                logger.error(f"Write-behind delete batch failed: {e}")
+                failed.update(chunk)
+
+        inserts = [row for row in inserts if row["id"] not in failed]
+        for start in range(0, len(inserts), self.batch_size):
+            chunk = inserts[start:start + self.batch_size]
+            try:
+                done = {row["id"] for row in self.storage.insert_many(chunk)}
+                missing = [row["id"] for row in chunk if row["id"] not in done]
+                # A batch insert is all-or-nothing; fall back to rows one by one
+                for row in chunk:
+                    if row["id"] in missing and self.storage.insert(row):
+                        missing.remove(row["id"])
+                present = {row["id"] for row in self.storage.get_many(missing, strict=True)} if missing else set()
+                failed.update(set(missing) - present)
+                # The insert landed before a crash; updates merged into it since then have not
+                for prompt_id in present:
+                    updates[prompt_id] = next(row for row in chunk if row["id"] == prompt_id)
+            except Exception as e:
+                logger.error(f"Write-behind insert batch failed: {e}")
+                failed.update(row["id"] for row in chunk)
+
+        update_ids = list(updates)
+        for start in range(0, len(update_ids), self.batch_size):
+            chunk = {i: updates[i] for i in update_ids[start:start + self.batch_size]}
+            try:
+                results = self.storage.update_many(chunk)
+                not_applied = [i for i in chunk if not results.get(i)]
+                # An update for a row that no longer exists upstream can never succeed
+                present = (
+                    {row["id"] for row in self.storage.get_many(not_applied, strict=True)} if not_applied else set()
+                )
+                for prompt_id in set(not_applied) - present:
+                    logger.warning(f"Dropping journaled update for missing prompt {prompt_id}")
+                failed.update(present)
+            except Exception as e:
+                logger.error(f"Write-behind update batch failed: {e}")
+                failed.update(chunk)
+        return failed
+
+    def _compact(self) -> None:
+        """Rewrite the journal with only the pending entries (caller holds ``_lock``)"""
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for entry in self._pending:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._file.close()
+        os.replace(tmp_path, self.path)
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def close(self, flush: bool = True) -> None:
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if flush:
+            self.flush()
+        with self._lock:
+            self._file.close()
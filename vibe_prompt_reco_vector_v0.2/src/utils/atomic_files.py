@@ -0,0 +1,146 @@
+"""
+Crash-safe cache artifacts: atomic fsync'd writes, inter-process locks and verifying manifests
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, IO, Iterator, Optional, Tuple
+
+try:
+    import fcntl
+    msvcrt = None
+except ImportError:  # Windows
+    fcntl = None
+    try:
+        import msvcrt
+    except ImportError:
+        msvcrt = None
+
+MANIFEST_SUFFIX = ".manifest.json"
+LOCK_SUFFIX = ".lock"
+
+
+class ArtifactError(Exception):
+    """A cache artifact is missing, belongs to something else, or is corrupt"""
+
+
+@contextmanager
+def file_lock(path: str, shared: bool = False) -> Iterator[None]:
+    """Hold an inter-process lock on ``path`` (through ``path + ".lock"``, which is never deleted).
+
+    Uses ``flock``; on Windows ``msvcrt.locking``, where every lock is
+    exclusive. Without either the block runs unlocked.
+    """
+    with open(path + LOCK_SUFFIX, "a+b") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        elif msvcrt is not None:
+            lock_file.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:  # LK_LOCK gives up after ~10 seconds; keep waiting
+                    time.sleep(0.1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _fsync_directory(directory: str) -> None:
+    """Make a rename in ``directory`` durable (not possible, nor needed, on Windows)"""
+    if os.name != "posix":
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def atomic_write(path: str, mode: str = "wb", encoding: Optional[str] = None) -> Iterator[IO]:
+    """Write ``path`` through a temp file in the same directory that is fsync'd and renamed over it.
+
+    Readers see the old file or the complete new one, never a partial
+    write; if the block raises, ``path`` is left untouched.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, mode, encoding=encoding) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    _fsync_directory(directory)
+
+
+def read_manifest(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path + MANIFEST_SUFFIX, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def write_artifact(path: str, payload: bytes, manifest: Dict[str, Any]) -> Dict[str, Any]:
+    """Atomically write ``payload`` and then its manifest (with size and sha256); returns the manifest.
+
+    Hold ``file_lock(path)`` around this so readers never pair a new
+    payload with the previous manifest.
+    """
+    manifest = {**manifest, "size": len(payload), "sha256": hashlib.sha256(payload).hexdigest()}
+    with atomic_write(path) as f:
+        f.write(payload)
+    with atomic_write(path + MANIFEST_SUFFIX, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    return manifest
+
+
+def read_artifact(path: str, expected: Dict[str, Any]) -> Tuple[Dict[str, Any], bytes]:
+    """Manifest and payload of ``path`` if the manifest matches ``expected`` and the bytes match it.
+
+    Mismatches and truncation are caught from the manifest and the file
+    size before the payload is read; the checksum is checked on the bytes
+    read. Raises ``ArtifactError`` with the reason otherwise.
+    """
+    manifest = read_manifest(path)
+    if manifest is None:
+        raise ArtifactError("no manifest")
+    for key, value in expected.items():
+        if manifest.get(key) != value:
+            raise ArtifactError(f"{key} is {manifest.get(key)!r}, expected {value!r}")
+    try:
+        size = os.path.getsize(path)
+    except FileNotFoundError:
+        raise ArtifactError("payload missing")
+    if size != manifest.get("size"):
+        raise ArtifactError(f"payload is {size} bytes, manifest says {manifest.get('size')}")
+    with open(path, "rb") as f:
+        payload = f.read()
+    if hashlib.sha256(payload).hexdigest() != manifest.get("sha256"):
+        raise ArtifactError("checksum mismatch")
+    return manifest, payload
+
+
+def remove_artifact(path: str) -> bool:
+    """Delete ``path`` and its manifest; returns whether the payload existed"""
+    existed = os.path.exists(path)
+    for name in (path, path + MANIFEST_SUFFIX):
+        if os.path.exists(name):
+            os.remove(name)
+    return existed
@@ -0,0 +1,336 @@
+"""
+Cache policies: enable switches, TTL expiry, LRU/LFU eviction and memory/disk budgets
+"""
+
+import glob
+import logging
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Dict, Any, Callable, Hashable, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils.config import CACHE_ENABLED, CACHE_EXPIRY_DAYS, CACHE_MAX_MEMORY_MB, CACHE_MAX_DISK_MB, CACHE_POLICIES
+from utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+CACHE_LOOKUPS = REGISTRY.counter("cache_lookups", "Cache lookups", labels=("cache", "result"))
+CACHE_EVICTIONS = REGISTRY.counter("cache_evictions", "Cache entries and files evicted", labels=("cache", "reason"))
+CACHE_ENTRIES = REGISTRY.gauge("cache_entries", "Entries held in memory", labels=("cache",))
+CACHE_BYTES = REGISTRY.gauge("cache_bytes", "Bytes held", labels=("cache", "medium"))
+
+MB = 1024 * 1024
+DAY = 24 * 3600
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """Limits of one cache; None means unbounded (or, for ``ttl_seconds``, never expiring)"""
+    name: str
+    enabled: bool = True
+    ttl_seconds: Optional[float] = None
+    max_entries: Optional[int] = None
+    max_memory_bytes: Optional[int] = None
+    max_disk_bytes: Optional[int] = None
+    eviction: str = "lru"  # "lru" (least recently used first) or "lfu" (fewest hits first)
+
+    def expired(self, last_used: float, now: Optional[float] = None) -> bool:
+        return self.ttl_seconds is not None and (now or time.time()) - last_used > self.ttl_seconds
+
+    def over_budget(self, entries: int, memory_bytes: int) -> bool:
+        return (
+            (self.max_entries is not None and entries > self.max_entries)
+            or (self.max_memory_bytes is not None and memory_bytes > self.max_memory_bytes)
+        )
+
+    def eviction_order(self, last_used: Sequence[float], hits: Sequence[int]) -> np.ndarray:
+        """Positions of entries in the order they should be evicted"""
+        last_used = np.asarray(last_used, dtype=np.float64)
+        if self.eviction == "lfu":
+            return np.lexsort((last_used, np.asarray(hits)))
+        return np.argsort(last_used, kind="stable")
+
+
+class _Entry:
+    __slots__ = ("value", "size", "last_used", "hits")
+
+    def __init__(self, value: Any, size: int, last_used: float, hits: int):
+        self.value = value
+        self.size = size
+        self.last_used = last_used
+        self.hits = hits
+
+
+class PolicyCache:
+    """Thread-safe in-memory map enforcing a ``CachePolicy``.
+
+    Expired entries are dropped when read; entries over the entry or byte
+    budget are evicted LRU or LFU on every ``put``, and the manager's global
+    memory budget is enforced across all its caches afterwards.
+    """
+
+    def __init__(
+        self,
+        policy: CachePolicy,
+        sizeof: Callable[[Any], int] = lambda value: 0,
+        manager: Optional["CacheManager"] = None
+    ):
+        self.policy = policy
+        self._sizeof = sizeof
+        self._manager = manager
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()  # least recently used first
+        self._bytes = 0
+        self._lock = threading.RLock()
+        if manager is not None:
+            manager.register(self)
+
+    @property
+    def name(self) -> str:
+        return self.policy.name
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def get(self, key: Hashable) -> Any:
+        if not self.policy.enabled:
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.policy.expired(entry.last_used, now):
+                self._remove(key, "expired")
+                entry = None
+            if entry is not None:
+                entry.last_used = now
+                entry.hits += 1
+                self._entries.move_to_end(key)
+        CACHE_LOOKUPS.labels(cache=self.name, result="miss" if entry is None else "hit").inc()
+        return None if entry is None else entry.value
+
+    def put(self, key: Hashable, value: Any) -> Any:
+        """Store ``value`` (replacing ``key``'s entry but keeping its hit count); returns ``value``"""
+        if not self.policy.enabled:
+            return value
+        size = self._sizeof(value)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.size
+            if not self.policy.over_budget(1, size):
+                self._entries[key] = _Entry(value, size, time.time(), previous.hits if previous else 0)
+                self._bytes += size
+            while self._entries and self.policy.over_budget(len(self._entries), self._bytes):
+                self.evict_one("capacity", keep=key)
+            self._publish_stats()
+        if self._manager is not None:
+            self._manager.enforce_memory()
+        return value
+
+    def victim(self, keep: Optional[Hashable] = None) -> Optional[Tuple[Hashable, float]]:
+        """Key this cache would evict next and when it was last used.
+
+        ``keep`` (the entry just stored, which LFU would otherwise always pick)
+        is only chosen when it is the last entry left.
+        """
+        with self._lock:
+            if not self._entries:
+                return None
+            if self.policy.eviction == "lfu":
+                candidates = [k for k in self._entries if k != keep] or [keep]
+                key = min(candidates, key=lambda k: (self._entries[k].hits, self._entries[k].last_used))
+            else:
+                key = next((k for k in self._entries if k != keep), keep)
+            return key, self._entries[key].last_used
+
+    def evict_one(self, reason: str, keep: Optional[Hashable] = None) -> bool:
+        with self._lock:
+            victim = self.victim(keep)
+            if victim is None:
+                return False
+            self._remove(victim[0], reason)
+            self._publish_stats()
+            return True
+
+    def expire(self) -> int:
+        """Drop every expired entry; returns how many"""
+        now = time.time()
+        with self._lock:
+            expired = [k for k, e in self._entries.items() if self.policy.expired(e.last_used, now)]
+            for key in expired:
+                self._remove(key, "expired")
+            self._publish_stats()
+        return len(expired)
+
+    def _remove(self, key: Hashable, reason: str) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        CACHE_EVICTIONS.labels(cache=self.name, reason=reason).inc()
+
+    def _publish_stats(self) -> None:
+        CACHE_ENTRIES.labels(cache=self.name).set(len(self._entries))
+        CACHE_BYTES.labels(cache=self.name, medium="memory").set(self._bytes)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._publish_stats()
+
+
+@dataclass
+class _FileGroup:
+    cache: str
+    pattern: str
+    sidecars: Tuple[str, ...]
+
+
+class CacheManager:
+    """Policies of the named caches and the budgets they share.
+
+    ``policy(name)`` combines the global switch and expiry with the
+    per-cache overrides in ``CACHE_POLICIES``. In-memory caches created
+    through ``memory_cache`` (or registered) share ``max_memory_bytes``;
+    cache files registered with ``register_files`` share ``max_disk_bytes``
+    and are swept by ``sweep_disk``.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = CACHE_ENABLED,
+        ttl_days: float = CACHE_EXPIRY_DAYS,
+        max_memory_bytes: Optional[int] = CACHE_MAX_MEMORY_MB * MB,
+        max_disk_bytes: Optional[int] = CACHE_MAX_DISK_MB * MB,
+        policies: Optional[Dict[str, Dict[str, Any]]] = None
+    ):
+        self.enabled = enabled
+        self.ttl_seconds = ttl_days * DAY if ttl_days else None
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.overrides = CACHE_POLICIES if policies is None else policies
+        self._caches: "weakref.WeakSet[PolicyCache]" = weakref.WeakSet()
+        self._files: Dict[Tuple[str, str], _FileGroup] = {}
+        self._lock = threading.Lock()
+
+    def policy(self, name: str) -> CachePolicy:
+        override = self.overrides.get(name, {})
+        # an override of 0 is a real limit (expire at once, hold nothing); only a missing key inherits
+        ttl_days = override.get("ttl_days")
+        return CachePolicy(
+            name=name,
+            enabled=self.enabled and override.get("enabled", True),
+            ttl_seconds=ttl_days * DAY if ttl_days is not None else self.ttl_seconds,
+            max_entries=override.get("max_entries"),
+            max_memory_bytes=override["max_memory_mb"] * MB if override.get("max_memory_mb") is not None else None,
+            max_disk_bytes=override["max_disk_mb"] * MB if override.get("max_disk_mb") is not None else None,
+            eviction=override.get("eviction", "lru")
+        )
+
+    def memory_cache(self, name: str, sizeof: Callable[[Any], int] = lambda value: 0) -> PolicyCache:
+        return PolicyCache(self.policy(name), sizeof, self)
+
+    def register(self, cache: PolicyCache) -> None:
+        self._caches.add(cache)
+
+    def memory_usage(self) -> int:
+        return sum(cache.nbytes for cache in list(self._caches))
+
+    def enforce_memory(self) -> None:
+        """Evict the globally least recently used entries while all caches together exceed the budget"""
+        if self.max_memory_bytes is None:
+            return
+        with self._lock:
+            while self.memory_usage() > self.max_memory_bytes:
+                victims = [(v[1], cache) for cache in list(self._caches) for v in [cache.victim()] if v is not None]
+                if not victims:
+                    return
+                min(victims, key=lambda item: item[0])[1].evict_one("global_budget")
+
+    def register_files(self, cache: str, pattern: str, sidecars: Tuple[str, ...] = ()) -> None:
+        """Count files matching the glob ``pattern`` (plus their ``sidecars`` suffixes) as cache ``cache``'s disk use"""
+        self._files[(cache, pattern)] = _FileGroup(cache, pattern, sidecars)
+
+    def _cache_files(self) -> List[Tuple[str, str, int, float, Tuple[str, ...]]]:
+        files = []
+        for group in list(self._files.values()):
+            for path in glob.glob(group.pattern):
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                size = stat.st_size + sum(
+                    os.path.getsize(path + s) for s in group.sidecars if os.path.exists(path + s)
+                )
+                files.append((group.cache, path, size, stat.st_mtime, group.sidecars))
+        return files
+
+    def disk_usage(self) -> Dict[str, int]:
+        usage: Dict[str, int] = {}
+        for cache, _, size, _, _ in self._cache_files():
+            usage[cache] = usage.get(cache, 0) + size
+        for cache, size in usage.items():
+            CACHE_BYTES.labels(cache=cache, medium="disk").set(size)
+        return usage
+
+    def sweep_disk(self, protect: Iterable[str] = ()) -> List[str]:
+        """Delete cache files that expired, then the oldest ones over a per-cache or the global disk budget.
+
+        Files in ``protect`` (in use by this process) are never deleted.
+        Returns the deleted paths.
+        """
+        protected = {os.path.abspath(p) for p in protect if p}
+        files = sorted(self._cache_files(), key=lambda f: f[3])  # oldest first
+        usage: Dict[str, int] = {}
+        for cache, _, size, _, _ in files:
+            usage[cache] = usage.get(cache, 0) + size
+        total = sum(usage.values())
+        removed = []
+        now = time.time()
+        for cache, path, size, mtime, sidecars in files:
+            if os.path.abspath(path) in protected:
+                continue
+            policy = self.policy(cache)
+            if policy.expired(mtime, now):
+                reason = "expired"
+            elif policy.max_disk_bytes is not None and usage[cache] > policy.max_disk_bytes:
+                reason = "capacity"
+            elif self.max_disk_bytes is not None and total > self.max_disk_bytes:
+                reason = "global_budget"
+            else:
+                continue
+            for name in (path,) + tuple(path + s for s in sidecars):
+                if os.path.exists(name):
+                    os.remove(name)
+            usage[cache] -= size
+            total -= size
+            removed.append(path)
+            CACHE_EVICTIONS.labels(cache=cache, reason=reason).inc()
+            logger.info(f"Removed cache file {path} ({reason})")
+        for cache, size in usage.items():
+            CACHE_BYTES.labels(cache=cache, medium="disk").set(size)
+        return removed
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Occupancy and evictions per cache"""
+        stats: Dict[str, Dict[str, Any]] = {}
+        for cache in list(self._caches):
+            entry = stats.setdefault(cache.name, {"entries": 0, "memory_bytes": 0, "disk_bytes": 0})
+            entry["entries"] += len(cache)
+            entry["memory_bytes"] += cache.nbytes
+        for name, size in self.disk_usage().items():
+            stats.setdefault(name, {"entries": 0, "memory_bytes": 0, "disk_bytes": 0})["disk_bytes"] = size
+        for labels, child in CACHE_EVICTIONS.children():
+            entry = stats.setdefault(labels["cache"], {"entries": 0, "memory_bytes": 0, "disk_bytes": 0})
+            entry.setdefault("evictions", {})[labels["reason"]] = int(child.value)
+        return stats
+
+
+CACHES = CacheManager()
@@ -7,6 +7,13 @@ import os
 # Search weights
 KEYWORD_WEIGHT = 0.4
 VECTOR_WEIGHT = 0.6
+# Hybrid fusion: "full" scores every prompt; "threshold" pulls ranked candidates until the top-k is final
+HYBRID_FUSION_MODE = os.getenv("PROMPT_HYBRID_FUSION", "full")
+HYBRID_FUSION_METHOD = os.getenv("PROMPT_HYBRID_METHOD", "weighted")  # "weighted" sum or "rrf"
+RRF_K = 60  # reciprocal-rank fusion constant
+# Per-query score components (keyword scores, query embedding, similarities) reused across modes and weights
+SCORE_CACHE_ENTRIES = int(os.getenv("PROMPT_SCORE_CACHE_ENTRIES", "256"))
+SCORE_CACHE_MAX_MB = int(os.getenv("PROMPT_SCORE_CACHE_MB", "64"))
 
 # UI settings
 ITEMS_PER_PAGE = 10
@@ -17,18 +24,68 @@ ADDITIONAL_PROMPTS_FILE = "additional_prompts.json"
 TRENDING_PROMPTS_FILE = "trending_prompts.json"
 ALL_PROMPTS_FILE = "all_prompts_combined.json"
 EMBEDDING_CACHE_FILE = "embeddings_cache.pkl"
+EMBEDDING_STORE_FILE = "embedding_store.npz"  # per-text embeddings shared by merge pipeline and index build
+BUILD_DIR = "build"  # intermediate outputs and stage fingerprints of scripts/build_corpus.py
+ARTIFACT_DIR = os.getenv("PROMPT_ARTIFACT_DIR", "artifacts")  # versioned corpus bundles loaded by the app
 
 # Model settings
 EMBEDDING_MODEL_NAME = "snunlp/KR-SBERT-V40K-klueNLI-augSTS"
+# Embedding models the app can switch between (admin sidebar); the first one is served by default.
+# Every model keeps its own index cache, embedding store and shared index directory.
+EMBEDDING_MODELS = [name.strip() for name in os.getenv(
+    "PROMPT_EMBEDDING_MODELS", "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2," + EMBEDDING_MODEL_NAME
+).split(",") if name.strip()]
+DEFAULT_EMBEDDING_MODEL = EMBEDDING_MODELS[0]
+MAX_RESIDENT_MODELS = int(os.getenv("PROMPT_MAX_RESIDENT_MODELS", "2"))  # models kept loaded with their indexes
 
-# Cache settings
-CACHE_ENABLED = True
-CACHE_EXPIRY_DAYS = 7
+# Micro-batching of query encodes across concurrent sessions (PROMPT_ENCODE_BATCHING=0 to disable)
+ENCODE_BATCHING_ENABLED = os.getenv("PROMPT_ENCODE_BATCHING", "1") != "0"
+ENCODE_BATCH_MAX_SIZE = int(os.getenv("PROMPT_ENCODE_BATCH_SIZE", "32"))
+ENCODE_BATCH_MAX_WAIT_MS = float(os.getenv("PROMPT_ENCODE_BATCH_WAIT_MS", "5"))
+
+# Out-of-process encoder pool (scripts/encoder_server.py); empty socket = encode in the app process
+ENCODER_SOCKET = os.getenv("PROMPT_ENCODER_SOCKET", "")
+ENCODER_WORKERS = int(os.getenv("PROMPT_ENCODER_WORKERS", "1"))
+ENCODER_TIMEOUT_SECONDS = float(os.getenv("PROMPT_ENCODER_TIMEOUT", "30"))
+# Shared secret of app and workers; empty = the 0600 key file <socket>.key written by the encoder server
+ENCODER_AUTHKEY = os.getenv("PROMPT_ENCODER_AUTHKEY", "")
+
+# Embedding matrix shared by all app processes on a host via mmap'd files (empty = per-process index)
+SHARED_INDEX_DIR = os.getenv("PROMPT_SHARED_INDEX_DIR", "")
+
+# Cache settings (utils/cache_policy.py): PROMPT_CACHE_ENABLED=0 turns every cache off
+CACHE_ENABLED = os.getenv("PROMPT_CACHE_ENABLED", "1") != "0"
+CACHE_EXPIRY_DAYS = float(os.getenv("PROMPT_CACHE_EXPIRY_DAYS", "7"))  # entries/files unused this long expire (0 = never)
+CACHE_MAX_MEMORY_MB = int(os.getenv("PROMPT_CACHE_MEMORY_MB", "512"))  # all in-memory caches together
+CACHE_MAX_DISK_MB = int(os.getenv("PROMPT_CACHE_DISK_MB", "4096"))  # all cache files together
+# Per-cache overrides: enabled, ttl_days, max_entries, max_memory_mb, max_disk_mb, eviction ("lru" or "lfu");
+# unlike the global settings above, 0 here is a real limit (PROMPT_SCORE_CACHE_MB=0 caches no scores)
+CACHE_POLICIES = {
+    "embedding": {},  # per-text embedding store (EmbeddingCache)
+    "query": {"max_entries": SCORE_CACHE_ENTRIES, "max_memory_mb": SCORE_CACHE_MAX_MB},  # query vectors and scores
+    "corpus": {"max_disk_mb": 2048},  # index cache files, one per embedding model
+}
 
 # Logging settings
 LOG_LEVEL = "INFO"
 LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 
+# Tracing: per-stage timing spans aggregated into histograms; optionally one JSON log line per request
+TRACING_ENABLED = os.getenv("PROMPT_TRACING", "1") != "0"
+TRACE_LOG_JSON = os.getenv("PROMPT_TRACE_JSON", "0") == "1"
+
+# Profiling: cProfile one request at a time (also per session or with ?profile=1 in the app)
+PROFILE_ENABLED = os.getenv("PROMPT_PROFILE", "0") == "1"
+PROFILE_DIR = os.getenv("PROMPT_PROFILE_DIR", "profiles")
+
+# Metrics export for the scraper: an OpenMetrics text file and/or a local /metrics endpoint (0 = off)
+METRICS_FILE = os.getenv("PROMPT_METRICS_FILE", "")
+METRICS_PORT = int(os.getenv("PROMPT_METRICS_PORT", "0"))
+METRICS_EXPORT_INTERVAL = float(os.getenv("PROMPT_METRICS_INTERVAL", "15"))
+
+# Admin tab with the metrics dashboard (also shown with ?admin=1)
+ADMIN_ENABLED = os.getenv("PROMPT_ADMIN", "0") == "1"
+
 # Categories
 CATEGORIES = [
     "Document Creation",
@@ -65,4 +122,19 @@ MAX_KEYWORD_LENGTH = 50
 # Supabase settings
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-PROMPTS_TABLE = "prompts"
\ No newline at end of file
+PROMPTS_TABLE = "prompts"
+
+# Storage backend: "supabase" (remote, read-only JSON fallback) or "sqlite" (local, offline)
+STORAGE_BACKEND = os.getenv("PROMPT_STORAGE_BACKEND", "supabase")
+SQLITE_DB_PATH = os.getenv("PROMPT_SQLITE_PATH", "prompts.db")
+
+# Write-behind journal: acknowledge writes once on local disk, flush upstream in the background.
+# Each app process needs its own journal file.
+WRITE_BEHIND_ENABLED = os.getenv("PROMPT_WRITE_BEHIND", "0") == "1"
+WRITE_JOURNAL_PATH = os.getenv("PROMPT_WRITE_JOURNAL", "prompt_writes.journal")
+WRITE_BEHIND_FLUSH_INTERVAL = 1.0  # seconds between flush attempts when idle
+
+# Batch / async client settings
+BATCH_SIZE = 200  # rows (or ids) per PostgREST request
+ASYNC_MAX_CONCURRENCY = 8  # in-flight requests per process
+HTTP_TIMEOUT_SECONDS = 10.0
@@ -0,0 +1,306 @@
+"""
+Process-wide metrics registry with OpenMetrics text export
+"""
+
+import bisect
+import logging
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+# Upper bounds in milliseconds; one more bucket catches everything above
+DEFAULT_BUCKETS_MS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+
+class Counter:
+    """Monotonically increasing value"""
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class Gauge:
+    """Value that can go up and down"""
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def set(self, value: float) -> None:
+        self.value = float(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.inc(-amount)
+
+
+class Histogram:
+    """Fixed-bucket histogram"""
+
+    def __init__(self, bounds: List[float] = DEFAULT_BUCKETS_MS):
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        bucket = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[bucket] += 1
+            self.count += 1
+            self.total += value
+            if value > self.max:
+                self.max = value
+
+    def percentile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th percentile (the max for the overflow bucket)"""
+        with self._lock:
+            if not self.count:
+                return 0.0
+            rank = q / 100 * self.count
+            seen = 0
+            for bucket, count in enumerate(self.counts):
+                seen += count
+                if seen >= rank and count:
+                    return self.bounds[bucket] if bucket < len(self.bounds) else self.max
+            return self.max
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 3) if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": round(self.max, 3)
+        }
+
+
+_KINDS = {"counter": Counter, "gauge": Gauge, "histogram": Histogram}
+
+
+class MetricFamily:
+    """One named metric and its children, one per combination of label values"""
+
+    def __init__(self, name: str, kind: str, help_text: str, label_names: Tuple[str, ...], **options: Any):
+        self.name = name
+        self.kind = kind
+        self.help = help_text
+        self.label_names = label_names
+        self._options = options
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, **labels: Any):
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, _KINDS[self.kind](**self._options))
+        return child
+
+    # Shortcuts for families without labels
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def children(self) -> List[Tuple[Dict[str, str], Any]]:
+        with self._lock:
+            items = sorted(self._children.items())
+        return [(dict(zip(self.label_names, key)), child) for key, child in items]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._children.clear()
+
+
+class MetricsRegistry:
+    """Get-or-create registry of metric families"""
+
+    def __init__(self):
+        self._families: Dict[str, MetricFamily] = {}
+        self._lock = threading.Lock()
+
+    def _family(self, name: str, kind: str, help_text: str, labels: Tuple[str, ...], **options: Any) -> MetricFamily:
+        family = self._families.get(name)
+        if family is None:
+            with self._lock:
+                family = self._families.setdefault(name, MetricFamily(name, kind, help_text, tuple(labels), **options))
+        if family.kind != kind:
+            raise ValueError(f"Metric {name} is already registered as a {family.kind}")
+        return family
+
+    def counter(self, name: str, help_text: str = "", labels: Tuple[str, ...] = ()) -> MetricFamily:
+        return self._family(name, "counter", help_text, labels)
+
+    def gauge(self, name: str, help_text: str = "", labels: Tuple[str, ...] = ()) -> MetricFamily:
+        return self._family(name, "gauge", help_text, labels)
+
+    def histogram(
+        self, name: str, help_text: str = "", labels: Tuple[str, ...] = (), bounds: List[float] = DEFAULT_BUCKETS_MS
+    ) -> MetricFamily:
+        return self._family(name, "histogram", help_text, labels, bounds=bounds)
+
+    def families(self) -> List[MetricFamily]:
+        with self._lock:
+            return [self._families[name] for name in sorted(self._families)]
+
+    def snapshot(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Plain-data view for display: family name -> [{labels, value | summary}]"""
+        data = {}
+        for family in self.families():
+            rows = []
+            for labels, child in family.children():
+                if family.kind == "histogram":
+                    rows.append({"labels": labels, **child.summary()})
+                else:
+                    rows.append({"labels": labels, "value": child.value})
+            data[family.name] = rows
+        return data
+
+    def reset(self) -> None:
+        for family in self.families():
+            family.clear()
+
+
+REGISTRY = MetricsRegistry()
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str], extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(labels.items()) + ([extra] if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in items) + "}"
+
+
+def _format_value(value: float) -> str:
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def render_openmetrics(registry: MetricsRegistry = REGISTRY) -> str:
+    """Registry contents in the OpenMetrics text exposition format"""
+    lines = []
+    for family in registry.families():
+        lines.append(f"# TYPE {family.name} {family.kind}")
+        if family.help:
+            lines.append(f"# HELP {family.name} {family.help}")
+        for labels, child in family.children():
+            if family.kind == "counter":
+                lines.append(f"{family.name}_total{_format_labels(labels)} {_format_value(child.value)}")
+            elif family.kind == "gauge":
+                lines.append(f"{family.name}{_format_labels(labels)} {_format_value(child.value)}")
+            else:
+                with child._lock:
+                    counts, count, total = list(child.counts), child.count, child.total
+                cumulative = 0
+                for bound, bucket_count in zip(child.bounds + [float("inf")], counts):
+                    cumulative += bucket_count
+                    le = "+Inf" if bound == float("inf") else _format_value(bound)
+                    lines.append(f"{family.name}_bucket{_format_labels(labels, ('le', le))} {cumulative}")
+                lines.append(f"{family.name}_count{_format_labels(labels)} {count}")
+                lines.append(f"{family.name}_sum{_format_labels(labels)} {_format_value(total)}")
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+def write_openmetrics_file(path: str, registry: MetricsRegistry = REGISTRY) -> None:
+    """Atomically replace ``path`` with the current metrics (for a textfile collector)"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(render_openmetrics(registry))
+    os.replace(tmp_path, path)
+
+
+class MetricsExporter:
+    """Background exporter: rewrites a metrics file and/or serves ``/metrics`` over HTTP"""
+
+    def __init__(
+        self,
+        file_path: Optional[str] = None,
+        port: int = 0,
+        interval: float = 15.0,
+        registry: MetricsRegistry = REGISTRY,
+        host: str = "127.0.0.1"
+    ):
+        self.file_path = file_path
+        self.interval = interval
+        self.registry = registry
+        self._stopped = threading.Event()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._threads: List[threading.Thread] = []
+        if port:
+            self._server = ThreadingHTTPServer((host, port), self._handler())
+            self._spawn(self._server.serve_forever, "metrics-http")
+            logger.info(f"Serving metrics on http://{host}:{self._server.server_address[1]}/metrics")
+        if file_path:
+            self._spawn(self._write_loop, "metrics-file")
+
+    @property
+    def port(self) -> Optional[int]:
+        return self._server.server_address[1] if self._server else None
+
+    def _spawn(self, target, name: str) -> None:
+        thread = threading.Thread(target=target, name=name, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def _handler(self):
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = render_openmetrics(registry).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", OPENMETRICS_CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def _write_loop(self) -> None:
+        while True:
+            try:
+                write_openmetrics_file(self.file_path, self.registry)
+            except OSError as e:
+                logger.error(f"Failed to write metrics file: {e}")
+            if self._stopped.wait(self.interval):
+                return
+
+    def close(self) -> None:
+        self._stopped.set()
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+        for thread in self._threads:
+            thread.join(timeout=5)
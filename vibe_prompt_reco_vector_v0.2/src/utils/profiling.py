@@ -0,0 +1,85 @@
+"""
+On-demand cProfile capture of single requests
+"""
+
+import cProfile
+import json
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from utils.config import PROFILE_DIR
+from utils.tracing import current_request_id
+
+logger = logging.getLogger(__name__)
+
+# cProfile hooks are process-wide on newer Pythons; profile one request at a time
+_profile_lock = threading.Lock()
+
+
+class ProfileResult:
+    """Where a captured profile was written (``path`` stays None when profiling was off)"""
+
+    def __init__(self, tags: Dict[str, Any]):
+        self.path: Optional[str] = None
+        self.tags = tags
+
+    def tag(self, **tags: Any) -> None:
+        """Add tags known only inside the request (e.g. corpus size)"""
+        self.tags.update(tags)
+
+
+def _slug(value: Any, limit: int = 40) -> str:
+    text = re.sub(r"[^\w.-]+", "_", str(value), flags=re.UNICODE).strip("_")
+    return text[:limit] or "none"
+
+
+@contextmanager
+def profile_request(name: str, enabled: bool, output_dir: str = PROFILE_DIR, **tags: Any) -> Iterator[ProfileResult]:
+    """Run the block under cProfile when ``enabled`` and dump a ``.pstats`` file.
+
+    The file name carries the request name and tags (query, mode, corpus
+    size, ...); the full tags go to a ``.json`` file next to it. View with
+    ``python -m pstats``, snakeviz, or turn it into a flamegraph with
+    flameprof / gprof2dot.
+    """
+    result = ProfileResult(dict(tags))
+    if not enabled:
+        yield result
+        return
+    if not _profile_lock.acquire(blocking=False):
+        logger.warning(f"Another request is being profiled; running {name} unprofiled")
+        yield result
+        return
+    profiler = cProfile.Profile()
+    started = time.perf_counter()
+    profiler.enable()
+    try:
+        yield result
+    finally:
+        profiler.disable()
+        _profile_lock.release()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        request_id = current_request_id() or ""
+        stem = "-".join(
+            [time.strftime("%Y%m%d-%H%M%S"), _slug(name)] + [_slug(v) for v in result.tags.values()] + [request_id]
+        ).rstrip("-")
+        try:
+            os.makedirs(output_dir, exist_ok=True)
+            result.path = os.path.join(output_dir, stem + ".pstats")
+            profiler.dump_stats(result.path)
+            with open(os.path.join(output_dir, stem + ".json"), "w", encoding="utf-8") as f:
+                json.dump({
+                    "name": name,
+                    "request_id": request_id,
+                    "duration_ms": round(elapsed_ms, 3),
+                    "tags": result.tags
+                }, f, ensure_ascii=False, indent=2, default=str)
+            logger.info(f"Profile of {name} ({elapsed_ms:.1f} ms) saved to {result.path}")
+        except OSError as e:
+            logger.error(f"Failed to save profile: {e}")
+            result.path = None
@@ -0,0 +1,107 @@
+"""
+Lightweight timing spans for the recommendation hot path
+"""
+
+import contextvars
+import functools
+import json
+import logging
+import time
+import uuid
+from contextlib import contextmanager
+from typing import List, Dict, Any, Iterator, Optional
+
+from utils.config import TRACING_ENABLED, TRACE_LOG_JSON
+from utils.metrics import REGISTRY, Histogram
+
+trace_logger = logging.getLogger("trace")
+
+SPAN_HISTOGRAM = REGISTRY.histogram("span_duration_ms", "Duration of traced stages in milliseconds", labels=("span",))
+
+
+class _Request:
+    __slots__ = ("request_id", "name", "started", "spans", "attributes")
+
+    def __init__(self, request_id: str, name: str, attributes: Dict[str, Any]):
+        self.request_id = request_id
+        self.name = name
+        self.started = time.perf_counter()
+        self.spans: List[Dict[str, Any]] = []
+        self.attributes = attributes
+
+
+_current_request: contextvars.ContextVar[Optional[_Request]] = contextvars.ContextVar("trace_request", default=None)
+
+
+def get_histogram(name: str) -> Histogram:
+    return SPAN_HISTOGRAM.labels(span=name)
+
+
+def histogram_summaries() -> Dict[str, Dict[str, Any]]:
+    """Snapshot of every span histogram, by span name"""
+    return {labels["span"]: child.summary() for labels, child in SPAN_HISTOGRAM.children()}
+
+
+def reset_histograms() -> None:
+    SPAN_HISTOGRAM.clear()
+
+
+def current_request_id() -> Optional[str]:
+    request = _current_request.get()
+    return request.request_id if request else None
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Time a block; recorded in the ``name`` histogram and on the current request"""
+    if not TRACING_ENABLED:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        get_histogram(name).observe(elapsed_ms)
+        request = _current_request.get()
+        if request is not None:
+            request.spans.append({
+                "name": name,
+                "start_ms": round((started - request.started) * 1000, 3),
+                "duration_ms": round(elapsed_ms, 3)
+            })
+
+
+def traced(name: str):
+    """Decorator form of ``span``"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def request_scope(name: str, **attributes: Any) -> Iterator[str]:
+    """Give the spans inside one user request a shared id; yields the id.
+
+    The whole request is timed as span ``name``. With ``TRACE_LOG_JSON`` on,
+    one JSON line with every span of the request is logged when it ends.
+    """
+    request = _Request(uuid.uuid4().hex[:12], name, attributes)
+    token = _current_request.set(request)
+    try:
+        with span(name):
+            yield request.request_id
+    finally:
+        _current_request.reset(token)
+        if TRACING_ENABLED and TRACE_LOG_JSON:
+            trace_logger.info(json.dumps({
+                "request_id": request.request_id,
+                "name": name,
+                "duration_ms": round((time.perf_counter() - request.started) * 1000, 3),
+                "attributes": attributes,
+                "spans": request.spans
+            }, ensure_ascii=False, default=str))
@@ -0,0 +1,103 @@
+import unittest
+import sys
+import os
+import json
+import re
+
+import httpx
+
+# Add the src directory to sys.path
+src_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, src_dir)
+
+from services.async_prompt_service import AsyncPromptService, PromptBatchClient
+from services.storage import StorageError
+
+
+class FakePostgrest:
+    """In-memory stand-in for the PostgREST /prompts endpoint"""
+
+    def __init__(self, rows):
+        self.rows = {row["id"]: dict(row) for row in rows}
+        self.requests = []
+
+    def _ids(self, request):
+        value = request.url.params.get("id", "")
+        if value.startswith("eq."):
+            return [value[3:]]
+        return re.findall(r'"((?:[^"\\]|\\.)*)"', value)
+
+    def handler(self, request):
+        self.requests.append(request)
+        if request.method == "GET":
+            rows = [self.rows[i] for i in self._ids(request) if i in self.rows]
+        elif request.method == "POST":
+            rows = json.loads(request.content)
+            for row in rows:
+                self.rows[row["id"]] = row
+        elif request.method == "PATCH":
+            rows = []
+            for i in self._ids(request):
+                if i in self.rows:
+                    self.rows[i].update(json.loads(request.content))
+                    rows.append(self.rows[i])
+        else:
+            rows = [self.rows.pop(i) for i in self._ids(request) if i in self.rows]
+        return httpx.Response(200, json=rows)
+
+
+class TestAsyncPromptService(unittest.TestCase):
+    """Test batched operations through the blocking facade"""
+
+    def setUp(self):
+        self.backend = FakePostgrest([
+            {"id": str(i), "title": f"prompt {i}", "keywords": []} for i in range(5)
+        ])
+        service = AsyncPromptService(
+            url="http://supabase.local", key="test-key", batch_size=2, max_concurrency=2,
+            transport=httpx.MockTransport(self.backend.handler)
+        )
+        self.client = PromptBatchClient(service)
+
+    def tearDown(self):
+        self.client.close()
+
+    def test_get_prompts_by_ids_batches_and_keeps_order(self):
+        results = self.client.get_prompts_by_ids(["4", "0", "missing", "2"])
+        self.assertEqual([r["id"] for r in results], ["4", "0", "2"])
+        self.assertEqual(len(self.backend.requests), 2)
+
+    def test_add_prompts_assigns_ids(self):
+        added = self.client.add_prompts([{"title": "new"}, {"id": "x", "title": "given"}])
+        self.assertEqual(len(added), 2)
+        self.assertEqual(added[1]["id"], "x")
+        self.assertTrue(added[0]["id"])
+        self.assertIn(added[0]["id"], self.backend.rows)
+
+    def test_update_prompts(self):
+        result = self.client.update_prompts({"1": {"title": "edited"}, "missing": {"title": "x"}})
+        self.assertEqual(result, {"1": True, "missing": False})
+        self.assertEqual(self.backend.rows["1"]["title"], "edited")
+
+    def test_delete_prompts(self):
+        deleted = self.client.delete_prompts(["0", "1", "3"])
+        self.assertCountEqual(deleted, ["0", "1", "3"])
+        self.assertEqual(sorted(self.backend.rows), ["2", "4"])
+
+    def test_http_errors_are_logged_not_raised(self):
+        service = AsyncPromptService(
+            url="http://supabase.local", key="test-key",
+            transport=httpx.MockTransport(lambda request: httpx.Response(503))
+        )
+        client = PromptBatchClient(service)
+        try:
+            self.assertEqual(client.get_prompts_by_ids(["1"]), [])
+            self.assertEqual(client.update_prompts({"1": {"title": "x"}}), {"1": False})
+            with self.assertRaises(StorageError):
+                client.get_prompts_by_ids(["1"], strict=True)
+        finally:
+            client.close()
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
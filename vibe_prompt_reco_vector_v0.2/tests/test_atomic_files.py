@@ -0,0 +1,143 @@
+import unittest
+import sys
+import os
+import pickle
+import tempfile
+import threading
+import time
+import numpy as np
+
+# Add the src directory to sys.path
+src_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, src_dir)
+
+from services.recommendation_service import RecommendationService
+from utils.atomic_files import (
+    ArtifactError, MANIFEST_SUFFIX, atomic_write, file_lock, read_artifact, read_manifest, write_artifact
+)
+
+
+class CountingEncoder:
+    """Deterministic stand-in encoder that counts corpus encodes"""
+
+    def __init__(self):
+        self.corpus_calls = 0
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True):
+        if len(texts) > 1:
+            self.corpus_calls += 1
+        return np.array([[len(t), sum(map(ord, t)) % 97, 1.0] for t in texts], dtype=np.float32)
+
+
+class TestAtomicFiles(unittest.TestCase):
+    """Test atomic writes, locks and manifest verification"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "artifact.bin")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_failed_write_keeps_old_file(self):
+        with atomic_write(self.path) as f:
+            f.write(b"old")
+        with self.assertRaises(RuntimeError):
+            with atomic_write(self.path) as f:
+                f.write(b"partial")
+                raise RuntimeError("crash")
+        with open(self.path, "rb") as f:
+            self.assertEqual(f.read(), b"old")
+        self.assertEqual(os.listdir(self.temp_dir.name), ["artifact.bin"])
+
+    def test_artifact_round_trip_and_rejections(self):
+        write_artifact(self.path, b"payload", {"model_name": "m", "fingerprint": "fp"})
+        manifest, payload = read_artifact(self.path, {"model_name": "m"})
+        self.assertEqual((payload, manifest["size"]), (b"payload", 7))
+        with self.assertRaisesRegex(ArtifactError, "fingerprint"):
+            read_artifact(self.path, {"fingerprint": "other"})
+        with open(self.path, "wb") as f:
+            f.write(b"pay")
+        with self.assertRaisesRegex(ArtifactError, "3 bytes"):
+            read_artifact(self.path, {})
+        with open(self.path, "wb") as f:
+            f.write(b"PAYLOAD")
+        with self.assertRaisesRegex(ArtifactError, "checksum"):
+            read_artifact(self.path, {})
+        os.remove(self.path + MANIFEST_SUFFIX)
+        with self.assertRaisesRegex(ArtifactError, "no manifest"):
+            read_artifact(self.path, {})
+
+    def test_lock_is_exclusive(self):
+        events = []
+        held = threading.Event()
+
+        def holder():
+            with file_lock(self.path):
+                held.set()
+                time.sleep(0.2)
+                events.append("holder done")
+
+        thread = threading.Thread(target=holder)
+        thread.start()
+        held.wait(5)
+        with file_lock(self.path):
+            events.append("second acquired")
+        thread.join()
+        self.assertEqual(events, ["holder done", "second acquired"])
+
+
+class TestIndexCacheFiles(unittest.TestCase):
+    """Test that RecommendationService only loads verified index caches"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache_file = os.path.join(self.temp_dir.name, "cache.pkl")
+        self.prompts = [
+            {"id": str(i), "title": f"{topic} 예제", "prompt": f"{topic}로 API 만들기"}
+            for i, topic in enumerate(["FastAPI", "Django", "Flask"])
+        ]
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def make_service(self, model_name="test-model"):
+        service = RecommendationService(model_name=model_name, cache_file=self.cache_file, embedding_store_file=None)
+        service.model = CountingEncoder()
+        return service
+
+    def test_cache_is_reused_with_manifest(self):
+        first = self.make_service()
+        first.vector_recommend("FastAPI", self.prompts)
+        manifest = read_manifest(first.cache_file)
+        self.assertEqual((manifest["model_name"], manifest["dimension"], manifest["count"]), ("test-model", 3, 3))
+        second = self.make_service()
+        self.assertEqual(len(second.vector_recommend("FastAPI", self.prompts)), 3)
+        self.assertEqual(second.model.corpus_calls, 0)
+
+    def test_truncated_cache_is_rebuilt(self):
+        first = self.make_service()
+        first.vector_recommend("FastAPI", self.prompts)
+        with open(first.cache_file, "r+b") as f:
+            f.truncate(os.path.getsize(first.cache_file) // 2)
+        second = self.make_service()
+        self.assertEqual(len(second.vector_recommend("FastAPI", self.prompts)), 3)
+        self.assertEqual(second.model.corpus_calls, 1)
+        self.assertIsNotNone(second._load_index_cache(second._fingerprint(self.prompts)))
+
+    def test_mismatched_and_legacy_caches_are_not_loaded(self):
+        first = self.make_service()
+        first.vector_recommend("FastAPI", self.prompts)
+        changed = self.prompts + [{"id": "9", "title": "Express 예제", "prompt": "Express로 API 만들기"}]
+        self.assertIsNone(first._load_index_cache(first._fingerprint(changed)))
+
+        os.remove(first.cache_file + MANIFEST_SUFFIX)
+        with open(first.cache_file, "wb") as f:
+            pickle.dump({"fingerprint": first._fingerprint(self.prompts)}, f)
+        legacy = self.make_service()
+        legacy.vector_recommend("FastAPI", self.prompts)
+        self.assertEqual(legacy.model.corpus_calls, 1)
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
@@ -0,0 +1,103 @@
+import unittest
+import sys
+import os
+import threading
+import time
+import numpy as np
+
+# Add the src directory to sys.path
+src_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, src_dir)
+
+from services.batching_encoder import BatchingEncoder
+
+
+class RecordingModel:
+    """Stand-in model that records the size of every encode call"""
+
+    dimension = 3
+
+    def __init__(self, delay=0.0, fail=False):
+        self.calls = []
+        self.delay = delay
+        self.fail = fail
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True):
+        self.calls.append(len(texts))
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("encoder down")
+        return np.array([[len(t), sum(map(ord, t)) % 97, 1.0] for t in texts], dtype=np.float32)
+
+
+class TestBatchingEncoder(unittest.TestCase):
+    """Test micro-batching of concurrent encode calls"""
+
+    def test_concurrent_calls_are_batched_and_split(self):
+        model = RecordingModel(delay=0.02)
+        encoder = BatchingEncoder(model, max_batch_size=64, max_wait_ms=50)
+        texts = [f"질문 {i}" * (i + 1) for i in range(24)]
+        results = {}
+        barrier = threading.Barrier(len(texts))
+
+        def call(i):
+            barrier.wait()
+            results[i] = encoder.encode([texts[i]])
+
+        threads = [threading.Thread(target=call, args=(i,)) for i in range(len(texts))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        expected = RecordingModel().encode(texts)
+        for i in range(len(texts)):
+            np.testing.assert_array_equal(results[i], expected[i:i + 1])
+        self.assertEqual(sum(model.calls), len(texts))
+        self.assertLess(len(model.calls), len(texts))
+
+    def test_single_caller_does_not_wait(self):
+        encoder = BatchingEncoder(RecordingModel(), max_batch_size=32, max_wait_ms=1000)
+        started = time.perf_counter()
+        vectors = encoder.encode(["혼자 검색"])
+        self.assertLess(time.perf_counter() - started, 0.5)
+        self.assertEqual(vectors.shape, (1, 3))
+
+    def test_large_calls_bypass_the_queue(self):
+        model = RecordingModel()
+        encoder = BatchingEncoder(model, max_batch_size=4)
+        self.assertEqual(encoder.encode([str(i) for i in range(10)], batch_size=8).shape, (10, 3))
+        self.assertEqual(model.calls, [10])
+        self.assertEqual(encoder.dimension, 3)
+
+    def test_errors_reach_every_caller(self):
+        encoder = BatchingEncoder(RecordingModel(fail=True))
+        with self.assertRaises(RuntimeError):
+            encoder.encode(["실패"])
+        self.assertEqual(encoder._waiting, 0)
+
+    def test_close_during_encode_does_not_strand_the_caller(self):
+        encoder = BatchingEncoder(RecordingModel())
+        put = encoder._queue.put
+        closer = threading.Thread(target=encoder.close, daemon=True)
+
+        def put_after_close_started(item):
+            # close() runs in the window between the caller's closed check and its enqueue
+            if item is not None and not closer.is_alive():
+                closer.start()
+                time.sleep(0.2)
+            put(item)
+
+        encoder._queue.put = put_after_close_started
+        results = []
+        caller = threading.Thread(target=lambda: results.append(encoder.encode(["닫히는 중"])), daemon=True)
+        caller.start()
+        caller.join(5)
+        closer.join(5)
+        self.assertFalse(caller.is_alive())
+        self.assertEqual(results[0].shape, (1, 3))
+        self.assertFalse(encoder._worker.is_alive())
+        np.testing.assert_array_equal(encoder.encode(["닫힌 뒤"]), RecordingModel().encode(["닫힌 뒤"]))
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
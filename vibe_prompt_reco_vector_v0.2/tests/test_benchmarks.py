@@ -0,0 +1,130 @@
+import unittest
+import sys
+import os
+import tempfile
+from unittest import mock
+
+import numpy as np
+
+# The benchmark helpers live in benchmarks/
+bench_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+sys.path.insert(0, bench_dir)
+
+from corpus import HashingEncoder, generate_corpus, generate_queries, load_vocabulary
+from run_benchmarks import time_call
+from index_eval import exact_top_k, recall_at_k, mark_pareto, evaluate
+from load_test import find_knee, prepare_database, run_request, run_sessions, summarize, RequestFailed, DEFAULT_MIX
+
+
+class TestSyntheticCorpus(unittest.TestCase):
+    """Test the benchmark corpus generator"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.vocab = load_vocabulary()
+
+    def test_corpus_is_deterministic_and_well_formed(self):
+        first = generate_corpus(200, seed=3, vocab=self.vocab)
+        self.assertEqual(first, generate_corpus(200, seed=3, vocab=self.vocab))
+        self.assertEqual(len({p["id"] for p in first}), 200)
+        for prompt in first:
+            self.assertIn(prompt["category"], self.vocab["categories"])
+            self.assertIn(prompt["level"], self.vocab["levels"])
+            self.assertTrue(prompt["keywords"])
+
+    def test_queries_use_recommender_vocabulary(self):
+        queries = generate_queries(5, vocab=self.vocab)
+        self.assertEqual(len(queries), 5)
+        self.assertTrue(all(isinstance(q, str) and q for q in queries))
+
+    def test_hashing_encoder_is_stable(self):
+        encoder = HashingEncoder(dim=16)
+        vectors = encoder.encode(["FastAPI 로그인 API", "FastAPI 로그인 API", ""])
+        self.assertEqual(vectors.shape, (3, 16))
+        self.assertTrue((vectors[0] == vectors[1]).all())
+        self.assertEqual(vectors[2].sum(), 0)
+
+    def test_time_call_respects_budget(self):
+        stats = time_call(lambda i: None, repeat=4, budget=10.0)
+        self.assertEqual(stats["runs"], 4)
+        self.assertEqual(time_call(lambda i: None, repeat=4, budget=0.0)["runs"], 1)
+
+
+
+class TestLoadTest(unittest.TestCase):
+    """Test the load-test summary, knee detection and an offline run"""
+
+    def level(self, concurrency, rps, p95):
+        return {"concurrency": concurrency, "throughput_rps": rps, "p95_ms": p95}
+
+    def test_knee_at_latency_climb(self):
+        levels = [self.level(1, 10, 10), self.level(2, 19, 12), self.level(4, 30, 25)]
+        self.assertEqual(find_knee(levels), 4)
+
+    def test_knee_at_throughput_plateau(self):
+        levels = [self.level(1, 10, 10), self.level(2, 19, 11), self.level(4, 19.5, 12)]
+        self.assertEqual(find_knee(levels), 4)
+
+    def test_no_knee_while_scaling(self):
+        self.assertIsNone(find_knee([self.level(1, 10, 10), self.level(2, 19, 11)]))
+
+    def test_summarize_percentiles_and_errors(self):
+        samples = [("hybrid", i / 1000, True) for i in range(1, 101)] + [("vector", 0.5, False)]
+        summary = summarize(samples, elapsed=2.0)
+        self.assertEqual(summary["requests"], 101)
+        self.assertAlmostEqual(summary["throughput_rps"], 50.5)
+        self.assertAlmostEqual(summary["p50_ms"], 50.5)
+        self.assertAlmostEqual(summary["error_rate"], round(1 / 101, 4))
+
+    def test_offline_sessions_share_one_service(self):
+        with tempfile.TemporaryDirectory() as work_dir:
+            vocab = load_vocabulary()
+            db_path = prepare_database(work_dir, 50, vocab)
+            samples = run_sessions(3, 0.3, db_path, work_dir, 16, DEFAULT_MIX, generate_queries(5, vocab=vocab))
+        self.assertTrue(samples)
+        self.assertTrue(all(ok for _, _, ok in samples))
+
+    def test_swallowed_service_errors_count_as_failures(self):
+        prompts = mock.Mock(load_prompts=lambda: [{"id": "1"}])
+        failing = mock.Mock(hybrid_recommend=lambda *args: [], vector_recommend=lambda *args: [])
+        for op in ("hybrid", "vector"):
+            with self.assertRaises(RequestFailed):
+                run_request(op, "FastAPI로 로그인", prompts, failing)
+        with self.assertRaises(RequestFailed):
+            run_request("browse", "FastAPI로 로그인", mock.Mock(load_prompts=lambda: []), failing)
+
+
+
+class TestIndexEval(unittest.TestCase):
+    """Test ground truth, recall and the Pareto marking"""
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.corpus = rng.randn(500, 8).astype("float32")
+        self.corpus /= np.linalg.norm(self.corpus, axis=1, keepdims=True)
+        self.queries = self.corpus[:20] + 0.01
+
+    def test_exact_top_k_matches_full_sort(self):
+        truth = exact_top_k(self.corpus, self.queries, 5)
+        expected = np.argsort(-(self.queries @ self.corpus.T), axis=1)[:, :5]
+        self.assertTrue((truth == expected).all())
+        self.assertEqual(recall_at_k(truth, expected), 1.0)
+
+    def test_flat_index_has_full_recall(self):
+        results = evaluate(self.corpus, self.queries, [("Flat", None, [0]), ("HNSW8", "efSearch", [4, 64])], k=5)
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[0]["recall@5"], 1.0)
+        self.assertTrue(any(r["pareto"] for r in results))
+
+    def test_mark_pareto(self):
+        results = [
+            {"recall@10": 1.0, "mean_ms": 1.0},
+            {"recall@10": 0.9, "mean_ms": 0.1},
+            {"recall@10": 0.8, "mean_ms": 0.5},
+        ]
+        mark_pareto(results, "recall@10")
+        self.assertEqual([r["pareto"] for r in results], [True, True, False])
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
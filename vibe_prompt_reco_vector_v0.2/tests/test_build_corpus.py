@@ -0,0 +1,94 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+from unittest import mock
+
+import numpy as np
+
+# build_corpus.py lives in scripts/, the services in src/
+scripts_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+src_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, scripts_dir)
+sys.path.insert(0, src_dir)
+
+from build_corpus import CorpusBuild
+from services.corpus_bundle import load_bundle, list_versions
+from services.recommendation_service import RecommendationService
+
+
+class CountingEncoder:
+    """Deterministic stand-in encoder that records what it was asked to encode"""
+
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True):
+        self.encoded.extend(texts)
+        return np.array([[len(t), sum(map(ord, t)) % 97, 1.0] for t in texts], dtype=np.float32)
+
+
+class TestCorpusBuild(unittest.TestCase):
+    """Test stage skipping, incremental re-runs and the bundle the app loads"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.input_file = os.path.join(self.temp_dir.name, "input.json")
+        self.prompts = [
+            {"id": str(i), "title": f"프롬프트 {i}", "prompt": f"{topic}로 예제 {i}를 만들어줘", "category": "백엔드"}
+            for i, topic in enumerate(["FastAPI", "Django", "Flask", "Express", "Spring"])
+        ]
+        self.write_input(self.prompts)
+        self.encoder = CountingEncoder()
+        self.service = RecommendationService(
+            model_name="test-model", cache_file=os.path.join(self.temp_dir.name, "cache.pkl"),
+            embedding_store_file=os.path.join(self.temp_dir.name, "store.npz")
+        )
+        self.service.model = self.encoder
+        self.artifact_dir = os.path.join(self.temp_dir.name, "artifacts")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write_input(self, prompts):
+        with open(self.input_file, "w", encoding="utf-8") as f:
+            json.dump(prompts, f, ensure_ascii=False)
+
+    def run_build(self):
+        build = CorpusBuild(
+            [self.input_file], build_dir=os.path.join(self.temp_dir.name, "build"),
+            artifact_dir=self.artifact_dir, service=self.service
+        )
+        with mock.patch("builtins.print"):
+            return build.run()
+
+    def test_unchanged_inputs_skip_every_stage(self):
+        self.assertTrue(all(self.run_build().values()))
+        self.assertFalse(any(self.run_build().values()))
+        self.assertEqual(len(self.encoder.encoded), 5)
+        self.assertEqual(len(list_versions(self.artifact_dir)), 1)
+
+    def test_changed_input_only_encodes_new_prompt(self):
+        self.run_build()
+        self.write_input(self.prompts + [{"id": "9", "title": "새 프롬프트", "prompt": "Rust로 CLI 만들기", "category": "기초"}])
+        self.assertTrue(all(self.run_build().values()))
+        self.assertEqual(len(self.encoder.encoded), 6)
+        self.assertEqual(len(load_bundle(self.artifact_dir).prompts), 6)
+
+    def test_app_serves_search_from_bundle(self):
+        self.run_build()
+        bundle = load_bundle(self.artifact_dir)
+        self.assertEqual(bundle.model_name, "test-model")
+        self.assertTrue(self.service.use_bundle(bundle))
+        index, embeddings = self.service._build_vector_index(bundle.prompts)
+        self.assertIs(index, bundle.index)
+        self.assertFalse(os.path.exists(self.service.cache_file))
+        # Edited prompts no longer match the bundle and fall back to a fresh build
+        edited = [dict(bundle.prompts[0], title="변경됨")] + bundle.prompts[1:]
+        index, _ = self.service._build_vector_index(edited)
+        self.assertIsNot(index, bundle.index)
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
@@ -0,0 +1,221 @@
+import unittest
+import sys
+import os
+import tempfile
+import time
+from unittest import mock
+import numpy as np
+
+# Add the src directory to sys.path
+src_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, src_dir)
+
+from services.embedding_cache import EmbeddingCache
+from services.recommendation_service import RecommendationService
+from utils.cache_policy import CacheManager, CachePolicy, PolicyCache, DAY
+
+
+class CountingEncoder:
+    """Deterministic stand-in encoder that counts corpus encodes"""
+
+    def __init__(self):
+        self.corpus_calls = 0
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True):
+        if len(texts) > 1:
+            self.corpus_calls += 1
+        return np.array([[len(t), sum(map(ord, t)) % 97, 1.0] for t in texts], dtype=np.float32)
+
+
+class TestPolicyCache(unittest.TestCase):
+    """Test expiry, eviction order and budgets of in-memory caches"""
+
+    def test_lru_and_lfu_evict_different_entries(self):
+        lru = PolicyCache(CachePolicy("lru", max_entries=2))
+        lfu = PolicyCache(CachePolicy("lfu", max_entries=2, eviction="lfu"))
+        for cache in (lru, lfu):
+            cache.put("a", 1)
+            cache.get("a")
+            cache.get("a")
+            cache.put("b", 2)
+            cache.get("b")
+            cache.get("a")
+            cache.put("c", 3)
+        self.assertEqual((lru.get("a"), lru.get("b")), (1, None))
+        self.assertEqual((lfu.get("a"), lfu.get("b")), (1, None))
+        for _ in range(5):
+            lfu.get("c")
+        lfu.put("d", 4)
+        self.assertIsNone(lfu.get("a"))
+        self.assertEqual((lfu.get("c"), lfu.get("d")), (3, 4))
+
+    def test_expired_entries_are_misses(self):
+        cache = PolicyCache(CachePolicy("ttl", ttl_seconds=60))
+        cache.put("a", 1)
+        self.assertEqual(cache.get("a"), 1)
+        cache._entries["a"].last_used -= 120
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
+
+    def test_disabled_cache_stores_nothing(self):
+        cache = PolicyCache(CachePolicy("off", enabled=False))
+        self.assertEqual(cache.put("a", 1), 1)
+        self.assertIsNone(cache.get("a"))
+
+    def test_global_memory_budget_evicts_least_recently_used_across_caches(self):
+        manager = CacheManager(max_memory_bytes=100, policies={})
+        first = manager.memory_cache("first", sizeof=len)
+        second = manager.memory_cache("second", sizeof=len)
+        first.put("a", b"x" * 40)
+        second.put("b", b"x" * 40)
+        first.get("a")
+        second.put("c", b"x" * 40)
+        self.assertEqual(manager.memory_usage(), 80)
+        self.assertIsNone(second.get("b"))
+        self.assertIsNotNone(first.get("a"))
+        stats = manager.stats()
+        self.assertEqual(stats["second"]["evictions"]["global_budget"], 1)
+
+    def test_policy_overrides(self):
+        manager = CacheManager(enabled=True, ttl_days=7, policies={
+            "query": {"max_entries": 10, "max_memory_mb": 1, "eviction": "lfu"},
+            "corpus": {"enabled": False, "ttl_days": 1}
+        })
+        query = manager.policy("query")
+        self.assertEqual((query.max_entries, query.max_memory_bytes, query.eviction), (10, 1024 * 1024, "lfu"))
+        self.assertEqual(query.ttl_seconds, 7 * DAY)
+        self.assertFalse(manager.policy("corpus").enabled)
+        self.assertEqual(manager.policy("corpus").ttl_seconds, DAY)
+        self.assertFalse(CacheManager(enabled=False, policies={}).policy("query").enabled)
+        self.assertIsNone(CacheManager(ttl_days=0, policies={}).policy("query").ttl_seconds)
+
+    def test_zero_overrides_are_limits(self):
+        manager = CacheManager(ttl_days=7, policies={"query": {"max_memory_mb": 0, "max_disk_mb": 0, "ttl_days": 0}})
+        policy = manager.policy("query")
+        self.assertEqual((policy.max_memory_bytes, policy.max_disk_bytes, policy.ttl_seconds), (0, 0, 0))
+        cache = PolicyCache(policy, sizeof=len)
+        cache.put("a", b"x")
+        self.assertIsNone(cache.get("a"))
+
+
+class TestDiskSweep(unittest.TestCase):
+    """Test expiry and budgets of cache files"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write(self, name, size, age_days=0):
+        path = os.path.join(self.temp_dir.name, name)
+        with open(path, "wb") as f:
+            f.write(b"x" * size)
+        then = time.time() - age_days * DAY
+        os.utime(path, (then, then))
+        return path
+
+    def test_sweep_removes_expired_then_oldest_over_budget(self):
+        manager = CacheManager(ttl_days=7, max_disk_bytes=250, policies={})
+        manager.register_files("corpus", os.path.join(self.temp_dir.name, "cache.*.pkl"), sidecars=(".manifest.json",))
+        expired = self.write("cache.a.pkl", 10, age_days=30)
+        self.write("cache.a.pkl.manifest.json", 5, age_days=30)
+        oldest = self.write("cache.b.pkl", 100, age_days=3)
+        protected = self.write("cache.c.pkl", 100, age_days=2)
+        newest = self.write("cache.d.pkl", 100, age_days=1)
+        removed = manager.sweep_disk(protect=[protected])
+        self.assertEqual(removed, [expired, oldest])
+        self.assertEqual(sorted(os.listdir(self.temp_dir.name)), ["cache.c.pkl", "cache.d.pkl"])
+        self.assertEqual(manager.disk_usage(), {"corpus": 200})
+        self.assertTrue(os.path.exists(newest))
+
+
+class TestEmbeddingStorePolicy(unittest.TestCase):
+    """Test per-row usage tracking in the embedding store"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "store.npz")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_budget_evicts_least_recently_used_rows(self):
+        store = EmbeddingCache(self.path, "model-a", CachePolicy("embedding", max_entries=2))
+        encoder = CountingEncoder()
+        store.encode(["one", "two"], encoder)
+        store.lookup(["one"])
+        vectors = store.encode(["one", "three"], encoder)
+        self.assertEqual(vectors.shape, (2, 3))
+        self.assertEqual(len(store), 2)
+        self.assertIsNone(store.lookup(["two"])[0])
+
+    def test_all_hit_encode_does_not_rewrite_the_file(self):
+        store = EmbeddingCache(self.path, "model-a")
+        store.encode(["one", "two"], CountingEncoder())
+        store.save()
+        written = os.path.getmtime(self.path)
+        os.utime(self.path, (written - 100, written - 100))
+        store.encode(["one", "two"], CountingEncoder())
+        store.save()
+        self.assertEqual(os.path.getmtime(self.path), written - 100)
+        store._saved_at -= 2 * 3600
+        store.save()
+        self.assertGreater(os.path.getmtime(self.path), written - 100)
+
+    def test_rows_unused_past_ttl_are_dropped_on_load(self):
+        store = EmbeddingCache(self.path, "model-a")
+        store.encode(["one", "two"], CountingEncoder())
+        store._used[0] -= 10 * DAY
+        store.save()
+        reloaded = EmbeddingCache(self.path, "model-a", CachePolicy("embedding", ttl_seconds=DAY))
+        self.assertEqual(len(reloaded), 1)
+        self.assertIsNotNone(reloaded.lookup(["two"])[0])
+
+
+class TestServiceCachePolicies(unittest.TestCase):
+    """Test that RecommendationService honors the cache switches and expiry"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.prompts = [
+            {"id": str(i), "title": f"{topic} 예제", "prompt": f"{topic}로 API 만들기"}
+            for i, topic in enumerate(["FastAPI", "Django", "Flask"])
+        ]
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def make_service(self):
+        service = RecommendationService(
+            model_name="test-model",
+            cache_file=os.path.join(self.temp_dir.name, "cache.pkl"),
+            embedding_store_file=os.path.join(self.temp_dir.name, "store.npz")
+        )
+        service.model = CountingEncoder()
+        return service
+
+    def test_disabled_caches_write_no_files(self):
+        service = self.make_service()
+        service._index_policy = CachePolicy("corpus", enabled=False)
+        with mock.patch("services.recommendation_service.CACHES.policy",
+                        return_value=CachePolicy("embedding", enabled=False)):
+            self.assertEqual(len(service.vector_recommend("FastAPI", self.prompts)), 3)
+        self.assertEqual(os.listdir(self.temp_dir.name), [])
+
+    def test_expired_index_cache_is_rebuilt(self):
+        first = self.make_service()
+        first.vector_recommend("FastAPI", self.prompts)
+        then = time.time() - 30 * DAY
+        os.utime(first.cache_file, (then, then))
+        second = self.make_service()
+        second._index_policy = CachePolicy("corpus", ttl_seconds=7 * DAY)
+        self.assertIsNone(second._load_index_cache(second._fingerprint(self.prompts)))
+        third = self.make_service()
+        third._index_policy = CachePolicy("corpus")
+        self.assertIsNotNone(third._load_index_cache(third._fingerprint(self.prompts)))
+        self.assertGreater(os.path.getmtime(third.cache_file), time.time() - 60)
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
@@ -0,0 +1,63 @@
+import unittest
+import sys
+import os
+import tempfile
+
+import numpy as np
+
+# Add the src directory to sys.path
+src_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, src_dir)
+
+from services.embedding_cache import EmbeddingCache
+
+
+class CountingEncoder:
+    """Deterministic stand-in encoder that records what it was asked to encode"""
+
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True):
+        self.encoded.extend(texts)
+        return np.array([[len(t), sum(map(ord, t)) % 97, 1.0] for t in texts], dtype=np.float32)
+
+
+class TestEmbeddingCache(unittest.TestCase):
+    """Test the shared per-text embedding store"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "store.npz")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_only_unseen_texts_are_encoded(self):
+        encoder = CountingEncoder()
+        cache = EmbeddingCache(self.path, "model-a")
+        first = cache.encode(["a", "bb", "a"], encoder)
+        cache.encode(["bb", "ccc"], encoder)
+        self.assertEqual(encoder.encoded, ["a", "bb", "ccc"])
+        np.testing.assert_allclose(np.linalg.norm(first, axis=1), 1.0, rtol=1e-5)
+        np.testing.assert_array_equal(first[0], first[2])
+
+    def test_persisted_across_instances(self):
+        cache = EmbeddingCache(self.path, "model-a")
+        cache.encode(["a", "bb"], CountingEncoder())
+        cache.save()
+
+        encoder = CountingEncoder()
+        reloaded = EmbeddingCache(self.path, "model-a")
+        reloaded.encode(["bb", "a"], encoder)
+        self.assertEqual(encoder.encoded, [])
+
+    def test_other_model_store_is_ignored(self):
+        cache = EmbeddingCache(self.path, "model-a")
+        cache.encode(["a"], CountingEncoder())
+        cache.save()
+        self.assertEqual(len(EmbeddingCache(self.path, "model-b")), 0)
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
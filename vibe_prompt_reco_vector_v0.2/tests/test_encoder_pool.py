@@ -0,0 +1,144 @@
+import unittest
+import sys
+import os
+import tempfile
+import threading
+import time
+import numpy as np
+
+# Add the src directory to sys.path
+src_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, src_dir)
+
+from multiprocessing.connection import Client
+
+from services.encoder_pool import (
+    EncoderModelMismatch, EncoderPool, EncoderUnavailable, RemoteEncoder, authkey_path, worker_address
+)
+
+
+class FakeModel:
+    """Stand-in model; the text "crash" kills the worker process"""
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True):
+        if "crash" in texts:
+            os._exit(1)
+        return np.array([[len(t), os.getpid(), 1.0] for t in texts], dtype=np.float32)
+
+
+def make_fake_model(model_name):
+    return FakeModel()
+
+
+class TestEncoderPool(unittest.TestCase):
+    """Test encoding through worker processes over Unix sockets"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self.temp_dir.name, "encoder.sock")
+        self.pool = EncoderPool(self.socket_path, "fake-model", workers=2, factory=make_fake_model)
+        self.pool.start()
+        self.assertTrue(self.pool.wait_ready(30))
+        self.encoder = RemoteEncoder(self.socket_path, workers=2, model_name="fake-model", timeout=10)
+
+    def tearDown(self):
+        self.encoder.close()
+        self.pool.stop()
+        self.temp_dir.cleanup()
+
+    def test_encode_round_robins_over_workers(self):
+        first = self.encoder.encode(["가나다", "ab"])
+        second = self.encoder.encode(["x"])
+        np.testing.assert_array_equal(first[:, 0], [3, 2])
+        self.assertNotEqual(first[0, 1], second[0, 1])
+        self.assertNotEqual(first[0, 1], os.getpid())
+
+    def test_concurrent_callers(self):
+        results = {}
+
+        def call(i):
+            results[i] = self.encoder.encode(["a" * i])
+
+        threads = [threading.Thread(target=call, args=(i,)) for i in range(1, 9)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual({i: int(v[0, 0]) for i, v in results.items()}, {i: i for i in range(1, 9)})
+
+    def test_crashed_worker_is_retried_and_restarted(self):
+        self.encoder.encode(["warm up"])
+        self.encoder.encode(["warm up"])
+        with self.assertRaises(EncoderUnavailable):
+            # The crash text kills whichever worker receives it, including the retry
+            self.encoder.encode(["crash"])
+        # Both workers died; the monitor notices each one as its process exits
+        restarted, deadline = 0, time.monotonic() + 30
+        while restarted < 2 and time.monotonic() < deadline:
+            restarted += self.pool.check_workers()
+            time.sleep(0.05)
+        self.assertEqual(restarted, 2)
+        self.assertTrue(self.pool.wait_ready(30))
+        self.assertEqual(self.encoder.encode(["after"]).shape, (1, 3))
+
+    def test_restarted_pool_serves_despite_pooled_dead_connections(self):
+        barrier = threading.Barrier(8)
+
+        def call():
+            barrier.wait()
+            self.encoder.encode(["warm up"])
+
+        threads = [threading.Thread(target=call) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertGreater(sum(len(conns) for conns in self.encoder._idle.values()), 2)
+        self.pool.stop()
+        self.pool = EncoderPool(self.socket_path, "fake-model", workers=2, factory=make_fake_model)
+        self.pool.start()
+        self.assertTrue(self.pool.wait_ready(30))
+        self.assertEqual(self.encoder.encode(["after restart"]).shape, (1, 3))
+
+    def test_model_mismatch_is_rejected(self):
+        other = RemoteEncoder(self.socket_path, workers=2, model_name="other-model")
+        with self.assertRaises(EncoderModelMismatch):
+            other.encode(["x"])
+
+    def test_model_mismatch_falls_back_to_local_model(self):
+        loaded = []
+
+        def load_local(model_name):
+            loaded.append(model_name)
+            return FakeModel()
+
+        other = RemoteEncoder(self.socket_path, workers=2, model_name="other-model", fallback=load_local)
+        first = other.encode(["local"])
+        second = other.encode(["again"])
+        self.assertEqual((first[0, 1], second[0, 1]), (os.getpid(), os.getpid()))
+        self.assertEqual(loaded, ["other-model"])
+
+    def test_unauthenticated_client_is_rejected(self):
+        self.assertEqual(oct(os.stat(authkey_path(self.socket_path)).st_mode & 0o777), "0o600")
+        with self.assertRaises(Exception):
+            Client(worker_address(self.socket_path, 0), family="AF_UNIX", authkey=b"wrong key")
+        with self.assertRaises(Exception):
+            with Client(worker_address(self.socket_path, 0), family="AF_UNIX") as conn:
+                conn.send(("hello", None))
+                conn.recv()
+        self.assertEqual(self.encoder.encode(["still served"]).shape, (1, 3))
+
+
+class TestSocketDirectory(unittest.TestCase):
+    """Test that the pool refuses a socket directory other users can enter"""
+
+    def test_shared_directory_is_refused(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            os.chmod(temp_dir, 0o777)
+            pool = EncoderPool(os.path.join(temp_dir, "encoder.sock"), "fake-model", factory=make_fake_model)
+            with self.assertRaises(PermissionError):
+                pool.start()
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
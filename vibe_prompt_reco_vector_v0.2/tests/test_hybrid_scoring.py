@@ -0,0 +1,90 @@
+import unittest
+import sys
+import os
+import tempfile
+import numpy as np
+
+# Add the src directory to sys.path
+src_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, src_dir)
+
+from services.hybrid_scoring import KeywordMatrix, fuse_scores, top_k_indices
+from services.recommendation_service import RecommendationService
+
+
+class LookupEncoder:
+    """Stand-in encoder returning a fixed vector per first word of the text"""
+
+    vectors = {
+        "fastapi": [1.0, 0.0],
+        "vec": [1.0, 0.0],
+        "both": [0.9, 0.436],
+        "kw": [0.0, 1.0]
+    }
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True):
+        return np.array([self.vectors[t.split()[0]] for t in texts], dtype=np.float32)
+
+
+class TestKeywordMatrix(unittest.TestCase):
+    """Test whole-corpus keyword scoring against keyword_recommend's rule"""
+
+    def test_scores_match_keyword_rule(self):
+        prompts = [
+            {"category": "백엔드", "keywords": ["api", "fastapi", "api"]},
+            {"category": "프론트엔드", "keywords": ["react"]},
+            {"keywords": ["api"]},
+            {}
+        ]
+        tags = {"categories": ["백엔드"], "keywords": ["api", "fastapi", "없는단어"]}
+        scores = KeywordMatrix(prompts).scores(tags)
+        np.testing.assert_array_equal(scores, [4, 0, 1, 0])
+
+    def test_top_k_indices(self):
+        scores = np.array([0.1, 0.9, 0.5, 0.9, -1.0])
+        self.assertEqual(top_k_indices(scores, 3).tolist(), [1, 3, 2])
+        self.assertEqual(len(top_k_indices(scores, 10)), 5)
+        self.assertEqual(len(top_k_indices(scores, 0)), 0)
+
+    def test_fuse_scales_keyword_scores(self):
+        fused = fuse_scores(np.array([4.0, 2.0, 0.0]), np.array([0.0, 0.5, 1.0]), 0.4, 0.6)
+        np.testing.assert_allclose(fused, [0.4, 0.5, 0.6])
+
+
+class TestVectorizedHybrid(unittest.TestCase):
+    """Test hybrid_recommend over the whole corpus"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.service = RecommendationService(
+            model_name="test-model", cache_file=os.path.join(self.temp_dir.name, "cache.pkl"),
+            embedding_store_file=None
+        )
+        self.service.model = LookupEncoder()
+        self.prompts = [
+            {"id": "k1", "title": "kw", "prompt": "1", "category": "백엔드", "keywords": ["fastapi", "서버"]},
+            {"id": "k2", "title": "kw", "prompt": "2", "category": "백엔드", "keywords": ["fastapi", "서버"]},
+            {"id": "v1", "title": "vec", "prompt": "1", "category": "기초"},
+            {"id": "v2", "title": "vec", "prompt": "2", "category": "기초"},
+            {"id": "both", "title": "both", "prompt": "1", "category": "백엔드"}
+        ]
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_item_strong_on_both_signals_is_found(self):
+        # "both" is third on each signal alone, so truncated top_k * 2 lists would drop it
+        results = self.service.hybrid_recommend("fastapi 서버", self.prompts, top_k=1)
+        self.assertEqual([r["id"] for r in results], ["both"])
+        self.assertAlmostEqual(results[0]["hybrid_score"], 0.4 * 0.5 + 0.6 * 0.9, places=3)
+
+    def test_returns_top_k_ordered(self):
+        results = self.service.hybrid_recommend("fastapi 서버", self.prompts, top_k=5)
+        self.assertEqual(results[0]["id"], "both")
+        scores = [r["hybrid_score"] for r in results]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        self.assertEqual(len(results), 5)
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
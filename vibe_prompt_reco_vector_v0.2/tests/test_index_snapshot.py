@@ -0,0 +1,145 @@
+import unittest
+import sys
+import os
+import pickle
+import tempfile
+import threading
+import numpy as np
+
+# Add the src directory to sys.path
+src_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, src_dir)
+
+from services.index_snapshot import SnapshotHolder, texts_fingerprint
+from services.recommendation_service import RecommendationService
+
+
+class GatedEncoder:
+    """Stand-in encoder whose corpus encodes can be held until released"""
+
+    def __init__(self):
+        self.corpus_calls = 0
+        self.release = threading.Event()
+        self.release.set()
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True):
+        if len(texts) > 1:
+            self.corpus_calls += 1
+            self.release.wait(5)
+        return np.array([[len(t), sum(map(ord, t)) % 97, 1.0] for t in texts], dtype=np.float32)
+
+
+class TestSnapshotHolder(unittest.TestCase):
+    """Test single-flight rebuilds and snapshot publishing"""
+
+    def test_concurrent_requests_share_one_rebuild(self):
+        started = threading.Event()
+        release = threading.Event()
+        builds = []
+
+        def build(prompts, fingerprint):
+            builds.append(fingerprint)
+            started.set()
+            release.wait(5)
+            return "index", np.zeros((len(prompts), 2), dtype=np.float32)
+
+        holder = SnapshotHolder(build)
+        prompts = [{"id": "1"}]
+        futures = [holder.request(prompts, "fp-1")]
+        started.wait(5)
+        futures += [holder.request(prompts, "fp-1") for _ in range(5)]
+        release.set()
+        snapshots = {id(f.result(5)) for f in futures}
+        self.assertEqual(builds, ["fp-1"])
+        self.assertEqual(len(snapshots), 1)
+        self.assertEqual(holder.current.fingerprint, "fp-1")
+
+    def test_request_during_rebuild_moves_target(self):
+        release = threading.Event()
+        builds = []
+
+        def build(prompts, fingerprint):
+            builds.append(fingerprint)
+            release.wait(5)
+            return "index", None
+
+        holder = SnapshotHolder(build)
+        first = holder.request([], "old")
+        second = holder.request([], "new")
+        release.set()
+        self.assertIs(first, second)
+        self.assertEqual(first.result(5).fingerprint, "new")
+        self.assertLessEqual(len(builds), 2)
+
+    def test_failed_build_keeps_previous_snapshot(self):
+        holder = SnapshotHolder(lambda prompts, fingerprint: None)
+        holder.publish([], "fp-1", "index", None)
+        self.assertEqual(holder.request([], "fp-2").result(5).fingerprint, "fp-1")
+        self.assertEqual(holder.wait(5).fingerprint, "fp-1")
+
+    def test_invalidate_marks_snapshots_stale(self):
+        holder = SnapshotHolder(lambda prompts, fingerprint: None)
+        snapshot = holder.publish([], "fp-1", "index", None)
+        self.assertTrue(holder.is_fresh(snapshot, "fp-1"))
+        holder.invalidate()
+        self.assertFalse(holder.is_fresh(snapshot, "fp-1"))
+
+    def test_fingerprint_depends_on_order(self):
+        self.assertNotEqual(texts_fingerprint(["a", "b"]), texts_fingerprint(["b", "a"]))
+        self.assertNotEqual(texts_fingerprint(["ab"]), texts_fingerprint(["a", "b"]))
+
+
+class TestRecommendationSnapshots(unittest.TestCase):
+    """Test that searches read snapshots and never wait on a rebuild"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.service = RecommendationService(
+            model_name="test-model", cache_file=os.path.join(self.temp_dir.name, "cache.pkl"),
+            embedding_store_file=None
+        )
+        self.encoder = GatedEncoder()
+        self.service.model = self.encoder
+        self.prompts = [
+            {"id": str(i), "title": f"{topic} 예제", "prompt": f"{topic}로 API 만들기"}
+            for i, topic in enumerate(["FastAPI", "Django", "Flask"])
+        ]
+
+    def tearDown(self):
+        self.encoder.release.set()
+        self.service.wait_for_rebuild(5)
+        self.temp_dir.cleanup()
+
+    def test_cold_start_builds_and_saves_cache(self):
+        results = self.service.vector_recommend("FastAPI", self.prompts, top_k=2)
+        self.assertEqual(len(results), 2)
+        with open(self.service.cache_file, "rb") as f:
+            cached = pickle.load(f)
+        self.assertEqual(cached["fingerprint"], self.service.get_snapshot(self.prompts).fingerprint)
+        self.assertEqual(self.encoder.corpus_calls, 1)
+
+    def test_stale_snapshot_served_during_rebuild(self):
+        old = self.service.get_snapshot(self.prompts)
+        added = self.prompts + [{"id": "9", "title": "Express 예제", "prompt": "Express로 API 만들기"}]
+        self.encoder.release.clear()
+        # The rebuild is blocked in the encoder; searches keep using the old snapshot
+        self.assertIs(self.service.get_snapshot(added), old)
+        results = self.service.vector_recommend("Express", added, top_k=5)
+        self.assertEqual({r["id"] for r in results}, {"0", "1", "2"})
+        self.encoder.release.set()
+        new = self.service.wait_for_rebuild(5)
+        self.assertEqual(new.size, 4)
+        self.assertIs(self.service.get_snapshot(added), new)
+
+    def test_invalidate_cache_rebuilds_same_prompts(self):
+        old = self.service.get_snapshot(self.prompts)
+        self.service.invalidate_cache()
+        self.assertFalse(os.path.exists(self.service.cache_file))
+        self.assertIs(self.service.get_snapshot(self.prompts), old)
+        new = self.service.wait_for_rebuild(5)
+        self.assertIsNot(new, old)
+        self.assertEqual(self.encoder.corpus_calls, 2)
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
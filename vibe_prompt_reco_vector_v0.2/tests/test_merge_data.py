@@ -0,0 +1,138 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+from unittest import mock
+
+import numpy as np
+
+# merge_data.py lives in scripts/
+scripts_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+sys.path.insert(0, scripts_dir)
+
+import merge_data
+from merge_data import (
+    char_shingles, find_near_duplicates, remove_near_duplicates,
+    find_semantic_pairs, remove_semantic_duplicates,
+    iter_json_prompts, SortedRuns, merge_data_files
+)
+
+
+class TestNearDuplicates(unittest.TestCase):
+    """Test MinHash/LSH near-duplicate detection"""
+
+    def setUp(self):
+        self.prompts = [
+            {"id": "1", "title": "FastAPI 로그인 API", "prompt": "FastAPI로 JWT 기반 로그인 API를 만들고 토큰 갱신 기능을 구현해줘."},
+            {"id": "2", "title": "React 대시보드", "prompt": "React와 Recharts로 매출 대시보드 화면을 구성해줘."},
+            {"id": "3", "title": "FastAPI 로그인 API", "prompt": "FastAPI로 JWT 기반 로그인 API를 만들고 토큰 갱신 기능을 구현해 주세요."},
+            {"id": "4", "title": "CSV 시각화", "prompt": "pandas로 CSV를 읽고 plotly로 시각화해줘."},
+        ]
+
+    def test_char_shingles_normalize_case_and_whitespace(self):
+        self.assertEqual(char_shingles("AB  cd", 3), char_shingles("ab cd", 3))
+
+    def test_paraphrase_is_clustered(self):
+        clusters = find_near_duplicates(self.prompts, threshold=0.7)
+        self.assertEqual([[i for i, _ in c] for c in clusters], [[0, 2]])
+
+    def test_distinct_prompts_not_clustered(self):
+        self.assertEqual(find_near_duplicates([self.prompts[1], self.prompts[3]], threshold=0.7), [])
+
+    def test_pair_matching_only_each_other_in_a_bucket_is_found(self):
+        # One shared band: a~b and b~c are similar, a~c is not (5 bands of 2 rows at 0.5)
+        signatures = iter(np.array([
+            [0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
+            [0, 0, 0, 0, 0, 0, 1, 1, 1, 1],
+            [0, 0, 0, 3, 0, 3, 1, 3, 1, 3],
+        ], dtype=np.uint64))
+        fake_hasher = mock.Mock(signature=lambda hashes: next(signatures))
+        with mock.patch.object(merge_data, "MinHasher", return_value=fake_hasher):
+            clusters = find_near_duplicates([{"title": t} for t in "abc"], threshold=0.5, num_perm=10)
+        self.assertEqual([[i for i, _ in cluster] for cluster in clusters], [[0, 1, 2]])
+
+    def test_remove_keeps_first_of_cluster(self):
+        unique = remove_near_duplicates(self.prompts, threshold=0.7)
+        self.assertEqual([p["id"] for p in unique], ["1", "2", "4"])
+
+
+class TestSemanticDuplicates(unittest.TestCase):
+    """Test embedding-based dedup on precomputed vectors"""
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        embeddings = rng.randn(30, 16).astype("float32")
+        embeddings[12] = embeddings[4] + 0.01
+        embeddings[25] = embeddings[4] + 0.02
+        self.embeddings = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+        self.prompts = [
+            {"id": f"p{i:02d}", "title": f"t{i}", "prompt": "x" * 10, "category": "c", "keywords": []}
+            for i in range(30)
+        ]
+
+    def test_batched_range_search_finds_all_pairs(self):
+        pairs = find_semantic_pairs(self.embeddings, 0.95, batch_size=7)
+        self.assertEqual([(i, j) for i, j, _ in pairs], [(4, 12), (4, 25), (12, 25)])
+
+    def test_survivor_policy_is_deterministic(self):
+        self.prompts[25]["keywords"] = ["richer"]
+        unique = remove_semantic_duplicates(self.prompts, 0.95, embeddings=self.embeddings)
+        removed = {p["id"] for p in self.prompts} - {p["id"] for p in unique}
+        self.assertEqual(removed, {"p04", "p12"})
+
+
+
+class TestStreamingMerge(unittest.TestCase):
+    """Test the bounded-memory reader, external sort and merge"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.prompts = [
+            {"id": str(i), "title": f"제목 {i:02d}", "prompt": f"내용 {i} " + "가" * i, "category": "백엔드" if i % 2 else "기초"}
+            for i in range(20)
+        ]
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write(self, name, text):
+        path = os.path.join(self.temp_dir.name, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        return path
+
+    def test_reader_handles_arrays_and_json_lines_across_chunks(self):
+        array_path = self.write("a.json", json.dumps(self.prompts, ensure_ascii=False, indent=2))
+        lines_path = self.write("b.jsonl", "\n".join(json.dumps(p, ensure_ascii=False) for p in self.prompts))
+        for path in (array_path, lines_path):
+            self.assertEqual(list(iter_json_prompts(path, chunk_size=7)), self.prompts)
+
+    def test_sorted_runs_merge_in_order(self):
+        runs = SortedRuns(run_size=3, temp_dir=self.temp_dir.name)
+        for prompt in reversed(self.prompts):
+            runs.add(prompt)
+        expected = sorted(self.prompts, key=lambda p: (p["category"], p["title"]))
+        self.assertEqual(list(runs), expected)
+        self.assertEqual(list(runs), expected)
+        runs.cleanup()
+
+    def test_merge_removes_exact_duplicates_from_globbed_inputs(self):
+        self.write("part1.json", json.dumps(self.prompts[:12], ensure_ascii=False))
+        duplicate = dict(self.prompts[3], id="dup")
+        self.write("part2.json", json.dumps(self.prompts[10:] + [duplicate], ensure_ascii=False))
+        output = os.path.join(self.temp_dir.name, "merged.json")
+        with mock.patch.object(merge_data, "update_config_file"):
+            statistics = merge_data_files(
+                [os.path.join(self.temp_dir.name, "part*.json")], output, near_dup=False, run_size=4
+            )
+        with open(output, encoding="utf-8") as f:
+            merged = json.load(f)
+        self.assertEqual(sorted(p["id"] for p in merged), sorted(str(i) for i in range(20)))
+        self.assertEqual(merged, sorted(merged, key=lambda p: (p["category"], p["title"])))
+        self.assertEqual(statistics.total, 20)
+        self.assertEqual(statistics.categories, {"기초": 10, "백엔드": 10})
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
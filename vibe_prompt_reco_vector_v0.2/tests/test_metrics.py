@@ -0,0 +1,111 @@
+import unittest
+import sys
+import os
+import socket
+import tempfile
+import urllib.request
+
+# Add the src directory to sys.path
+src_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, src_dir)
+
+from utils.metrics import Histogram, MetricsRegistry, MetricsExporter, render_openmetrics, write_openmetrics_file
+
+
+class TestHistogram(unittest.TestCase):
+    """Test bucketed histograms"""
+
+    def test_percentiles_use_bucket_bounds(self):
+        histogram = Histogram([1, 10, 100])
+        for value in [0.5] * 90 + [50] * 9 + [500]:
+            histogram.observe(value)
+        self.assertEqual(histogram.percentile(50), 1)
+        self.assertEqual(histogram.percentile(95), 100)
+        self.assertEqual(histogram.percentile(100), 500)
+        self.assertEqual(histogram.summary()["count"], 100)
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    """Test metric families, labels and the registry snapshot"""
+
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_get_or_create_returns_same_family(self):
+        first = self.registry.counter("lookups", labels=("result",))
+        self.assertIs(self.registry.counter("lookups", labels=("result",)), first)
+        with self.assertRaises(ValueError):
+            self.registry.gauge("lookups")
+
+    def test_labels_keep_separate_values(self):
+        lookups = self.registry.counter("lookups", labels=("result",))
+        lookups.labels(result="hit").inc()
+        lookups.labels(result="hit").inc(2)
+        lookups.labels(result="miss").inc()
+        self.registry.gauge("size").set(7)
+        snapshot = self.registry.snapshot()
+        self.assertEqual(snapshot["lookups"], [
+            {"labels": {"result": "hit"}, "value": 3.0},
+            {"labels": {"result": "miss"}, "value": 1.0}
+        ])
+        self.assertEqual(snapshot["size"], [{"labels": {}, "value": 7.0}])
+
+    def test_reset_clears_values(self):
+        self.registry.counter("lookups").inc()
+        self.registry.reset()
+        self.assertEqual(self.registry.snapshot()["lookups"], [])
+
+
+class TestOpenMetricsExport(unittest.TestCase):
+    """Test the OpenMetrics text format, file export and HTTP endpoint"""
+
+    def setUp(self):
+        self.registry = MetricsRegistry()
+        self.registry.counter("errors", "Failed calls", labels=("method",)).labels(method='GET "x"').inc()
+        latency = self.registry.histogram("latency_ms", bounds=[1, 10])
+        latency.observe(0.5)
+        latency.observe(5)
+        latency.observe(50)
+
+    def test_render(self):
+        lines = render_openmetrics(self.registry).splitlines()
+        self.assertIn("# TYPE errors counter", lines)
+        self.assertIn("# HELP errors Failed calls", lines)
+        self.assertIn('errors_total{method="GET \\"x\\""} 1', lines)
+        self.assertIn('latency_ms_bucket{le="1"} 1', lines)
+        self.assertIn('latency_ms_bucket{le="10"} 2', lines)
+        self.assertIn('latency_ms_bucket{le="+Inf"} 3', lines)
+        self.assertIn("latency_ms_count 3", lines)
+        self.assertIn("latency_ms_sum 55.5", lines)
+        self.assertEqual(lines[-1], "# EOF")
+
+    def test_write_file(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "app.prom")
+            write_openmetrics_file(path, self.registry)
+            with open(path, encoding="utf-8") as f:
+                self.assertEqual(f.read(), render_openmetrics(self.registry))
+            self.assertEqual(os.listdir(tmp_dir), ["app.prom"])
+
+    def test_http_endpoint(self):
+        exporter = MetricsExporter(port=0, registry=self.registry)
+        self.assertIsNone(exporter.port)
+        exporter.close()
+
+        exporter = MetricsExporter(registry=self.registry, port=_free_port())
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{exporter.port}/metrics", timeout=5) as response:
+                self.assertTrue(response.headers["Content-Type"].startswith("application/openmetrics-text"))
+                self.assertEqual(response.read().decode("utf-8"), render_openmetrics(self.registry))
+        finally:
+            exporter.close()
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
@@ -0,0 +1,146 @@
+import unittest
+import sys
+import os
+import tempfile
+import gc
+import threading
+import weakref
+import numpy as np
+
+# Add the src directory to sys.path
+src_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, src_dir)
+
+from services.batching_encoder import BatchingEncoder
+from services.model_registry import ModelRegistry
+from services.recommendation_service import RecommendationService, model_namespace, namespaced_path
+
+
+class GatedEncoder:
+    """Stand-in encoder whose corpus encodes wait for ``release`` (set by default)"""
+
+    def __init__(self, dimension):
+        self.dimension = dimension
+        self.release = threading.Event()
+        self.release.set()
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True):
+        if len(texts) > 1:
+            self.release.wait(5)
+        return np.array([[len(t) + i for i in range(self.dimension)] for t in texts], dtype=np.float32)
+
+
+class TestNamespaces(unittest.TestCase):
+    """Test per-model cache file names"""
+
+    def test_namespaced_paths(self):
+        a = namespaced_path("cache/embeddings_cache.pkl", "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
+        b = namespaced_path("cache/embeddings_cache.pkl", "snunlp/KR-SBERT-V40K-klueNLI-augSTS")
+        self.assertTrue(a.startswith("cache/embeddings_cache.paraphrase-multilingual-MiniLM-L12-v2-"))
+        self.assertTrue(a.endswith(".pkl"))
+        self.assertNotEqual(a, b)
+        self.assertNotEqual(model_namespace("org-a/model"), model_namespace("org-b/model"))
+        self.assertIsNone(namespaced_path(None, "model"))
+
+
+class TestModelRegistry(unittest.TestCase):
+    """Test resident models and background switching"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.encoders = {"model-a": GatedEncoder(3), "model-b": GatedEncoder(5), "model-c": GatedEncoder(4)}
+        self.registry = ModelRegistry(
+            default_model="model-a",
+            cache_file=os.path.join(self.temp_dir.name, "cache.pkl"),
+            embedding_store_file=os.path.join(self.temp_dir.name, "store.npz"),
+            encoder_socket="",
+            shared_index_dir="",
+            max_resident=2,
+            factory=self.make_service
+        )
+        self.prompts = [
+            {"id": str(i), "title": f"{topic} 예제", "prompt": f"{topic}로 API 만들기"}
+            for i, topic in enumerate(["FastAPI", "Django", "Flask"])
+        ]
+
+    def make_service(self, **kwargs):
+        service = RecommendationService(**kwargs)
+        service.model = self.encoders[kwargs["model_name"]]
+        return service
+
+    def tearDown(self):
+        for encoder in self.encoders.values():
+            encoder.release.set()
+        for model_name in self.registry.resident:
+            self.registry.get(model_name).wait_for_rebuild(5)
+        self.temp_dir.cleanup()
+
+    def test_models_keep_separate_files(self):
+        a = self.registry.get("model-a")
+        b = self.registry.get("model-b")
+        self.assertNotEqual(a.cache_file, b.cache_file)
+        self.assertNotEqual(a.embedding_store_file, b.embedding_store_file)
+        self.assertEqual(len(a.vector_recommend("FastAPI", self.prompts)), 3)
+        self.assertEqual(len(b.vector_recommend("FastAPI", self.prompts)), 3)
+        self.assertTrue(os.path.exists(a.cache_file) and os.path.exists(b.cache_file))
+        self.assertEqual(a.get_snapshot(self.prompts).embeddings.shape[1], 3)
+        self.assertEqual(b.get_snapshot(self.prompts).embeddings.shape[1], 5)
+
+    def test_switch_serves_old_model_until_new_index_is_ready(self):
+        self.assertEqual(len(self.registry.active.vector_recommend("FastAPI", self.prompts)), 3)
+        self.encoders["model-b"].release.clear()
+        future = self.registry.switch("model-b", self.prompts)
+        self.assertEqual((self.registry.active_model, self.registry.target_model), ("model-a", "model-b"))
+        self.assertEqual(len(self.registry.active.vector_recommend("Django", self.prompts)), 3)
+        self.encoders["model-b"].release.set()
+        self.assertTrue(future.result(5))
+        self.assertEqual((self.registry.active_model, self.registry.target_model), ("model-b", "model-b"))
+        self.assertEqual(sorted(self.registry.resident), ["model-a", "model-b"])
+
+    def test_least_recently_used_idle_model_is_unloaded(self):
+        self.registry.active
+        self.registry.get("model-b")
+        self.registry.get("model-c")
+        self.assertEqual(sorted(self.registry.resident), ["model-a", "model-c"])
+
+    def test_requested_model_is_never_the_one_unloaded(self):
+        self.registry.max_resident = 1
+        self.registry.active
+        self.assertIs(self.registry.get("model-b"), self.registry.get("model-b"))
+        self.assertEqual(sorted(self.registry.resident), ["model-a", "model-b"])
+        self.encoders["model-c"].release.clear()
+        future = self.registry.switch("model-c", self.prompts)
+        self.assertIn("model-c", self.registry.resident)
+        self.encoders["model-c"].release.set()
+        self.assertTrue(future.result(5))
+
+    def test_unloaded_model_is_freed(self):
+        models = {}
+
+        def batched_service(**kwargs):
+            service = RecommendationService(**kwargs)
+            encoder = GatedEncoder(3)
+            models[kwargs["model_name"]] = weakref.ref(encoder)
+            service.model = BatchingEncoder(encoder)
+            return service
+
+        self.registry.factory = batched_service
+        self.registry.active
+        batcher = self.registry.get("model-b").model
+        self.assertEqual(batcher.encode(["FastAPI"]).shape, (1, 3))
+        self.registry.get("model-c")
+        self.assertEqual(sorted(self.registry.resident), ["model-a", "model-c"])
+        self.assertFalse(batcher._worker.is_alive())
+        del batcher
+        gc.collect()
+        self.assertIsNone(models["model-b"]())
+        self.assertIsNotNone(models["model-c"]())
+
+    def test_failed_switch_keeps_active_model(self):
+        self.encoders["model-b"].encode = lambda *args, **kwargs: (_ for _ in ()).throw(RuntimeError("no model"))
+        self.assertFalse(self.registry.switch("model-b", self.prompts).result(5))
+        self.assertEqual((self.registry.active_model, self.registry.target_model), ("model-a", "model-a"))
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
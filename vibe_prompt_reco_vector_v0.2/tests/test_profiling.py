@@ -0,0 +1,47 @@
+import unittest
+import sys
+import os
+import json
+import pstats
+import tempfile
+
+# Add the src directory to sys.path
+src_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, src_dir)
+
+from utils.profiling import profile_request
+from utils.tracing import request_scope
+
+
+class TestProfileRequest(unittest.TestCase):
+    """Test the per-request cProfile hook"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_disabled_writes_nothing(self):
+        with profile_request("recommend", False, output_dir=self.temp_dir.name) as profile:
+            sum(range(100))
+        self.assertIsNone(profile.path)
+        self.assertEqual(os.listdir(self.temp_dir.name), [])
+
+    def test_enabled_dumps_tagged_pstats(self):
+        with request_scope("request.recommend") as request_id:
+            with profile_request("recommend", True, output_dir=self.temp_dir.name,
+                                 query="fastapi 로그인", mode="하이브리드") as profile:
+                profile.tag(corpus=108)
+                sorted(range(1000), key=lambda x: -x)
+        name = os.path.basename(profile.path)
+        self.assertTrue(name.endswith(f"-recommend-fastapi_로그인-하이브리드-108-{request_id}.pstats"))
+        self.assertGreater(pstats.Stats(profile.path).total_calls, 0)
+        with open(profile.path[:-len(".pstats")] + ".json", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.assertEqual(meta["tags"], {"query": "fastapi 로그인", "mode": "하이브리드", "corpus": 108})
+        self.assertEqual(meta["request_id"], request_id)
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
@@ -0,0 +1,130 @@
+import unittest
+import sys
+import os
+import tempfile
+from unittest import mock
+import numpy as np
+
+# Add the src directory to sys.path
+src_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, src_dir)
+bench_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+sys.path.insert(0, bench_dir)
+
+from corpus import HashingEncoder, generate_corpus, generate_queries, load_vocabulary
+
+from services.hybrid_scoring import rrf_scores
+from services.rank_fusion import RankedStream, rrf_top_k, threshold_top_k
+from services.recommendation_service import RecommendationService
+
+
+def dense_stream(scores, first_depth=4):
+    order = np.argsort(-scores, kind="stable")
+    return RankedStream(lambda depth: (order[:depth], scores[order[:depth]]), len(scores), first_depth, floor=-1.0)
+
+
+class TestRankFusion(unittest.TestCase):
+    """Test early-terminating fusion against brute force"""
+
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        self.n = 5000
+        self.vector = rng.random(self.n)
+        # Keyword scores: sparse and correlated with the vector scores
+        self.keyword = np.where(rng.random(self.n) < 0.2, np.round(self.vector * 4), 0.0)
+
+    def test_threshold_matches_brute_force(self):
+        for k in (1, 5, 20):
+            streams = [RankedStream.from_scores(self.keyword), dense_stream(self.vector)]
+            ranked = threshold_top_k(
+                streams, [0.4, 0.6], [lambda d: self.keyword[d], lambda d: self.vector[d]], k
+            )
+            fused = 0.4 * self.keyword + 0.6 * self.vector
+            expected = np.sort(fused)[::-1][:k]
+            np.testing.assert_allclose([score for _, score in ranked], expected)
+            self.assertLess(sum(s.position for s in streams), self.n // 4)
+
+    def test_rrf_matches_brute_force(self):
+        for c in (60, 0):
+            for k in (1, 5, 20):
+                streams = [RankedStream.from_scores(self.keyword), dense_stream(self.vector)]
+                ranked = rrf_top_k(streams, k, [0.4, 0.6], c=c)
+                fused = rrf_scores(self.keyword, self.vector, 0.4, 0.6, c=c)
+                expected = np.argsort(-fused, kind="stable")[:k]
+                self.assertEqual([doc for doc, _ in ranked], expected.tolist(), (c, k))
+                np.testing.assert_allclose([score for _, score in ranked], fused[expected])
+                self.assertLess(sum(s.position for s in streams), self.n)
+
+    def test_rrf_orders_by_exact_scores(self):
+        rng = np.random.default_rng(11)
+        for _ in range(200):
+            keyword = np.where(rng.random(300) < 0.3, rng.integers(1, 5, 300), 0).astype(np.float64)
+            vector = rng.random(300)
+            streams = [RankedStream.from_scores(keyword), dense_stream(vector)]
+            ranked = rrf_top_k(streams, 5, [0.4, 0.6], c=0)
+            fused = rrf_scores(keyword, vector, 0.4, 0.6, c=0)
+            expected = np.argsort(-fused, kind="stable")[:5]
+            self.assertEqual([doc for doc, _ in ranked], expected.tolist())
+            np.testing.assert_allclose([score for _, score in ranked], fused[expected])
+
+    def test_small_corpus_returns_everything(self):
+        scores = np.array([0.3, 0.9, 0.1])
+        streams = [RankedStream.from_scores(np.zeros(3)), dense_stream(scores)]
+        ranked = threshold_top_k(streams, [0.5, 0.5], [lambda d: 0.0, lambda d: scores[d]], 10)
+        self.assertEqual([doc for doc, _ in ranked], [1, 0, 2])
+        self.assertEqual(len(rrf_top_k([dense_stream(scores)], 10)), 3)
+
+    def test_stream_fetches_with_doubling_depth(self):
+        depths = []
+        scores = np.arange(100, dtype=np.float32)[::-1]
+
+        def fetch(depth):
+            depths.append(depth)
+            return np.arange(depth), scores[:depth]
+
+        stream = RankedStream(fetch, 100, first_depth=10)
+        pulled = [stream.next() for _ in range(25)]
+        self.assertEqual(pulled[24], (24, 75.0))
+        self.assertEqual(depths, [10, 20, 40])
+
+
+class TestThresholdHybrid(unittest.TestCase):
+    """Test that threshold fusion returns what full scoring returns"""
+
+    @classmethod
+    def setUpClass(cls):
+        vocab = load_vocabulary()
+        cls.prompts = generate_corpus(2000, seed=3, vocab=vocab)
+        cls.queries = generate_queries(10, seed=4, vocab=vocab)
+        cls.temp_dir = tempfile.TemporaryDirectory()
+        cls.service = RecommendationService(
+            model_name="bench-HashingEncoder", cache_file=os.path.join(cls.temp_dir.name, "cache.pkl"),
+            embedding_store_file=None
+        )
+        cls.service.model = HashingEncoder(64)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.temp_dir.cleanup()
+
+    def test_same_results_as_full_scoring(self):
+        threshold_fusion = self.service._threshold_fusion
+        with mock.patch.object(self.service, "_threshold_fusion", side_effect=threshold_fusion) as spy:
+            for method in ("weighted", "rrf"):
+                for query in self.queries:
+                    full = self.service.hybrid_recommend(query, self.prompts, 5, fusion="full", method=method)
+                    # cached similarities would send the threshold call down the full path
+                    self.service._scores.clear()
+                    threshold = self.service.hybrid_recommend(
+                        query, self.prompts, 5, fusion="threshold", method=method
+                    )
+                    self.service._scores.clear()
+                    self.assertEqual([p["id"] for p in threshold], [p["id"] for p in full], (method, query))
+                    np.testing.assert_allclose(
+                        [p["hybrid_score"] for p in threshold], [p["hybrid_score"] for p in full], rtol=1e-5
+                    )
+        self.assertEqual(spy.call_count, 2 * len(self.queries))
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
@@ -0,0 +1,142 @@
+import unittest
+import sys
+import os
+import tempfile
+from unittest import mock
+import numpy as np
+
+# Add the src directory to sys.path
+src_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, src_dir)
+
+from services import recommendation_service
+from services.prompt_service import PromptCorpus
+from services.recommendation_service import RecommendationService
+from services.score_cache import ScoreCache, ScoreComponents
+from utils import tracing
+
+
+class CountingEncoder:
+    """Deterministic stand-in encoder that records what it was asked to encode"""
+
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True):
+        self.encoded.extend(texts)
+        return np.array([[len(t), sum(map(ord, t)) % 97, 1.0] for t in texts], dtype=np.float32)
+
+
+def components(query, fingerprint="fp", size=10):
+    return ScoreComponents(query, fingerprint, [], {"categories": [], "keywords": []}, np.zeros(size, dtype=np.float32))
+
+
+class TestScoreCache(unittest.TestCase):
+    """Test the LRU bounds of the score cache"""
+
+    def test_lru_by_entries(self):
+        cache = ScoreCache(max_entries=2)
+        cache.put(components("a"))
+        cache.put(components("b"))
+        self.assertIsNotNone(cache.get("a", "fp"))
+        cache.put(components("c"))
+        self.assertIsNone(cache.get("b", "fp"))
+        self.assertIsNotNone(cache.get("a", "fp"))
+        self.assertIsNone(cache.get("a", "other-fp"))
+
+    def test_bounded_by_bytes(self):
+        cache = ScoreCache(max_entries=100, max_bytes=100)
+        cache.put(components("a", size=10))
+        cache.put(components("b", size=10))
+        self.assertEqual((len(cache), cache.nbytes), (2, 80))
+        cache.with_vectors(cache.get("a", "fp"), np.zeros((1, 3), dtype=np.float32), np.zeros(10, dtype=np.float32))
+        self.assertIsNone(cache.get("b", "fp"))
+        self.assertEqual(cache.nbytes, 92)
+        cache.put(components("huge", size=1000))
+        self.assertIsNone(cache.get("huge", "fp"))
+
+
+class TestCachedModes(unittest.TestCase):
+    """Test that switching modes and weights re-fuses cached scores"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.prompts = [
+            {"id": str(i), "title": f"prompt {i}", "prompt": "내용 " * (i % 5), "category": cat,
+             "keywords": kws}
+            for i, (cat, kws) in enumerate([
+                ("백엔드", ["fastapi", "api"]), ("프론트엔드", ["react"]), ("백엔드", ["api"]),
+                ("데이터분석", ["csv", "pandas"]), ("AI/LLM", ["llm"]), ("백엔드", ["서버"])
+            ])
+        ]
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def make_service(self, name):
+        service = RecommendationService(
+            model_name="test-model", cache_file=os.path.join(self.temp_dir.name, f"{name}.pkl"),
+            embedding_store_file=None
+        )
+        service.model = CountingEncoder()
+        return service
+
+    def query_encodes(self, service):
+        return [t for t in service.model.encoded if t == "fastapi api 서버"]
+
+    def test_mode_and_weight_switches_encode_once(self):
+        service = self.make_service("cached")
+        query = "fastapi api 서버"
+        vector = service.recommend(query, self.prompts, "vector")
+        hybrid = service.recommend(query, self.prompts, "hybrid")
+        reweighted = service.recommend(query, self.prompts, "hybrid", keyword_weight=0.9, vector_weight=0.1)
+        keyword = service.recommend(query, self.prompts, "keyword")
+        self.assertEqual(len(self.query_encodes(service)), 1)
+
+        fresh = self.make_service("fresh")
+        self.assertEqual(vector, fresh.vector_recommend(query, self.prompts))
+        self.assertEqual(hybrid, fresh.hybrid_recommend(query, self.prompts))
+        self.assertEqual(
+            reweighted, fresh.hybrid_recommend(query, self.prompts, keyword_weight=0.9, vector_weight=0.1)
+        )
+        self.assertEqual(keyword, fresh.keyword_recommend(fresh.extract_tags(query), self.prompts))
+
+    def test_keyword_mode_does_not_encode(self):
+        service = self.make_service("keyword")
+        results = service.recommend("react 폼", self.prompts, "keyword")
+        self.assertEqual([r["id"] for r in results], ["1"])
+        self.assertEqual(service.model.encoded, [])
+
+    def test_cached_keyword_path_has_its_own_span(self):
+        service = self.make_service("spans")
+        tracing.reset_histograms()
+        service.recommend("react 폼", self.prompts, "keyword")
+        service.keyword_recommend(service.extract_tags("react 폼"), self.prompts)
+        summaries = tracing.histogram_summaries()
+        self.assertEqual(summaries["keyword_recommend.cached"]["count"], 1)
+        self.assertEqual(summaries["keyword_recommend"]["count"], 1)
+
+    def test_corpus_change_is_a_new_entry(self):
+        service = self.make_service("changed")
+        query = "fastapi api 서버"
+        service.recommend(query, self.prompts, "hybrid")
+        added = self.prompts + [{"id": "new", "title": "fastapi 서버", "category": "백엔드", "keywords": ["fastapi"]}]
+        service.recommend(query, added, "hybrid")
+        service.wait_for_rebuild(timeout=5)
+        results = service.recommend(query, added, "hybrid", top_k=10)
+        self.assertIn("new", [r["id"] for r in results])
+        self.assertEqual(len(self.query_encodes(service)), 2)
+
+    def test_corpus_version_is_fingerprinted_once(self):
+        service = self.make_service("versioned")
+        corpus = PromptCorpus(self.prompts, version=1)
+        with mock.patch.object(
+            recommendation_service, "texts_fingerprint", wraps=recommendation_service.texts_fingerprint
+        ) as fingerprint:
+            for mode in ("vector", "hybrid", "keyword", "hybrid"):
+                service.recommend("fastapi api 서버", corpus, mode)
+        self.assertEqual(fingerprint.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
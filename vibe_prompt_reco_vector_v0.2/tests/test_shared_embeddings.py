@@ -0,0 +1,112 @@
+import unittest
+import sys
+import os
+import tempfile
+import numpy as np
+import faiss
+
+# Add the src directory to sys.path
+src_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, src_dir)
+
+from services.recommendation_service import RecommendationService
+from services.shared_embeddings import MmapFlatIndex, SharedEmbeddingStore
+
+
+class CountingEncoder:
+    """Deterministic stand-in encoder that records what it was asked to encode"""
+
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True):
+        self.encoded.extend(texts)
+        return np.array([[len(t), sum(map(ord, t)) % 97, 1.0] for t in texts], dtype=np.float32)
+
+
+class TestSharedEmbeddingStore(unittest.TestCase):
+    """Test publishing and attaching generations"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.store = SharedEmbeddingStore(self.temp_dir.name)
+        self.vectors = np.random.default_rng(0).random((50, 8), dtype=np.float32)
+        faiss.normalize_L2(self.vectors)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_publish_and_attach_read_only(self):
+        self.assertIsNone(self.store.attach())
+        generation = self.store.publish("fp-1", "model", self.vectors, [str(i) for i in range(50)])
+        shared = self.store.attach()
+        self.assertEqual((shared.generation, shared.fingerprint), (generation, "fp-1"))
+        self.assertIsInstance(shared.embeddings, np.memmap)
+        self.assertFalse(shared.embeddings.flags.writeable)
+        np.testing.assert_array_equal(shared.embeddings, self.vectors)
+        self.assertEqual(shared.ids[3], "3")
+
+    def test_same_fingerprint_reuses_generation_and_old_ones_are_pruned(self):
+        ids = [str(i) for i in range(50)]
+        first = self.store.publish("fp-1", "model", self.vectors, ids)
+        self.assertEqual(self.store.publish("fp-1", "model", self.vectors, ids), first)
+        for n in range(2, 5):
+            self.store.publish(f"fp-{n}", "model", self.vectors, ids)
+        self.assertEqual(self.store.current_generation(), 4)
+        self.assertEqual(sorted(d for d in os.listdir(self.temp_dir.name) if d.startswith("gen-")), ["gen-3", "gen-4"])
+
+    def test_mmap_index_matches_faiss(self):
+        queries = self.vectors[:5] + 0.01
+        index = faiss.IndexFlatIP(8)
+        index.add(self.vectors)
+        expected_scores, expected_ids = index.search(queries, 7)
+        scores, ids = MmapFlatIndex(self.vectors).search(queries, 7)
+        np.testing.assert_array_equal(ids, expected_ids)
+        np.testing.assert_allclose(scores, expected_scores, rtol=1e-5)
+        self.assertEqual(MmapFlatIndex(self.vectors).search(queries, 500)[1].shape, (5, 50))
+
+
+class TestSharedAcrossServices(unittest.TestCase):
+    """Two services stand in for two app processes sharing one directory"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.services = []
+        for name in ("a", "b"):
+            service = RecommendationService(
+                model_name="test-model", cache_file=os.path.join(self.temp_dir.name, f"cache-{name}.pkl"),
+                embedding_store_file=None, shared_index_dir=os.path.join(self.temp_dir.name, "shared")
+            )
+            service.model = CountingEncoder()
+            self.services.append(service)
+        self.prompts = [
+            {"id": str(i), "title": f"{topic} 예제", "prompt": f"{topic}로 API 만들기"}
+            for i, topic in enumerate(["FastAPI", "Django", "Flask", "Express"])
+        ]
+
+    def tearDown(self):
+        for service in self.services:
+            service.wait_for_rebuild(5)
+        self.temp_dir.cleanup()
+
+    def test_second_process_attaches_without_encoding(self):
+        first, second = self.services
+        expected = first.vector_recommend("Django", self.prompts, top_k=2)
+        self.assertEqual(second.vector_recommend("Django", self.prompts, top_k=2), expected)
+        self.assertEqual(second.model.encoded, ["Django"])
+        self.assertIsInstance(second.get_snapshot(self.prompts).embeddings, np.memmap)
+
+    def test_new_generation_is_picked_up(self):
+        first, second = self.services
+        old = first.get_snapshot(self.prompts)
+        added = self.prompts + [{"id": "9", "title": "Spring 예제", "prompt": "Spring으로 API 만들기"}]
+        second.get_snapshot(added)
+        # First notices generation 2, serves the old snapshot meanwhile, then attaches the new one
+        self.assertIs(first.get_snapshot(added), old)
+        new = first.wait_for_rebuild(5)
+        self.assertEqual(new.size, 5)
+        self.assertEqual(len(first.model.encoded), 4)
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
@@ -0,0 +1,177 @@
+import unittest
+import sys
+import os
+import tempfile
+import json
+
+# Add the src directory to sys.path
+src_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, src_dir)
+
+from services.storage import SQLiteStorage
+from services.prompt_service import PromptService
+from utils.helpers import filter_prompts
+
+
+SAMPLE_PROMPTS = [
+    {
+        "id": "1", "title": "React 로그인 폼", "prompt": "React로 로그인 폼을 만들어줘",
+        "category": "프론트엔드", "tool": "React", "framework": "Next.js",
+        "level": "중급", "keywords": ["react", "로그인"]
+    },
+    {
+        "id": "2", "title": "FastAPI 서버", "prompt": "FastAPI로 REST API 서버 구축",
+        "category": "백엔드", "tool": "FastAPI", "framework": "Python",
+        "level": "고급", "keywords": ["api", "server"]
+    },
+    {
+        "id": "3", "title": "텍스트 요약 챗봇", "prompt": "llama로 문서를 요약하는 챗봇",
+        "category": "AI/LLM", "tool": "Llama", "framework": "Python",
+        "level": "입문", "keywords": ["요약", "llm"]
+    },
+]
+
+
+class StorageContractTests:
+    """CRUD contract every PromptStorage backend must satisfy"""
+
+    def make_storage(self):
+        raise NotImplementedError
+
+    def setUp(self):
+        self.storage = self.make_storage()
+        self.storage.insert_many([dict(p) for p in SAMPLE_PROMPTS])
+
+    def test_load_all_keeps_insertion_order(self):
+        self.assertEqual([p["id"] for p in self.storage.load_all()], ["1", "2", "3"])
+
+    def test_insert_and_get(self):
+        record = {"id": "new", "title": "t", "prompt": "p", "category": "기초", "level": "입문", "keywords": ["k"]}
+        self.assertEqual(self.storage.insert(record)["id"], "new")
+        stored = self.storage.get("new")
+        self.assertEqual(stored["title"], "t")
+        self.assertEqual(stored["keywords"], ["k"])
+
+    def test_insert_duplicate_id_fails(self):
+        self.assertIsNone(self.storage.insert(dict(SAMPLE_PROMPTS[0])))
+
+    def test_get_missing(self):
+        self.assertIsNone(self.storage.get("missing"))
+
+    def test_update(self):
+        self.assertTrue(self.storage.update("2", {"title": "수정됨", "keywords": ["x"]}))
+        stored = self.storage.get("2")
+        self.assertEqual(stored["title"], "수정됨")
+        self.assertEqual(stored["keywords"], ["x"])
+        self.assertFalse(self.storage.update("missing", {"title": "x"}))
+
+    def test_delete(self):
+        self.assertTrue(self.storage.delete("1"))
+        self.assertIsNone(self.storage.get("1"))
+        self.assertFalse(self.storage.delete("1"))
+
+    def test_batch_operations(self):
+        self.assertEqual([p["id"] for p in self.storage.get_many(["3", "missing", "1"])], ["3", "1"])
+        self.assertEqual(self.storage.update_many({"1": {"level": "고급"}, "x": {"level": "고급"}}), {"1": True, "x": False})
+        self.assertEqual(self.storage.delete_many(["1", "x", "2"]), ["1", "2"])
+        self.assertEqual([p["id"] for p in self.storage.load_all()], ["3"])
+
+
+class TestSQLiteStorage(StorageContractTests, unittest.TestCase):
+    """Run the storage contract against the SQLite backend"""
+
+    def make_storage(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        return SQLiteStorage(os.path.join(self.temp_dir.name, "prompts.db"))
+
+    def tearDown(self):
+        self.storage.close()
+        self.temp_dir.cleanup()
+
+    def test_wal_mode(self):
+        mode = self.storage._connect().execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual(mode, "wal")
+
+    def test_search_matches_filter_prompts(self):
+        cases = [
+            {"search_query": "react"},
+            {"search_query": "요약"},
+            {"search_query": "REST API"},
+            {"search_query": "없는검색어"},
+            {"categories": ["백엔드", "AI/LLM"]},
+            {"levels": ["입문"], "search_query": "챗봇"},
+            {"tools": ["React"], "search_query": "fastapi"},
+        ]
+        for case in cases:
+            expected = [p["id"] for p in filter_prompts(SAMPLE_PROMPTS, **case)]
+            found = self.storage.search(
+                query=case.get("search_query"), categories=case.get("categories"),
+                levels=case.get("levels"), tools=case.get("tools")
+            )
+            self.assertEqual([p["id"] for p in found], expected, case)
+
+    def test_search_by_keywords(self):
+        found = self.storage.search(keywords=["llm", "server"])
+        self.assertEqual([p["id"] for p in found], ["2", "3"])
+
+    def test_fts_follows_updates_and_deletes(self):
+        self.storage.update("1", {"title": "Vue 회원가입", "prompt": "Vue 회원가입 폼", "keywords": ["vue"]})
+        self.assertEqual(self.storage.search(query="react"), [])
+        self.assertEqual([p["id"] for p in self.storage.search(query="회원가입")], ["1"])
+        self.storage.delete("1")
+        self.assertEqual(self.storage.search(query="회원가입"), [])
+
+    def test_seed_from_json(self):
+        seed_path = os.path.join(self.temp_dir.name, "seed.json")
+        with open(seed_path, "w", encoding="utf-8") as f:
+            json.dump(SAMPLE_PROMPTS + [SAMPLE_PROMPTS[0]], f, ensure_ascii=False)
+        seeded = SQLiteStorage(os.path.join(self.temp_dir.name, "seeded.db"), seed_file=seed_path)
+        self.assertEqual(len(seeded.load_all()), 3)
+        seeded.close()
+
+
+class TestPromptServiceWithSQLite(unittest.TestCase):
+    """PromptService CRUD works offline on the SQLite backend"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.storage = SQLiteStorage(os.path.join(self.temp_dir.name, "prompts.db"))
+        self.service = PromptService(storage=self.storage)
+
+    def tearDown(self):
+        self.storage.close()
+        self.temp_dir.cleanup()
+
+    def test_add_update_delete(self):
+        added = self.service.add_prompt("  제목 ", " 내용 ", "기초", keywords=["python"])
+        self.assertEqual(added["title"], "제목")
+        self.assertTrue(self.service.update_prompt(added["id"], {"level": "고급"}))
+        self.assertEqual(self.service.get_prompt_by_id(added["id"])["level"], "고급")
+        self.assertEqual(len(self.service.load_prompts()), 1)
+        self.assertTrue(self.service.delete_prompt(added["id"]))
+        self.assertEqual(self.service.load_prompts(), [])
+
+    def test_unchanged_corpus_keeps_its_version(self):
+        self.service.add_prompt("제목", "내용", "기초")
+        first = self.service.load_prompts()
+        self.assertIs(self.service.load_prompts(), first)
+        first.fingerprint = "memo"
+        self.service.update_prompt(first[0]["id"], {"level": "고급"})
+        second = self.service.load_prompts()
+        self.assertGreater(second.version, first.version)
+        self.assertIsNone(second.fingerprint)
+        # a change made behind the service's back (another process) is detected on load
+        self.storage.update(first[0]["id"], {"level": "초급"})
+        self.assertGreater(self.service.load_prompts().version, second.version)
+
+    def test_search_prompts(self):
+        self.service.add_prompts([
+            {"title": "CSV 시각화", "prompt": "plotly 차트", "category": "데이터분석"},
+            {"title": "Docker 배포", "prompt": "컨테이너 배포", "category": "DevOps"},
+        ])
+        found = self.service.search_prompts(search_query="plotly")
+        self.assertEqual([p["title"] for p in found], ["CSV 시각화"])
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
@@ -0,0 +1,54 @@
+import unittest
+import sys
+import os
+import json
+import logging
+from unittest import mock
+
+# Add the src directory to sys.path
+src_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, src_dir)
+
+from utils import tracing
+from utils.tracing import span, traced, request_scope, current_request_id, histogram_summaries
+
+
+class TestSpans(unittest.TestCase):
+    """Test spans, request scopes and JSON trace lines"""
+
+    def setUp(self):
+        tracing.reset_histograms()
+
+    def test_spans_feed_histograms(self):
+        @traced("test.decorated")
+        def work():
+            return 42
+
+        with span("test.block"):
+            self.assertEqual(work(), 42)
+        summaries = histogram_summaries()
+        self.assertEqual(summaries["test.block"]["count"], 1)
+        self.assertEqual(summaries["test.decorated"]["count"], 1)
+
+    def test_request_scope_logs_spans_as_json(self):
+        with self.assertLogs("trace", level=logging.INFO) as logs, \
+                mock.patch.object(tracing, "TRACE_LOG_JSON", True):
+            with request_scope("test.request", mode="hybrid") as request_id:
+                self.assertEqual(current_request_id(), request_id)
+                with span("test.inner"):
+                    pass
+        self.assertIsNone(current_request_id())
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record["request_id"], request_id)
+        self.assertEqual(record["attributes"], {"mode": "hybrid"})
+        self.assertEqual([s["name"] for s in record["spans"]], ["test.inner", "test.request"])
+
+    def test_exceptions_still_record_span(self):
+        with self.assertRaises(ValueError):
+            with span("test.failing"):
+                raise ValueError("boom")
+        self.assertEqual(histogram_summaries()["test.failing"]["count"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
@@ -0,0 +1,128 @@
+import unittest
+import sys
+import os
+import tempfile
+import json
+from pathlib import Path
+from unittest.mock import MagicMock
+
+# upload_prompt.py lives in the project root
+root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, root_dir)
+
+import upload_prompt
+from upload_prompt import (
+    UploadCheckpoint, chunk_rows, upload_chunks, upsert_with_retry,
+    content_columns, content_hash, diff_rows
+)
+
+
+class TransientError(Exception):
+    status_code = 503
+
+
+class TestChunkedUpload(unittest.TestCase):
+    """Test batched, resumable upload helpers"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.checkpoint_path = Path(self.temp_dir.name) / "checkpoint.json"
+        self.rows = [{"id": str(i), "title": f"t{i}"} for i in range(10)]
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_chunk_rows(self):
+        chunks = chunk_rows(self.rows, 4)
+        self.assertEqual([len(c) for c in chunks], [4, 4, 2])
+
+    def test_load_rows_drops_duplicate_ids(self):
+        path = Path(self.temp_dir.name) / "prompts.json"
+        path.write_text(json.dumps([{"id": "1", "title": "a"}, {"id": "1", "title": "b"}]), encoding="utf-8")
+        rows = upload_prompt.load_rows(path)
+        self.assertEqual(rows, [{"id": "1", "title": "b"}])
+
+    def test_retry_on_transient_error(self):
+        client = MagicMock()
+        client.table.return_value.upsert.return_value.execute.side_effect = [TransientError(), MagicMock()]
+        upsert_with_retry(client, "prompts", self.rows, max_retries=2, sleep=lambda _: None)
+        self.assertEqual(client.table.return_value.upsert.return_value.execute.call_count, 2)
+
+    def test_no_retry_on_permanent_error(self):
+        client = MagicMock()
+        client.table.return_value.upsert.return_value.execute.side_effect = ValueError("bad row")
+        with self.assertRaises(ValueError):
+            upsert_with_retry(client, "prompts", self.rows, max_retries=3, sleep=lambda _: None)
+
+    def test_checkpoint_skips_committed_chunks(self):
+        chunks = chunk_rows(self.rows, 3)
+        checkpoint = UploadCheckpoint(self.checkpoint_path, "fp", 3)
+        checkpoint.mark_done(0)
+        checkpoint.mark_done(2)
+
+        resumed = UploadCheckpoint(self.checkpoint_path, "fp", 3)
+        resumed.load()
+        client = MagicMock()
+        summary = upload_chunks(client, "prompts", chunks, resumed, workers=2)
+
+        uploaded = [call.args[0] for call in client.table.return_value.upsert.call_args_list]
+        self.assertCountEqual(uploaded, [chunks[1], chunks[3]])
+        self.assertEqual(summary["uploaded_rows"], 4)
+        self.assertEqual(summary["skipped_rows"], 6)
+        self.assertEqual(resumed.completed, {0, 1, 2, 3})
+
+    def test_checkpoint_ignored_for_different_input(self):
+        UploadCheckpoint(self.checkpoint_path, "fp", 3).mark_done(0)
+        other = UploadCheckpoint(self.checkpoint_path, "other", 3)
+        other.load()
+        self.assertEqual(other.completed, set())
+
+
+class TestSyncDiff(unittest.TestCase):
+    """Test diff-based sync planning"""
+
+    def setUp(self):
+        self.local = [
+            {"id": "1", "title": "same", "keywords": ["a"]},
+            {"id": "2", "title": "changed", "keywords": []},
+            {"id": "3", "title": "new", "keywords": []},
+        ]
+        self.columns = content_columns(self.local)
+        self.remote = {
+            "1": content_hash({"id": "1", "title": "same", "keywords": ["a"]}, self.columns),
+            "2": content_hash({"id": "2", "title": "old", "keywords": []}, self.columns),
+            "4": "stale",
+        }
+
+    def test_content_hash_ignores_key_order_and_server_columns(self):
+        a = {"id": "1", "title": "x", "keywords": ["k"]}
+        b = {"keywords": ["k"], "updated_at": "2024-01-01", "title": "x", "id": "1"}
+        columns = content_columns([a, b])
+        self.assertEqual(content_hash(a, columns), content_hash(b, columns))
+
+    def test_diff_rows(self):
+        diff = diff_rows(self.local, self.remote, self.columns)
+        self.assertEqual([r["id"] for r in diff["inserts"]], ["3"])
+        self.assertEqual([r["id"] for r in diff["updates"]], ["2"])
+        self.assertEqual(diff["unchanged"], ["1"])
+        self.assertEqual(diff["deletes"], [])
+
+    def test_diff_rows_with_deletes(self):
+        diff = diff_rows(self.local, self.remote, self.columns, include_deletes=True)
+        self.assertEqual(diff["deletes"], ["4"])
+
+    def test_diff_rows_attaches_hash_column(self):
+        columns = content_columns(self.local, "content_hash")
+        diff = diff_rows(self.local, {}, columns, hash_column="content_hash")
+        for row in diff["inserts"]:
+            self.assertEqual(row["content_hash"], content_hash(row, columns))
+
+    def test_sync_only_flags_are_rejected_in_upload_mode(self):
+        for flag in ("--dry-run", "--delete"):
+            with self.assertRaises(SystemExit):
+                upload_prompt.parse_args([flag])
+        self.assertTrue(upload_prompt.parse_args(["--mode", "sync", "--dry-run", "--delete"]).dry_run)
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
@@ -0,0 +1,223 @@
+import unittest
+import sys
+import os
+import tempfile
+import time
+from unittest import mock
+
+import httpx
+
+# Add the src directory to sys.path
+src_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, src_dir)
+
+from services.async_prompt_service import AsyncPromptService, PromptBatchClient
+from services.storage import SQLiteStorage, SupabaseStorage
+from services.prompt_service import PromptService
+from services.write_journal import WriteJournal, coalesce, INSERT, UPDATE, DELETE, REPLACE
+
+
+class FlakyStorage(SQLiteStorage):
+    """SQLite store that rejects every write while ``down`` is set"""
+
+    down = False
+
+    def insert_many(self, records):
+        if self.down:
+            raise ConnectionError("store unavailable")
+        return super().insert_many(records)
+
+    def insert(self, record):
+        if self.down:
+            raise ConnectionError("store unavailable")
+        return super().insert(record)
+
+    def update_many(self, updates):
+        if self.down:
+            raise ConnectionError("store unavailable")
+        return super().update_many(updates)
+
+    def delete_many(self, prompt_ids):
+        if self.down:
+            raise ConnectionError("store unavailable")
+        return super().delete_many(prompt_ids)
+
+
+def entry(seq, op, prompt_id, data=None):
+    return {"seq": seq, "op": op, "id": prompt_id, "data": data}
+
+
+class TestCoalesce(unittest.TestCase):
+    """Test per-id coalescing of journal entries"""
+
+    def test_insert_then_updates(self):
+        state = coalesce([
+            entry(1, INSERT, "a", {"id": "a", "title": "t", "level": "입문"}),
+            entry(2, UPDATE, "a", {"title": "t2"}),
+            entry(3, UPDATE, "a", {"level": "고급"}),
+        ])
+        self.assertEqual(state, {"a": (INSERT, {"id": "a", "title": "t2", "level": "고급"})})
+
+    def test_insert_then_delete_still_deletes(self):
+        self.assertEqual(
+            coalesce([entry(1, INSERT, "a", {"id": "a"}), entry(2, DELETE, "a")]), {"a": (DELETE, None)}
+        )
+
+    def test_update_then_delete(self):
+        state = coalesce([entry(1, UPDATE, "a", {"title": "x"}), entry(2, DELETE, "a")])
+        self.assertEqual(state, {"a": (DELETE, None)})
+
+    def test_delete_then_insert(self):
+        state = coalesce([entry(1, DELETE, "a"), entry(2, INSERT, "a", {"id": "a"})])
+        self.assertEqual(state, {"a": (REPLACE, {"id": "a"})})
+
+
+class TestWriteJournal(unittest.TestCase):
+    """Test durable write-behind through PromptService"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.journal_path = os.path.join(self.temp_dir.name, "writes.journal")
+        self.storage = FlakyStorage(os.path.join(self.temp_dir.name, "prompts.db"))
+
+    def tearDown(self):
+        self.storage.close()
+        self.temp_dir.cleanup()
+
+    def make_service(self):
+        journal = WriteJournal(self.journal_path, self.storage, start=False)
+        return PromptService(storage=self.storage, journal=journal), journal
+
+    def test_writes_visible_before_flush(self):
+        service, journal = self.make_service()
+        added = service.add_prompt("제목", "내용", "기초")
+        service.update_prompt(added["id"], {"level": "고급"})
+        self.assertEqual(self.storage.load_all(), [])
+        self.assertEqual(service.get_prompt_by_id(added["id"])["level"], "고급")
+        self.assertEqual([p["id"] for p in service.load_prompts()], [added["id"]])
+        self.assertTrue(journal.flush())
+        self.assertEqual(self.storage.get(added["id"])["level"], "고급")
+        self.assertEqual(journal.pending_count, 0)
+        journal.close()
+
+    def test_failed_flush_keeps_entries(self):
+        service, journal = self.make_service()
+        self.storage.down = True
+        added = service.add_prompt("제목", "내용", "기초")
+        self.assertFalse(journal.flush())
+        self.assertEqual(journal.pending_count, 1)
+        self.storage.down = False
+        self.assertTrue(journal.flush())
+        self.assertIsNotNone(self.storage.get(added["id"]))
+        journal.close()
+
+    def test_replay_after_restart(self):
+        service, journal = self.make_service()
+        self.storage.down = True
+        added = service.add_prompt("제목", "내용", "기초")
+        journal.close(flush=False)
+
+        self.storage.down = False
+        service, journal = self.make_service()
+        self.assertEqual(journal.pending_count, 1)
+        self.assertTrue(journal.flush())
+        self.assertEqual(self.storage.get(added["id"])["title"], "제목")
+        journal.close()
+
+    def test_replay_of_already_flushed_insert_is_harmless(self):
+        service, journal = self.make_service()
+        added = service.add_prompt("제목", "내용", "기초")
+        # Simulate a crash after the upstream write but before compaction
+        self.storage.insert(service.get_prompt_by_id(added["id"]))
+        self.assertTrue(journal.flush())
+        self.assertEqual(len(self.storage.load_all()), 1)
+        journal.close()
+
+    def test_delete_after_replayed_insert_removes_row(self):
+        service, journal = self.make_service()
+        added = service.add_prompt("제목", "내용", "기초")
+        # Crash after the insert landed upstream but before compaction, then delete
+        self.storage.insert(service.get_prompt_by_id(added["id"]))
+        journal.close(flush=False)
+        service, journal = self.make_service()
+        service.delete_prompt(added["id"])
+        self.assertTrue(journal.flush())
+        self.assertEqual(self.storage.load_all(), [])
+        journal.close()
+
+    def test_update_merged_into_landed_insert_is_applied(self):
+        service, journal = self.make_service()
+        added = service.add_prompt("제목", "내용", "기초")
+        # The insert landed upstream before a crash; the update was journaled after it
+        self.storage.insert(service.get_prompt_by_id(added["id"]))
+        service.update_prompt(added["id"], {"level": "고급"})
+        self.assertTrue(journal.flush())
+        self.assertEqual(self.storage.get(added["id"])["level"], "고급")
+        journal.close()
+
+    def test_pending_insert_overrides_stored_row(self):
+        _, journal = self.make_service()
+        journal.append(INSERT, "a", {"id": "a", "title": "new"})
+        self.assertEqual(journal.overlay([{"id": "a", "title": "old"}]), [{"id": "a", "title": "new"}])
+        journal.close(flush=False)
+
+    def test_torn_last_line_is_ignored(self):
+        _, journal = self.make_service()
+        journal.append(DELETE, "x")
+        journal.close(flush=False)
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            f.write('{"seq": 2, "op": "ins')
+        _, journal = self.make_service()
+        self.assertEqual(journal.pending_count, 1)
+        journal.close(flush=False)
+
+    def test_background_flusher(self):
+        journal = WriteJournal(self.journal_path, self.storage, flush_interval=0.05)
+        service = PromptService(storage=self.storage, journal=journal)
+        added = service.add_prompt("제목", "내용", "기초")
+        deadline = time.monotonic() + 5
+        while journal.pending_count and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertIsNotNone(self.storage.get(added["id"]))
+        journal.close()
+
+
+class TestRemoteDown(unittest.TestCase):
+    """Test that writes survive a flush while Supabase cannot be reached"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+        def refuse(request):
+            raise httpx.ConnectError("connection refused", request=request)
+
+        self.client = PromptBatchClient(AsyncPromptService(
+            url="http://supabase.local", key="test-key", transport=httpx.MockTransport(refuse)
+        ))
+        patcher = mock.patch("services.async_prompt_service.get_batch_client", return_value=self.client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.storage = SupabaseStorage(url="http://supabase.local", key="test-key")
+        # the one-by-one insert fallback goes through the supabase client, which swallows errors too
+        self.storage.insert = lambda record: None
+
+    def tearDown(self):
+        self.client.close()
+        self.temp_dir.cleanup()
+
+    def test_failed_flush_keeps_every_op(self):
+        journal = WriteJournal(os.path.join(self.temp_dir.name, "writes.journal"), self.storage, start=False)
+        journal.append(UPDATE, "a", {"title": "edited"})
+        journal.append(DELETE, "b")
+        journal.append(INSERT, "c", {"id": "c", "title": "new"})
+        self.assertFalse(journal.flush())
+        self.assertEqual(journal.pending_state(), {
+            "a": (UPDATE, {"title": "edited"}),
+            "b": (DELETE, None),
+            "c": (INSERT, {"id": "c", "title": "new"}),
+        })
+        journal.close(flush=False)
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
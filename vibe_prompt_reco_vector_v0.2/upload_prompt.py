@@ -1,47 +1,481 @@
+import argparse
+import hashlib
 import json
 import os
 import sys
 import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
+from typing import List, Dict, Any, Set, Optional
 from supabase import create_client, Client
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def main():
+DEFAULT_TABLE = "prompts"
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_WORKERS = 4
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BACKOFF_BASE = 0.5
+MAX_BACKOFF_SECONDS = 30.0
+DEFAULT_PAGE_SIZE = 1000
+
+# HTTP status codes worth retrying (timeouts, rate limits, gateway errors)
+TRANSIENT_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504}
+
+# Server-managed columns that never take part in content comparison
+NON_CONTENT_COLUMNS = {"created_at", "updated_at"}
+
+
+def load_rows(prompts_file: Path) -> List[Dict[str, Any]]:
+    """Load prompts and drop repeated ids (last one wins).
+
+    A single upsert statement cannot touch the same primary key twice,
+    so duplicates inside one chunk would fail the whole chunk.
+    """
+    with open(prompts_file, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict) and "prompts" in data:
+        data = data["prompts"]
+
+    by_id: Dict[Any, Dict[str, Any]] = {}
+    for item in data:
+        by_id[item.get("id")] = item
+    if len(by_id) != len(data):
+        logger.warning(f"Dropped {len(data) - len(by_id)} rows with duplicate ids")
+    return list(by_id.values())
+
+
+def chunk_rows(rows: List[Dict[str, Any]], batch_size: int) -> List[List[Dict[str, Any]]]:
+    """Split rows into fixed-size chunks"""
+    if batch_size < 1:
+        raise ValueError("batch_size must be >= 1")
+    return [rows[i:i + batch_size] for i in range(0, len(rows), batch_size)]
+
+
+def file_fingerprint(path: Path) -> str:
+    """Content hash of the input file, used to tie a checkpoint to one input"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class UploadCheckpoint:
+    """Records which chunks have been committed so a re-run can skip them.
+
+    The checkpoint is only honoured when the input file fingerprint and the
+    batch size match; otherwise chunk boundaries differ and it is discarded.
+    With ``path=None`` progress is tracked in memory only.
+    """
+
+    def __init__(self, path: Optional[Path], fingerprint: str, batch_size: int):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.batch_size = batch_size
+        self.completed: Set[int] = set()
+        self._lock = threading.Lock()
+
+    def load(self) -> None:
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable checkpoint {self.path}: {e}")
+            return
+        if state.get("fingerprint") != self.fingerprint or state.get("batch_size") != self.batch_size:
+            logger.info("Checkpoint belongs to a different input or batch size; starting over")
+            return
+        self.completed = set(state.get("completed", []))
+
+    def mark_done(self, chunk_index: int) -> None:
+        with self._lock:
+            self.completed.add(chunk_index)
+            self._write()
+
+    def clear(self) -> None:
+        with self._lock:
+            self.completed = set()
+            if self.path is not None and self.path.exists():
+                self.path.unlink()
+
+    def _write(self) -> None:
+        if self.path is None:
+            return
+        state = {
+            "fingerprint": self.fingerprint,
+            "batch_size": self.batch_size,
+            "completed": sorted(self.completed),
+        }
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+
+def is_transient_error(error: Exception) -> bool:
+    """Whether an upsert failure is worth retrying"""
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    try:
+        if int(status) in TRANSIENT_STATUS_CODES:
+            return True
+    except (TypeError, ValueError):
+        pass
+    # httpx transport errors (ConnectTimeout, ReadError, RemoteProtocolError, ...)
+    error_name = type(error).__name__
+    return error_name.endswith(("Timeout", "TimeoutException")) or error_name in {
+        "ConnectError", "ReadError", "WriteError", "RemoteProtocolError", "PoolTimeout",
+    }
+
+
+def call_with_retry(
+    operation,
+    description: str,
+    max_retries: int = DEFAULT_MAX_RETRIES,
+    backoff_base: float = DEFAULT_BACKOFF_BASE,
+    sleep=time.sleep,
+):
+    """Run ``operation()``, retrying transient errors with exponential backoff + jitter"""
+    attempt = 0
+    while True:
+        try:
+            return operation()
+        except Exception as e:
+            if attempt >= max_retries or not is_transient_error(e):
+                raise
+            delay = min(MAX_BACKOFF_SECONDS, backoff_base * (2 ** attempt))
+            delay *= random.uniform(0.5, 1.0)
+            attempt += 1
+            logger.warning(f"Transient {description} error ({e}); retry {attempt}/{max_retries} in {delay:.2f}s")
+            sleep(delay)
+
+
+def upsert_with_retry(
+    supabase: Client,
+    table: str,
+    rows: List[Dict[str, Any]],
+    max_retries: int = DEFAULT_MAX_RETRIES,
+    backoff_base: float = DEFAULT_BACKOFF_BASE,
+    sleep=time.sleep,
+) -> None:
+    """Upsert one chunk"""
+    call_with_retry(
+        lambda: supabase.table(table).upsert(rows).execute(),
+        "upsert", max_retries, backoff_base, sleep
+    )
+
+
+def upload_chunks(
+    supabase: Client,
+    table: str,
+    chunks: List[List[Dict[str, Any]]],
+    checkpoint: UploadCheckpoint,
+    workers: int = DEFAULT_WORKERS,
+    max_retries: int = DEFAULT_MAX_RETRIES,
+    backoff_base: float = DEFAULT_BACKOFF_BASE,
+) -> Dict[str, Any]:
+    """Upload pending chunks with a bounded worker pool.
+
+    Returns a summary with uploaded/skipped/failed row counts, elapsed time
+    and throughput in rows per second.
+    """
+    pending = [i for i in range(len(chunks)) if i not in checkpoint.completed]
+    skipped_rows = sum(len(chunks[i]) for i in checkpoint.completed if i < len(chunks))
+    if skipped_rows:
+        logger.info(f"Skipping {len(chunks) - len(pending)} chunks ({skipped_rows} rows) already committed")
+
+    uploaded_rows = 0
+    failed_chunks: List[int] = []
+    started = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {
+            executor.submit(upsert_with_retry, supabase, table, chunks[i], max_retries, backoff_base): i
+            for i in pending
+        }
+        for future in as_completed(futures):
+            chunk_index = futures[future]
+            try:
+                future.result()
+            except Exception as e:
+                logger.error(f"Failed to upload chunk {chunk_index} ({len(chunks[chunk_index])} rows): {e}")
+                failed_chunks.append(chunk_index)
+                continue
+            checkpoint.mark_done(chunk_index)
+            uploaded_rows += len(chunks[chunk_index])
+            elapsed = time.perf_counter() - started
+            logger.info(
+                f"Committed chunk {chunk_index + 1}/{len(chunks)} "
+                f"({uploaded_rows} rows, {uploaded_rows / elapsed if elapsed else 0:.1f} rows/s)"
+            )
+
+    elapsed = time.perf_counter() - started
+    return {
+        "uploaded_rows": uploaded_rows,
+        "skipped_rows": skipped_rows,
+        "failed_rows": sum(len(chunks[i]) for i in failed_chunks),
+        "failed_chunks": sorted(failed_chunks),
+        "elapsed_seconds": elapsed,
+        "rows_per_second": uploaded_rows / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def content_columns(rows: List[Dict[str, Any]], hash_column: Optional[str] = None) -> List[str]:
+    """Columns that take part in the content hash: every local column except server-managed ones"""
+    columns = set()
+    for row in rows:
+        columns.update(row.keys())
+    columns -= NON_CONTENT_COLUMNS
+    columns.discard(hash_column)
+    return sorted(columns)
+
+
+def content_hash(row: Dict[str, Any], columns: List[str]) -> str:
+    """Stable hash of a row's content over ``columns``, independent of key order.
+
+    Missing keys hash like explicit nulls, so a local row without ``framework``
+    matches a remote row whose ``framework`` is null.
+    """
+    content = {column: row.get(column) for column in columns}
+    encoded = json.dumps(content, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def fetch_remote_hashes(
+    supabase: Client,
+    table: str,
+    columns: List[str],
+    hash_column: Optional[str] = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+) -> Dict[Any, str]:
+    """Fetch ``{id: content hash}`` for every remote row, one page at a time.
+
+    With ``hash_column`` only ids and stored hashes travel over the wire.
+    Without it, the content ``columns`` are fetched and hashed locally.
+    """
+    selected = ["id", hash_column] if hash_column else sorted(set(columns) | {"id"})
+    remote: Dict[Any, str] = {}
+    start = 0
+    while True:
+        response = (
+            supabase.table(table).select(",".join(selected))
+            .order("id").range(start, start + page_size - 1).execute()
+        )
+        page = response.data or []
+        for row in page:
+            remote[row["id"]] = row.get(hash_column) if hash_column else content_hash(row, columns)
+        if len(page) < page_size:
+            return remote
+        start += page_size
+
+
+def diff_rows(
+    local_rows: List[Dict[str, Any]],
+    remote_hashes: Dict[Any, str],
+    columns: List[str],
+    hash_column: Optional[str] = None,
+    include_deletes: bool = False,
+) -> Dict[str, List[Any]]:
+    """Compare local rows against remote hashes.
+
+    When ``hash_column`` is set, outgoing rows carry their new hash so the
+    next sync only needs to fetch ids and hashes. Returns ``inserts`` and ``updates`` (rows to upsert), ``deletes``
+    (remote ids missing locally, only when requested) and ``unchanged`` ids.
+    """
+    inserts, updates, unchanged = [], [], []
+    local_ids = set()
+    for row in local_rows:
+        row_id = row.get("id")
+        local_ids.add(row_id)
+        digest = content_hash(row, columns)
+        outgoing = dict(row, **{hash_column: digest}) if hash_column else row
+        if row_id not in remote_hashes:
+            inserts.append(outgoing)
+        elif remote_hashes[row_id] != digest:
+            updates.append(outgoing)
+        else:
+            unchanged.append(row_id)
+
+    deletes = sorted(set(remote_hashes) - local_ids, key=str) if include_deletes else []
+    return {"inserts": inserts, "updates": updates, "deletes": deletes, "unchanged": unchanged}
+
+
+def delete_ids(
+    supabase: Client,
+    table: str,
+    ids: List[Any],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_retries: int = DEFAULT_MAX_RETRIES,
+    backoff_base: float = DEFAULT_BACKOFF_BASE,
+    sleep=time.sleep,
+) -> int:
+    """Delete rows by id in chunks, with the same retry policy as upserts"""
+    deleted = 0
+    for start in range(0, len(ids), batch_size):
+        batch = ids[start:start + batch_size]
+        call_with_retry(
+            lambda: supabase.table(table).delete().in_("id", batch).execute(),
+            "delete", max_retries, backoff_base, sleep
+        )
+        deleted += len(batch)
+    return deleted
+
+
+def format_sync_summary(diff: Dict[str, List[Any]]) -> str:
+    return (
+        f"{len(diff['inserts'])} inserts, {len(diff['updates'])} updates, "
+        f"{len(diff['deletes'])} deletes, {len(diff['unchanged'])} unchanged"
+    )
+
+
+def run_sync(supabase: Client, rows: List[Dict[str, Any]], args: argparse.Namespace) -> None:
+    """Send only the rows that differ from the remote table"""
+    started = time.perf_counter()
+    columns = content_columns(rows, args.hash_column)
+    remote_hashes = fetch_remote_hashes(supabase, args.table, columns, args.hash_column, args.page_size)
+    logger.info(f"Fetched {len(remote_hashes)} remote hashes in {time.perf_counter() - started:.2f}s")
+
+    diff = diff_rows(rows, remote_hashes, columns, args.hash_column, include_deletes=args.delete)
+    logger.info(f"Sync plan: {format_sync_summary(diff)}")
+
+    if args.dry_run:
+        for label in ("inserts", "updates"):
+            for row in diff[label][:20]:
+                logger.info(f"  [{label[:-1]}] {row.get('id')}: {row.get('title', '')}")
+        for row_id in diff["deletes"][:20]:
+            logger.info(f"  [delete] {row_id}")
+        logger.info("Dry run: nothing was sent")
+        return
+
+    changed = diff["inserts"] + diff["updates"]
+    if changed:
+        # The changed set differs on every run, so progress is not persisted;
+        # an interrupted sync simply recomputes the diff next time.
+        checkpoint = UploadCheckpoint(None, "", args.batch_size)
+        summary = upload_chunks(
+            supabase, args.table, chunk_rows(changed, args.batch_size), checkpoint,
+            workers=args.workers, max_retries=args.max_retries, backoff_base=args.backoff
+        )
+        logger.info(
+            f"Upserted {summary['uploaded_rows']} rows ({summary['rows_per_second']:.1f} rows/s)"
+        )
+        if summary["failed_chunks"]:
+            logger.error(f"{summary['failed_rows']} changed rows failed to upload; re-run sync to retry")
+            sys.exit(1)
+
+    if diff["deletes"]:
+        deleted = delete_ids(
+            supabase, args.table, diff["deletes"], args.batch_size, args.max_retries, args.backoff
+        )
+        logger.info(f"Deleted {deleted} remote rows")
+
+    logger.info("Sync completed successfully")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    script_dir = Path(__file__).parent
+    parser = argparse.ArgumentParser(description="Upload prompts to Supabase in batches")
+    parser.add_argument("--file", type=Path, default=script_dir / "data" / "prompts.json",
+                        help="JSON file with prompts to upload")
+    parser.add_argument("--table", default=DEFAULT_TABLE, help="Target table name")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help="Rows per upsert request")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="Number of concurrent upload workers")
+    parser.add_argument("--max-retries", type=int, default=DEFAULT_MAX_RETRIES,
+                        help="Retries per chunk on transient errors")
+    parser.add_argument("--backoff", type=float, default=DEFAULT_BACKOFF_BASE,
+                        help="Base delay in seconds for exponential backoff")
+    parser.add_argument("--checkpoint", type=Path, default=None,
+                        help="Checkpoint file (default: <file>.upload_checkpoint.json)")
+    parser.add_argument("--restart", action="store_true",
+                        help="Ignore any existing checkpoint and upload everything")
+    parser.add_argument("--mode", choices=["upload", "sync"], default="upload",
+                        help="upload: upsert every row; sync: send only inserts/updates/deletes")
+    parser.add_argument("--hash-column", default=None,
+                        help="Remote column holding a content hash, written on upload and read on sync; "
+                             "when omitted, sync fetches the content columns and hashes them locally")
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE,
+                        help="Rows per page when fetching remote state (sync only)")
+    parser.add_argument("--delete", action="store_true",
+                        help="Delete remote rows that are missing from the local file (sync only)")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Print the sync plan without sending anything (sync only)")
+    args = parser.parse_args(argv)
+    # upload mode would ignore these and upsert every row for real
+    for flag, value in (("--dry-run", args.dry_run), ("--delete", args.delete)):
+        if value and args.mode != "sync":
+            parser.error(f"{flag} requires --mode sync")
+    return args
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
     try:
         url = os.getenv("SUPABASE_URL")
         key = os.getenv("SUPABASE_KEY")
-        
+
         if not url or not key:
             logger.error("SUPABASE_URL and SUPABASE_KEY environment variables must be set")
             sys.exit(1)
-        
+
         supabase: Client = create_client(url, key)
-        
-        script_dir = Path(__file__).parent
-        prompts_file = script_dir / "data" / "prompts.json"
-        
+
+        prompts_file = args.file
         if not prompts_file.exists():
             logger.error(f"Prompts file not found: {prompts_file}")
             sys.exit(1)
-        
-        with open(prompts_file, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        
-        logger.info(f"Uploading {len(data)} prompts to Supabase...")
-        
-        for i, item in enumerate(data, 1):
-            try:
-                result = supabase.table("prompts").upsert(item).execute()
-                if i % 10 == 0:
-                    logger.info(f"Uploaded {i}/{len(data)} prompts")
-            except Exception as e:
-                logger.error(f"Failed to upload prompt {i}: {e}")
-                continue
-        
+
+        rows = load_rows(prompts_file)
+        if args.mode == "sync":
+            run_sync(supabase, rows, args)
+            return
+
+        if args.hash_column:
+            columns = content_columns(rows, args.hash_column)
+            rows = [dict(row, **{args.hash_column: content_hash(row, columns)}) for row in rows]
+        chunks = chunk_rows(rows, args.batch_size)
+
+        checkpoint_path = args.checkpoint or prompts_file.with_name(prompts_file.name + ".upload_checkpoint.json")
+        checkpoint = UploadCheckpoint(checkpoint_path, file_fingerprint(prompts_file), args.batch_size)
+        if args.restart:
+            checkpoint.clear()
+        else:
+            checkpoint.load()
+
+        logger.info(
+            f"Uploading {len(rows)} prompts to Supabase in {len(chunks)} chunks "
+            f"(batch size {args.batch_size}, {args.workers} workers)..."
+        )
+        summary = upload_chunks(
+            supabase, args.table, chunks, checkpoint,
+            workers=args.workers, max_retries=args.max_retries, backoff_base=args.backoff
+        )
+        logger.info(
+            f"Uploaded {summary['uploaded_rows']} rows in {summary['elapsed_seconds']:.2f}s "
+            f"({summary['rows_per_second']:.1f} rows/s), skipped {summary['skipped_rows']} already committed"
+        )
+
+        if summary["failed_chunks"]:
+            logger.error(
+                f"{summary['failed_rows']} rows in chunks {summary['failed_chunks']} failed; "
+                f"re-run to resume from {checkpoint_path}"
+            )
+            sys.exit(1)
+
+        checkpoint.clear()
         logger.info("Upload completed successfully")
-        
+
     except FileNotFoundError as e:
         logger.error(f"File not found: {e}")
         sys.exit(1)
@@ -53,4 +487,4 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()